@@ -1,11 +1,14 @@
 from abc import abstractclassmethod
 import threading
+from collections import deque
 from functools import partial
 from ratio1 import Session, Pipeline, Instance
 
 from naeural_core.business.base import BasePluginExecutor as BaseClass
 from extensions.business.mixins.chain_dist_merge_mixin import _ChainDistMergeMixin
 from extensions.business.mixins.chain_dist_split_mixin import _ChainDistSplitMixin
+from extensions.business.mixins.chain_dist_speculation_mixin import _ChainDistSpeculationMixin
+from extensions.business.mixins.chain_dist_checkpoint_mixin import _ChainDistCheckpointMixin
 
 _CONFIG = {
   **BaseClass.CONFIG,
@@ -36,6 +39,30 @@ _CONFIG = {
 
   'PING_SEND_PERIOD_MIN': 30,  # seconds
   'PING_SEND_PERIOD_MAX': 60,  # seconds
+
+  # 'EVEN' splits the input in equal shards, 'WEIGHTED' plans the nodes before the split and
+  # sizes their shards by their throughput measured in the previous jobs
+  'SPLIT_STRATEGY': 'EVEN',
+  'THROUGHPUT_EMA_ALPHA': 0.3,
+  # the slowest node gets at least this fraction of the shard size of the fastest node
+  'MIN_SHARD_WEIGHT_RATIO': 0.1,
+
+  # start a copy of a lagging shard on an idle node and keep the result that closes first
+  'SPECULATIVE_EXECUTION': False,
+  # a shard is a straggler after running this long ...
+  'SPECULATION_MIN_ELAPSED': 60,  # seconds
+  # ... with its progress this many percentage points behind the median progress of the shards
+  'SPECULATION_PROGRESS_LAG': 30,
+  'SPECULATION_MAX_COPIES': 2,  # concurrent speculative copies
+
+  # the state is checkpointed in an append-only log, which is compacted in a snapshot when it
+  # grows larger than both the snapshot and this size
+  'CHECKPOINT_COMPACTION_MIN_SIZE': 1 << 20,  # bytes
+  'CHECKPOINT_FSYNC': False,
+
+  # parallel upload, download and frame counting of the shards in the split and merge helpers
+  'SHARD_TRANSFER_WORKERS': 4,
+  'SHARD_TRANSFER_RETRIES': 2,
   ##########################
 
   'VALIDATION_RULES': {
@@ -44,7 +71,9 @@ _CONFIG = {
 }
 
 
-class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin):
+class BaseChainDistPlugin(
+  BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin, _ChainDistSpeculationMixin, _ChainDistCheckpointMixin
+):
   CONFIG = _CONFIG
 
   class STATE:
@@ -98,6 +127,12 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     self._last_sent_progress = 0
 
     self._unused_configured_nodes = []
+    self._planned_nodes = []
+    self._shard_weights = []
+
+    # job_id -> the speculative copy of the job, not persisted
+    self._speculative_jobs = {}
+    self._nr_speculative_jobs_started = 0
 
     self.dct_persistent_data = {}
 
@@ -106,6 +141,13 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     if self.cfg_nodes is not None:
       self._unused_configured_nodes = [node for node in self.cfg_nodes]
 
+    self._checkpoint_init(
+      folder=self.os_path.join(
+        self.get_data_folder(), 'chain_dist', f"{self._stream_id}__{self._signature}__{self.get_instance_id()}"
+      ),
+      compaction_min_size=self.cfg_checkpoint_compaction_min_size,
+      fsync=self.cfg_checkpoint_fsync,
+    )
     self.__load_state()
     self.__last_time_saved_state = 0
 
@@ -119,6 +161,10 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
         return
 
     self.__last_time_saved_state = self.time()
+    self._checkpoint_save(*self.__split_state(self.__get_current_state()))
+    return
+
+  def __get_current_state(self):
     jobs = {}
 
     for job_id, job in self._jobs.items():
@@ -135,12 +181,55 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
       'input_shards': self.input_shards,
       'critical_failure': self.__critical_failure,
       'unused_configured_nodes': self._unused_configured_nodes,
+      'planned_nodes': self._planned_nodes,
+      'shard_weights': self._shard_weights,
       'chain_dist_state': self.__get_chain_dist_state(),
       'persistent_data': self.dct_persistent_data,
     }
+    return dct_current_state
 
-    self.persistence_serialization_save(dct_current_state)
-    return
+  def __split_state(self, dct_state):
+    """
+    Split the state in the metadata and the lists of collected data, which are checkpointed
+    incrementally.
+    """
+    meta = dict(dct_state)
+    dct_lists = {}
+
+    jobs = {}
+    for job_id, job in dct_state['jobs'].items():
+      # the pipeline and the instance are runtime handles, they do not survive a restart
+      job = {k: v for k, v in job.items() if k not in ['pipeline', 'instance']}
+      if isinstance(job.get('data'), list):
+        dct_lists[('jobs', job_id)] = job.pop('data')
+      jobs[job_id] = job
+    # endfor jobs
+
+    collected_data = {}
+    for job_id, data in dct_state['collected_data'].items():
+      if isinstance(data, list):
+        dct_lists[('collected_data', job_id)] = data
+      else:
+        collected_data[job_id] = data
+    # endfor collected data
+
+    meta['jobs'] = jobs
+    meta['collected_data'] = collected_data
+    return meta, dct_lists
+
+  def __merge_state(self, meta, dct_lists):
+    dct_state = dict(meta)
+    jobs = {job_id: dict(job) for job_id, job in meta['jobs'].items()}
+    collected_data = dict(meta['collected_data'])
+    for key, lst in dct_lists.items():
+      if key[0] == 'jobs':
+        jobs[key[1]]['data'] = lst
+      elif key[0] == 'collected_data':
+        collected_data[key[1]] = lst
+    # endfor lists
+    dct_state['jobs'] = jobs
+    dct_state['collected_data'] = collected_data
+    return dct_state
 
   def __delete_state(self):
     # TODO: implement
@@ -148,7 +237,12 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
 
   def __load_state(self):
     # read from local cache the last known state of this instance
-    dct_last_state = self.persistence_serialization_load()
+    meta, dct_lists = self._checkpoint_load()
+    if meta is not None:
+      dct_last_state = self.__merge_state(meta, dct_lists)
+    else:
+      # the state saved as a whole by the previous versions, if any
+      dct_last_state = self.persistence_serialization_load()
 
     if dct_last_state is not None:
       self._dct_finished_jobs = dct_last_state['dct_finished_jobs']
@@ -174,6 +268,8 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
 
       self.__critical_failure = dct_last_state['critical_failure']
       self._unused_configured_nodes = dct_last_state['unused_configured_nodes']
+      self._planned_nodes = dct_last_state.get('planned_nodes', [])
+      self._shard_weights = dct_last_state.get('shard_weights', [])
 
       self.state_machine_api_destroy(name=self.__state_machine_name)
       self.state_machine_api_init(
@@ -183,18 +279,26 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
         on_successful_step_callback=self.__save_state
       )
       self.dct_persistent_data = dct_last_state['persistent_data']
+
+      # continue the log from a fresh snapshot of the recovered state
+      self._checkpoint_start(*self.__split_state(self.__get_current_state()))
     return
 
   def on_close(self):
     super(BaseChainDistPlugin, self).on_close()
 
+    self.__stop_all_speculative_jobs()
     for job_id in self._jobs:
+      if self._dct_finished_jobs.get(job_id, False):
+        # closed already, or its speculative copy closed first
+        continue
       if self._jobs[job_id].in_progress and 'node' in self._jobs[job_id] and self._get_job_state_machine_state(job_id) not in [self.SUB_STATE.CLOSED_JOB, self.SUB_STATE.WAITING_CLOSING_CONFIRMATION]:
         self.P("DEBUG: closing active job {} on {}".format(self._jobs[job_id].job_name, self._jobs[job_id].node), color='r')
         self._send_close_job_command(job_id)
         self._jobs[job_id].in_progress = False
         self._jobs[job_id].chain_dist_state = self.SUB_STATE.CLOSED_JOB
     self.__save_state()
+    self._checkpoint_close()
     
     if self.__get_chain_dist_state() == self.STATE.S5_FINISHED:
       self.__delete_state()
@@ -274,7 +378,16 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     if job.get('node') is not None:
       return
 
-    if len(self._unused_configured_nodes) > 0:
+    planned_node = job.get('planned_node')
+    assigned_nodes = self.__get_busy_nodes()
+
+    if planned_node is not None and planned_node not in assigned_nodes:
+      # the shard was sized for this node
+      node = planned_node
+      if node in self._unused_configured_nodes:
+        self._unused_configured_nodes.remove(node)
+
+    elif len(self._unused_configured_nodes) > 0:
       node = self._unused_configured_nodes.pop(0)
 
     else:
@@ -282,12 +395,6 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
       if True:
         possible_nodes = self.netmon.network_top_n_avail_nodes(2 * self._nr_remote_nodes, min_gpu_capability=0, verbose=0, permit_less=True)
 
-        assigned_nodes = []
-        for __job in self._jobs.values():
-          if __job.get('node') is not None:
-            assigned_nodes.append(__job.node)
-        # end for get assigned nodes
-
         possible_nodes = [node for node in possible_nodes if node not in assigned_nodes]
 
         if len(possible_nodes) > 0:
@@ -308,35 +415,45 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     job = self._jobs[job_id]
     return job.get('node') is not None
 
-  def _send_config_to_node(self, job_id):
-    job = self._jobs[job_id]
-
-    config_plugin = self.generate_node_plugin_configuration(self.input_shards[job_id], job.node)
+  def __deploy_job_pipeline(self, job_id, node, pipeline_name, on_data, on_notification):
+    config_plugin = self.generate_node_plugin_configuration(self.input_shards[job_id], node)
 
-     # TODO: job.node is an address, we need to get the node_id
-    node_id = self.netmon.network_node_eeid(job.node)
-    pipeline_name = job.job_name
+     # TODO: node is an address, we need to get the node_id
+    node_id = self.netmon.network_node_eeid(node)
     signature = config_plugin[self.ct.BIZ_PLUGIN_DATA.SIGNATURE]
     instance_id = self.cfg_node_default_instance_id
     
     instance_config = config_plugin[self.ct.BIZ_PLUGIN_DATA.INSTANCES][0]
 
-    job.pipeline = self._session.create_pipeline(
+    pipeline = self._session.create_pipeline(
       node=node_id,
       name=pipeline_name,
       data_source=self.cfg_node_pipeline_config['stream_type'],
       config=self.cfg_node_pipeline_config,
     )
 
-    job.instance = job.pipeline.create_plugin_instance(
+    instance = pipeline.create_plugin_instance(
       signature=signature,
       instance_id=instance_id,
       config=instance_config,
+      on_data=on_data,
+      on_notification=on_notification,
+    )
+
+    pipeline.deploy(wait_confirmation=False)
+    return pipeline, instance
+
+  def _send_config_to_node(self, job_id):
+    job = self._jobs[job_id]
+
+    job.pipeline, job.instance = self.__deploy_job_pipeline(
+      job_id=job_id,
+      node=job.node,
+      pipeline_name=job.job_name,
       on_data=partial(self._job_on_data_callback, job_id),
       on_notification=partial(self._job_on_notification_callback, job_id),
     )
-
-    job.pipeline.deploy(wait_confirmation=False)
+    job.start_time = self.time()
 
     self.on_node_start(job_id, {k: v for k, v in job.items() if not isinstance(v, dict)})
     self.P(f"DEBUG: starting job {job.job_name} on {job.node}..", color='y')
@@ -344,9 +461,13 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
 
   def _job_on_data_callback(self, job_id, pipeline, payload):
     job = self._jobs[job_id]
+    if job.get('speculation_result') == 'COPY_WON':
+      # late payloads of a job stopped in favor of its speculative copy
+      return
     job.last_payload_time = self.time()
     
     job.progress = payload.get('PROGRESS', 0)
+    self._update_job_throughput(job_id, job.progress)
     data = payload.get('DATA', None) or payload.get('RESOURCE', None)
     
     # if no useful payload, return
@@ -464,11 +585,248 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     # because if we restart the master, the job will be restarted as well
     self._maybe_save_job_results(job_id)
 
+    self.__record_node_throughput(job.get('node'), job.get('throughput'))
+
     self.on_node_stop(job_id, {k: v for k, v in job.items() if not isinstance(v, dict)})
 
     job.pipeline.close(wait_confirmation=False)
     return
 
+  # Node throughput
+  def __get_node_throughput(self):
+    # persisted with the plugin state, so the measurements survive between iterations and restarts
+    if 'node_throughput' not in self.dct_persistent_data:
+      self.dct_persistent_data['node_throughput'] = {}
+    return self.dct_persistent_data['node_throughput']
+
+  def __get_shard_weight(self, job_id):
+    if len(self._shard_weights) == self._no_inputs:
+      return self._shard_weights[job_id]
+    return 1 / max(self._no_inputs, 1)
+
+  def _update_job_throughput(self, job_id, progress):
+    """
+    Update the throughput of a job from its progress. The work is measured in even shards,
+    so the throughputs measured in jobs with different shard sizes are comparable.
+    """
+    job = self._jobs[job_id]
+    start_time = job.get('start_time')
+    if start_time is None or not progress:
+      return
+    elapsed = self.time() - start_time
+    if elapsed <= 0:
+      return
+    shard_work = self.__get_shard_weight(job_id) * self._no_inputs
+    job.throughput = shard_work * min(progress, 100) / 100 / elapsed
+    return
+
+  def __record_node_throughput(self, node, throughput):
+    if throughput is None or node is None:
+      return
+    dct_node_throughput = self.__get_node_throughput()
+    previous = dct_node_throughput.get(node)
+    if previous is None:
+      dct_node_throughput[node] = throughput
+    else:
+      alpha = self.cfg_throughput_ema_alpha
+      dct_node_throughput[node] = alpha * throughput + (1 - alpha) * previous
+    return
+
+  def __plan_shard_nodes(self):
+    """
+    Choose the nodes for the shards before splitting the input, and the weights of their shards.
+    With the 'EVEN' strategy the nodes are chosen when the jobs are assigned, as before.
+    """
+    nr_shards = max(self._nr_remote_nodes or 0, 0)
+    if nr_shards == 0:
+      # nothing to plan without remote nodes
+      self._planned_nodes = []
+      self._shard_weights = []
+      return
+    if self.cfg_split_strategy != 'WEIGHTED':
+      self._planned_nodes = [None] * nr_shards
+      self._shard_weights = [1 / nr_shards] * nr_shards
+      return
+
+    dct_node_throughput = self.__get_node_throughput()
+    planned_nodes = list(self._unused_configured_nodes[:nr_shards])
+    if len(planned_nodes) < nr_shards:
+      candidates = self.netmon.network_top_n_avail_nodes(2 * nr_shards, min_gpu_capability=0, verbose=0, permit_less=True)
+      # the fastest known nodes first, then the unknown ones in their availability order
+      candidates = sorted(
+        [node for node in candidates if node not in planned_nodes],
+        key=lambda node: -dct_node_throughput.get(node, 0)
+      )
+      planned_nodes += candidates[:nr_shards - len(planned_nodes)]
+    # endif not enough configured nodes
+    planned_nodes += [None] * (nr_shards - len(planned_nodes))
+
+    self._planned_nodes = planned_nodes
+    self._shard_weights = self._compute_shard_weights(
+      planned_nodes, dct_node_throughput, min_weight_ratio=self.cfg_min_shard_weight_ratio
+    )
+    self.P("Planned shards: {}".format(', '.join(
+      f"{node}:{weight:.02f}" for node, weight in zip(self._planned_nodes, self._shard_weights)
+    )))
+    return
+
+  # Speculative execution
+  def _speculation_enabled(self):
+    return self.cfg_speculative_execution
+
+  def __get_busy_nodes(self):
+    busy_nodes = [job.node for job in self._jobs.values() if job.get('node') is not None]
+    busy_nodes += [copy.node for copy in self._speculative_jobs.values()]
+    return busy_nodes
+
+  def __get_idle_node(self):
+    busy_nodes = self.__get_busy_nodes()
+    configured_nodes = [node for node in self._unused_configured_nodes if node not in busy_nodes]
+    if len(configured_nodes) > 0:
+      node = configured_nodes[0]
+      self._unused_configured_nodes.remove(node)
+      return node
+
+    possible_nodes = self.netmon.network_top_n_avail_nodes(2 * self._nr_remote_nodes, min_gpu_capability=0, verbose=0, permit_less=True)
+    possible_nodes = [node for node in possible_nodes if node not in busy_nodes]
+    if len(possible_nodes) == 0:
+      return None
+    # the fastest known node has the best chance to overtake the straggler
+    dct_node_throughput = self.__get_node_throughput()
+    return max(possible_nodes, key=lambda node: dct_node_throughput.get(node, 0))
+
+  def _speculative_job_on_data_callback(self, job_id, copy_name, pipeline, payload):
+    copy = self._speculative_jobs.get(job_id)
+    if copy is None or copy.job_name != copy_name:
+      # late payloads of a stopped copy
+      return
+    copy.last_payload_time = self.time()
+    copy.progress = payload.get('PROGRESS', 0)
+    data = payload.get('DATA', None) or payload.get('RESOURCE', None)
+    if data is None:
+      return
+    copy.data.append(data)
+    return
+
+  def _speculative_job_on_notification_callback(self, job_id, copy_name, pipeline, notification):
+    copy = self._speculative_jobs.get(job_id)
+    if copy is None or copy.job_name != copy_name:
+      return
+    copy.last_payload_time = self.time()
+    if notification['NOTIFICATION_TYPE'] == self.const.NOTIFICATION_TYPE.STATUS_EXCEPTION:
+      copy.failed = True
+    return
+
+  def __start_speculative_job(self, job_id, node):
+    job = self._jobs[job_id]
+    self._nr_speculative_jobs_started += 1
+
+    copy = self.NestedDotDict()
+    copy.node = node
+    copy.job_name = job.job_name + f"_s{self._nr_speculative_jobs_started}"
+    copy.progress = 0
+    copy.data = []
+    copy.failed = False
+    copy.start_time = self.time()
+    copy.last_payload_time = self.time()
+    copy.pipeline, copy.instance = self.__deploy_job_pipeline(
+      job_id=job_id,
+      node=node,
+      pipeline_name=copy.job_name,
+      on_data=partial(self._speculative_job_on_data_callback, job_id, copy.job_name),
+      on_notification=partial(self._speculative_job_on_notification_callback, job_id, copy.job_name),
+    )
+    self._speculative_jobs[job_id] = copy
+    # at most one copy for each job
+    job.speculated = True
+    self.P(f"Job {job.job_name} on {job.node} lags at {job.get('progress', 0):.02f}%, starting a speculative copy on {node}", color='y')
+    return
+
+  def __stop_speculative_job(self, job_id):
+    copy = self._speculative_jobs.pop(job_id)
+    copy.pipeline.close(wait_confirmation=False)
+    return
+
+  def __stop_all_speculative_jobs(self):
+    for job_id in list(self._speculative_jobs):
+      self.__stop_speculative_job(job_id)
+    return
+
+  def __accept_speculative_job(self, job_id):
+    job = self._jobs[job_id]
+    copy = self._speculative_jobs[job_id]
+    self.P(f"Speculative copy of {job.job_name} on {copy.node} closed first, stopping the job on {job.get('node')}", color='g')
+
+    if self._get_job_state_machine_state(job_id) == self.SUB_STATE.JOB_PROGRESS:
+      # the straggler is the loser, its throughput is still recorded
+      self._send_close_job_command(job_id)
+    job.speculation_result = 'COPY_WON'
+    job.node = copy.node
+    job.data = copy.data
+    job.progress = 100
+    self._maybe_save_job_results(job_id)
+
+    shard_work = self.__get_shard_weight(job_id) * self._no_inputs
+    elapsed = self.time() - copy.start_time
+    if elapsed > 0:
+      self.__record_node_throughput(copy.node, shard_work / elapsed)
+    self.__stop_speculative_job(job_id)
+    return
+
+  def __check_speculative_jobs(self):
+    for job_id in list(self._speculative_jobs):
+      job = self._jobs[job_id]
+      copy = self._speculative_jobs[job_id]
+      if self._dct_finished_jobs.get(job_id, False):
+        self.P(f"Job {job.job_name} on {job.node} closed first, stopping its speculative copy on {copy.node}")
+        self.__stop_speculative_job(job_id)
+      elif copy.progress >= 100:
+        self.__accept_speculative_job(job_id)
+      elif copy.failed or self.time() - copy.last_payload_time > self.cfg_node_timeout:
+        self.P(f"Speculative copy of {job.job_name} on {copy.node} failed", color='r')
+        self.__stop_speculative_job(job_id)
+      # endif
+    # endfor speculative jobs
+    return
+
+  def __maybe_start_speculative_jobs(self):
+    nr_free_copies = self.cfg_speculation_max_copies - len(self._speculative_jobs)
+    if nr_free_copies <= 0:
+      return
+
+    now = self.time()
+    dct_job_progress = {
+      job_id: 100 if self._dct_finished_jobs.get(job_id, False) else job.get('progress', 0)
+      for job_id, job in self._jobs.items()
+    }
+    dct_job_elapsed = {
+      job_id: now - job.start_time
+      for job_id, job in self._jobs.items()
+      if not self._dct_finished_jobs.get(job_id, False)
+      and not job.get('speculated', False)
+      and job.get('start_time') is not None
+      and self._get_job_state_machine_state(job_id) == self.SUB_STATE.JOB_PROGRESS
+    }
+    stragglers = self._find_straggler_jobs(
+      dct_job_progress, dct_job_elapsed,
+      min_elapsed=self.cfg_speculation_min_elapsed,
+      progress_lag=self.cfg_speculation_progress_lag,
+    )
+    for job_id in stragglers[:nr_free_copies]:
+      node = self.__get_idle_node()
+      if node is None:
+        break
+      self.__start_speculative_job(job_id, node)
+    # endfor stragglers
+    return
+
+  def __step_speculative_jobs(self):
+    if not self._speculation_enabled():
+      return
+    self.__check_speculative_jobs()
+    self.__maybe_start_speculative_jobs()
+    return
+
   def _get_job_state_machine_state(self, job_id):
     return self.state_machine_api_get_current_state(name=self._jobs[job_id].job_name)
 
@@ -491,7 +849,7 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     self._jobs[job_id].job_name = self._stream_id + f"_w_{job_id}"
     self._jobs[job_id].data = []
     self._jobs[job_id].failed = False
-    self._jobs[job_id].unprocessed_data = []
+    self._jobs[job_id].unprocessed_data = deque()
 
     self._dct_finished_jobs[job_id] = False
     self._collected_data[job_id] = []
@@ -504,6 +862,13 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
       initial_state=self.SUB_STATE.CHOOSE_NODE,
       on_successful_step_callback=self.__save_state
     )
+    self._on_job_reset(job_id)
+    return
+
+  def _on_job_reset(self, job_id):
+    """
+    Called after a job is (re)initialized, with empty data and collected data.
+    """
     return
 
   def __assign_jobs(self):
@@ -530,6 +895,9 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
   def __reset_state_failed_jobs(self):
     failed_jobs = self.__get_failed_jobs()
     for job_id in failed_jobs:
+      if job_id in self._speculative_jobs:
+        # the speculative copy of the job is still running and takes over
+        continue
       job_name = self._jobs[job_id].job_name
       job_node = self._jobs[job_id].node
       self.P(f"Job {job_name} on {job_node} failed. Starting again", color='r')
@@ -540,6 +908,8 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     self.__assign_jobs()
 
     self.__step_state_assigned_jobs()
+
+    self.__step_speculative_jobs()
   
     self.__reset_state_failed_jobs()
     return
@@ -644,6 +1014,7 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
   # how do we handle when a good node fails?
   def _split_input(self):
     if self.__split_input_thread is None:
+      self.__plan_shard_nodes()
       self.__split_input_thread = threading.Thread(target=self._split_input_in_thread)
       self.__split_input_thread.start()
 
@@ -656,6 +1027,8 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
 
       for i in range(self._no_inputs):
         self.__reset_job(i)
+        if i < len(self._planned_nodes):
+          self._jobs[i].planned_node = self._planned_nodes[i]
       # prepare the jobs for the new input shards
 
     else:
@@ -687,6 +1060,7 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     return self.start_another_iteration()
 
   def _reset_to_initial_state(self):
+    self.__stop_all_speculative_jobs()
     self._dct_finished_jobs = {}
     self._jobs = self.NestedDotDict()
     self._collected_data = {}
@@ -694,6 +1068,8 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
       self._unused_configured_nodes = [node for node in self.cfg_nodes]
 
     self.input_shards = []
+    self._planned_nodes = []
+    self._shard_weights = []
     self.dct_state_timestamps = {}
     return
 
@@ -857,6 +1233,19 @@ class BaseChainDistPlugin(BaseClass, _ChainDistSplitMixin, _ChainDistMergeMixin)
     """
     return self._nr_remote_nodes
 
+  def get_shard_weights(self):
+    """
+    The share of the work planned for each shard, one per remote node. With the 'WEIGHTED'
+    split strategy the faster nodes get larger shares. `split_input` implementations can use
+    them with `_split_sizes_by_weights` or `_split_list_by_weights` to produce uneven shards.
+
+    Returns
+    -------
+    list
+        The weights of the shards, summing up to 1.
+    """
+    return list(self._shard_weights)
+
   def create_golden_payload(self, **kwargs):
     """
     Create the golden payload. This method must be called in the `self.aggregate_collected_data` method.
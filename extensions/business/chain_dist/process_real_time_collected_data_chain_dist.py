@@ -1,4 +1,5 @@
 from abc import abstractclassmethod
+from collections import deque
 
 from extensions.business.chain_dist.base_chain_dist import BaseChainDistPlugin as BaseClass
 
@@ -42,6 +43,17 @@ _CONFIG = {
 class ProcessRealTimeCollectedDataChainDistPlugin(BaseClass):
   CONFIG = _CONFIG
 
+  def startup(self):
+    # running count of the collected data of each job, rebuilt when None
+    self.__collected_counts = None
+    self.__collected_total = 0
+    super(ProcessRealTimeCollectedDataChainDistPlugin, self).startup()
+    return
+
+  def _speculation_enabled(self):
+    # the real time data of both copies of a shard would be processed
+    return False
+
   # Job lifecycle callbacks
   def _job_on_data_callback(self, job_id, pipeline, payload):
     payload = dict(payload)
@@ -49,6 +61,7 @@ class ProcessRealTimeCollectedDataChainDistPlugin(BaseClass):
     job.last_payload_time = self.time()
     
     job.progress = payload.get('PROGRESS', 0)
+    self._update_job_throughput(job_id, job.progress)
     data = payload.get('DATA', None) or payload.get('RESOURCE', None)
     
     # if no useful payload, return
@@ -87,24 +100,51 @@ class ProcessRealTimeCollectedDataChainDistPlugin(BaseClass):
       self.state_machine_api_step(name=job.job_name)
     return
 
+  def _on_job_reset(self, job_id):
+    self.__collected_counts = None
+    return
+
+  def _reset_to_initial_state(self):
+    super(ProcessRealTimeCollectedDataChainDistPlugin, self)._reset_to_initial_state()
+    self.__collected_counts = None
+    return
+
+  def __get_collected_counts(self):
+    if self.__collected_counts is None:
+      self.__collected_counts = {job_id: len(self._collected_data.get(job_id, [])) for job_id in self._jobs}
+      self.__collected_total = sum(self.__collected_counts.values())
+    return self.__collected_counts
+
   def _handle_unprocessed_data(self):
+    collected_counts = self.__get_collected_counts()
     for job_id in self._jobs:
       job = self._jobs[job_id]
       if job.get('failed', False) is False:
-        no_unprocessed_data = len(job.unprocessed_data)
-        for _ in range(no_unprocessed_data):
-          data = job.unprocessed_data.pop(0)
+        if not isinstance(job.unprocessed_data, deque):
+          # restored from the state saved by a previous version
+          job.unprocessed_data = deque(job.unprocessed_data)
+        queue = job.unprocessed_data
+        # only the data received until now, the callbacks keep appending meanwhile
+        batch = [queue.popleft() for _ in range(len(queue))]
+        collected_data = self._collected_data[job_id]
+        nr_collected = len(collected_data)
+        for data in batch:
           processed_data = self.process_real_time_collected_data(job_id, self._collected_data, data)
 
-          # if the data is not useful, return
+          # if the data is not useful, skip it
           if processed_data is None:
             continue
 
           if isinstance(processed_data, list):
-            for pd in processed_data:
-              self._collected_data[job_id].append(pd)
+            collected_data.extend(processed_data)
           else:
-            self._collected_data[job_id].append(processed_data)
+            collected_data.append(processed_data)
+        # endfor batch
+        nr_added = len(collected_data) - nr_collected
+        collected_counts[job_id] = collected_counts.get(job_id, 0) + nr_added
+        self.__collected_total += nr_added
+      # endif job not failed
+    # endfor jobs
     return
 
   def _distribute_jobs(self):
@@ -120,13 +160,15 @@ class ProcessRealTimeCollectedDataChainDistPlugin(BaseClass):
   # Master state machine
   @property
   def _progress_by_node(self):
-    nodes = [v.get('node') for v in self._jobs.values()]
-    count_collected_data_per_node = [len(self._collected_data[job_id]) for job_id in self._jobs]
-    if sum(count_collected_data_per_node) == 0:
+    collected_counts = self.__get_collected_counts()
+    total = self.__collected_total
+    if total == 0:
       return {}
-    prc_collected_data_per_node = [cnt / sum(count_collected_data_per_node) for cnt in count_collected_data_per_node]
 
-    progress_by_node = {k: {'NODE': node, 'PROGRESS': prc} for k, node, prc in zip(self._jobs.keys(), nodes, prc_collected_data_per_node)}
+    progress_by_node = {
+      job_id: {'NODE': job.get('node'), 'PROGRESS': collected_counts.get(job_id, 0) / total}
+      for job_id, job in self._jobs.items()
+    }
     return progress_by_node
 
   def _finish_condition(self):
@@ -45,7 +45,9 @@ _CONFIG = {
 
 class ProcessRealTimeCollectedDataCustomExecChainDistPlugin(ProcessRealTimeCollectedDataChainDistPlugin):
   def on_init(self):
-    pass
+    # (code, arguments) -> compiled method, so the code is not compiled again for each data item
+    self.__custom_code_methods = {}
+    return
 
   def __handle_errors_and_warnings(self, errors, warnings):
     if errors is not None:
@@ -55,6 +57,19 @@ class ProcessRealTimeCollectedDataCustomExecChainDistPlugin(ProcessRealTimeColle
       self.P("The custom code generated the following warnings: {}".format("\n".join(warnings)))
     return
 
+  def __get_custom_code_method(self, str_b64code, method_arguments):
+    key = (str_b64code, tuple(method_arguments))
+    custom_code_method = self.__custom_code_methods.get(key)
+    if custom_code_method is None:
+      custom_code_method, errors, warnings = self._get_method_from_custom_code(
+        str_b64code=str_b64code,
+        self_var='plugin',
+        method_arguments=method_arguments
+      )
+      self.__handle_errors_and_warnings(errors, warnings)
+      self.__custom_code_methods[key] = custom_code_method
+    return custom_code_method
+
   # Distribution Logic
   def split_input(self):
     """
@@ -66,12 +81,10 @@ class ProcessRealTimeCollectedDataCustomExecChainDistPlugin(ProcessRealTimeColle
     return [None] * self.nr_remote_nodes
 
   def __custom_code_aggregate_collected_data(self, collected_data):
-    custom_code_method, errors, warnings = self._get_method_from_custom_code(
+    custom_code_method = self.__get_custom_code_method(
       str_b64code=self.cfg_custom_code_aggregate_collected_data,
-      self_var='plugin',
       method_arguments=['plugin', 'collected_data']
     )
-    self.__handle_errors_and_warnings(errors, warnings)
 
     return custom_code_method(self, collected_data)
 
@@ -105,12 +118,10 @@ class ProcessRealTimeCollectedDataCustomExecChainDistPlugin(ProcessRealTimeColle
     return config_plugin
 
   def __custom_code_process_real_time_collected_data(self, job_id, collected_data, data):
-    custom_code_method, errors, warnings = self._get_method_from_custom_code(
+    custom_code_method = self.__get_custom_code_method(
       str_b64code=self.cfg_custom_code_process_real_time_collected_data,
-      self_var='plugin',
       method_arguments=['plugin', 'job_id', 'collected_data', 'data']
     )
-    self.__handle_errors_and_warnings(errors, warnings)
 
     return custom_code_method(self, job_id, collected_data, data)
 
@@ -136,12 +147,10 @@ class ProcessRealTimeCollectedDataCustomExecChainDistPlugin(ProcessRealTimeColle
     return self.__custom_code_process_real_time_collected_data(job_id, collected_data, data)
 
   def __custom_code_finish_condition(self, collected_data):
-    custom_code_method, errors, warnings = self._get_method_from_custom_code(
+    custom_code_method = self.__get_custom_code_method(
       str_b64code=self.cfg_custom_code_finish_condition,
-      self_var='plugin',
       method_arguments=['plugin', 'collected_data']
     )
-    self.__handle_errors_and_warnings(errors, warnings)
 
     return custom_code_method(self, collected_data)
 
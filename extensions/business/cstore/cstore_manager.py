@@ -1,7 +1,13 @@
+import bisect
+import threading
+
 from naeural_core.business.default.web_app.supervisor_fast_api_web_app import SupervisorFastApiWebApp as BasePlugin
 
 __VER__ = '0.2.2'
 
+# above this number of changed keys the index is rebuilt instead of updated key by key
+CSTORE_INDEX_MAX_INCREMENTAL_CHANGES = 1000
+
 _CONFIG = {
   **BasePlugin.CONFIG,
 
@@ -11,6 +17,17 @@ _CONFIG = {
   
   'CSTORE_VERBOSE' : True,
   
+  # maximum number of keys read or written by a single batch request
+  'CSTORE_MAX_BATCH_SIZE' : 1000,
+  
+  # default and maximum number of keys listed in a `get_status` page
+  'CSTORE_STATUS_PAGE_SIZE' : 100,
+  'CSTORE_STATUS_MAX_PAGE_SIZE' : 1000,
+  
+  # seconds between the full resyncs of the key index with the store, which catch the keys
+  # replaced by other nodes; a change of the number of keys triggers a resync right away
+  'CSTORE_INDEX_RESYNC_INTERVAL' : 30,
+  
   
   'VALIDATION_RULES': {
     **BasePlugin.CONFIG['VALIDATION_RULES'],
@@ -32,6 +49,13 @@ class CstoreManagerPlugin(BasePlugin):
     super(CstoreManagerPlugin, self).on_init()
     my_address = self.bc.address
     my_eth_address = self.bc.eth_address
+    # serializes the batch reads and writes so that each batch sees a consistent store
+    self.__cstore_lock = threading.Lock()
+    # sorted index of the store keys, maintained on the local writes and resynced when
+    # the store was changed by other nodes
+    self.__sorted_keys = []
+    self.__keys_set = set()
+    self.__index_last_sync = 0
     self.P("Started {} plugin on {} / {}".format(
       self.__class__.__name__, my_address, my_eth_address,
     ))
@@ -95,22 +119,175 @@ class CstoreManagerPlugin(BasePlugin):
     return dct_data
   
   
-  def __get_keys(self):
-    result = []
+  def __get_store(self):
     _data = self.plugins_shmem.get('__chain_storage', {})
-    if isinstance(_data, dict):
-      result = list(_data.keys())
-    return result
+    return _data if isinstance(_data, dict) else {}
+
+
+  def __index_add_key(self, key : str):
+    if key not in self.__keys_set:
+      self.__keys_set.add(key)
+      bisect.insort(self.__sorted_keys, key)
+    return
+
+
+  def __snapshot_store_keys(self):
+    # the store is shared with the sync from the other nodes, so retry if it changes while copied
+    for _ in range(3):
+      try:
+        return list(self.__get_store())
+      except RuntimeError:
+        continue
+    # endfor attempts
+    return None
+
+
+  def __index_sync(self):
+    """
+    Resync the sorted key index with the store, for the keys changed by other nodes. The local
+    writes update the index directly, so the store is only scanned when its number of keys
+    differs from the index or every `CSTORE_INDEX_RESYNC_INTERVAL` seconds.
+    Must be called without holding the store lock.
+    """
+    nr_store_keys = len(self.__get_store())
+    resync_due = self.time() - self.__index_last_sync >= self.cfg_cstore_index_resync_interval
+    if nr_store_keys == len(self.__keys_set) and not resync_due:
+      return
+    store_keys = self.__snapshot_store_keys()
+    if store_keys is None:
+      return
+    self.__index_last_sync = self.time()
+    store_keys_set = set(store_keys)
+    with self.__cstore_lock:
+      removed_keys = self.__keys_set - store_keys_set
+      added_keys = store_keys_set - self.__keys_set
+      if len(removed_keys) + len(added_keys) > CSTORE_INDEX_MAX_INCREMENTAL_CHANGES:
+        self.__sorted_keys = sorted(store_keys_set)
+        self.__keys_set = store_keys_set
+        return
+      for key in removed_keys:
+        del self.__sorted_keys[bisect.bisect_left(self.__sorted_keys, key)]
+        self.__keys_set.discard(key)
+      for key in added_keys:
+        self.__index_add_key(key)
+    # endwith lock
+    return
+
+
+  def __get_prefix_range(self, prefix : str):
+    """
+    Get the [start, end) positions of the keys starting with `prefix` in the sorted index.
+    """
+    keys = self.__sorted_keys
+    start = bisect.bisect_left(keys, prefix)
+    end = len(keys)
+    # the smallest string greater than all the strings starting with prefix
+    stripped = prefix.rstrip(chr(0x10FFFF))
+    if len(stripped) > 0:
+      upper = stripped[:-1] + chr(ord(stripped[-1]) + 1)
+      end = bisect.bisect_left(keys, upper, lo=start)
+    return start, end
+
+
+  def __check_batch(self, items, expected_type, name):
+    """
+    Validate a batch request argument. Returns an error message or None if valid.
+    """
+    if not isinstance(items, expected_type):
+      return f"`{name}` must be a {expected_type.__name__}"
+    if len(items) > self.cfg_cstore_max_batch_size:
+      return f"Too many keys in `{name}`: {len(items)} > {self.cfg_cstore_max_batch_size}"
+    if not all(isinstance(k, str) for k in items):
+      return f"All the keys in `{name}` must be strings"
+    return None
+
+
+  def __get_values(self, keys : list):
+    """
+    Read a batch of keys in a single pass, under the store lock.
+    """
+    with self.__cstore_lock:
+      values = {
+        key : self.chainstore_get(key=key, debug=False)
+        for key in keys
+      }
+    if self.cfg_cstore_verbose:
+      self.P(f"CSTORE batch get of {len(keys)} keys")
+    return values
+
+
+  def __set_values(self, items : dict):
+    """
+    Write a batch of keys in a single pass, under the store lock.
+    """
+    with self.__cstore_lock:
+      results = {
+        key : self.chainstore_set(key=key, value=value, debug=False)
+        for key, value in items.items()
+      }
+      for key in items:
+        self.__index_add_key(key)
+    if self.cfg_cstore_verbose:
+      self.P(f"CSTORE batch set of {len(items)} keys")
+    return results
 
 
   @BasePlugin.endpoint(method="get", require_token=False) 
-  def get_status(self):   # /get_status
+  def get_status(
+    self, 
+    prefix : str = "", 
+    cursor : str = None, 
+    page_size : int = None, 
+    count_only : bool = False
+  ):   # /get_status
     """
+    List the store keys in sorted order, one page at a time.
+
+    Parameters
+    ----------
+    prefix : str
+        Only the keys starting with this prefix are listed.
+
+    cursor : str
+        The `next_cursor` of the previous page. The listing continues after this key.
+
+    page_size : int
+        The number of keys per page, at most `CSTORE_STATUS_MAX_PAGE_SIZE`.
+
+    count_only : bool
+        If True, only the number of matching keys is returned.
+
+    Returns
+    -------
+    dict
+        - keys: list
+            The keys of the page (missing if `count_only`).
+
+        - next_cursor: str
+            The cursor of the next page, or None if this is the last page.
+
+        - total: int
+            The number of keys matching the prefix.
     """
-    
-    data = {
-      'keys' : self.__get_keys()
-    }
+    prefix = prefix or ""
+    if page_size is None:
+      page_size = self.cfg_cstore_status_page_size
+    page_size = min(max(int(page_size), 1), self.cfg_cstore_status_max_page_size)
+
+    self.__index_sync()
+    with self.__cstore_lock:
+      start, end = self.__get_prefix_range(prefix)
+      data = {
+        'total' : end - start,
+      }
+      if not count_only:
+        if cursor is not None:
+          start = max(start, bisect.bisect_right(self.__sorted_keys, cursor, lo=start, hi=end))
+        keys = self.__sorted_keys[start:min(start + page_size, end)]
+        data['keys'] = keys
+        data['next_cursor'] = keys[-1] if start + page_size < end else None
+      # endif count_only
+    # endwith lock
     
     response = self.__get_response({
       **data
@@ -145,11 +322,13 @@ class CstoreManagerPlugin(BasePlugin):
     if token not in ['admin']:
       return "Unauthorized token"
     
-    value = self.chainstore_set(
-      key=cstore_key, 
-      value=cstore_value,
-      debug=True
-    )
+    with self.__cstore_lock:
+      value = self.chainstore_set(
+        key=cstore_key, 
+        value=cstore_value,
+        debug=True
+      )
+      self.__index_add_key(cstore_key)
     
     data = {
       cstore_key : value
@@ -159,3 +338,41 @@ class CstoreManagerPlugin(BasePlugin):
       **data
     })
     return response
+
+
+  @BasePlugin.endpoint(method="post", require_token=True) 
+  def get_values(self, token, keys : list):   # first parameter must be named token
+    """
+    Read a batch of keys and return them in a single signed response.
+    """
+    
+    if token not in ['admin']:
+      return "Unauthorized token"
+    
+    error = self.__check_batch(keys, list, 'keys')
+    if error is not None:
+      return self.__get_response({'error' : error})
+    
+    response = self.__get_response({
+      'values' : self.__get_values(keys)
+    })
+    return response
+
+
+  @BasePlugin.endpoint(method="post", require_token=True) 
+  def set_values(self, token, items : dict):   # first parameter must be named token
+    """
+    Write a batch of {key: value} items and return the results in a single signed response.
+    """
+    
+    if token not in ['admin']:
+      return "Unauthorized token"
+    
+    error = self.__check_batch(items, dict, 'items')
+    if error is not None:
+      return self.__get_response({'error' : error})
+    
+    response = self.__get_response({
+      'values' : self.__set_values(items)
+    })
+    return response
@@ -0,0 +1,162 @@
+import threading
+
+
+class _DauthCacheMixin(object):
+  """
+  Caching of the blockchain lookups done while serving dAuth requests.
+
+  - the license status of each address is cached with a TTL (a shorter one for the negative
+    results), and concurrent misses for the same address share a single lookup
+  - the oracle list and the dAuth env template are refreshed by a background thread, so the
+    requests never wait for them after the first refresh
+
+  The host class must provide `bc`, `time`, `P`, the `cfg_dauth_*` cache settings and
+  `build_dauth_env_template`.
+  """
+  def __init__(self):
+    super(_DauthCacheMixin, self).__init__()
+    return
+
+  def _dauth_cache_init(self):
+    # eth address -> (is licensed, expiry time), oldest first
+    self.__license_cache = {}
+    # eth address -> in-flight lookup shared by the concurrent requests for the same address
+    self.__license_inflight = {}
+    self.__license_lock = threading.Lock()
+    self.__oracles = None
+    self.__env_template = None
+    self.__refresh_lock = threading.Lock()
+    self.__refresh_stop = threading.Event()
+    self.__refresh_thread = None
+    self.__dauth_cache_stats = {
+      'license_hits': 0,
+      'license_misses': 0,
+      'license_coalesced': 0,
+      'refreshes': 0,
+      'refresh_errors': 0,
+    }
+    return
+
+  def _dauth_cache_start_refresh(self):
+    """
+    Refresh the oracle list and the env template now and start the background refresh thread.
+    """
+    self._dauth_cache_refresh()
+    self.__refresh_thread = threading.Thread(
+      target=self.__refresh_loop, name='dauth_cache_refresh', daemon=True,
+    )
+    self.__refresh_thread.start()
+    return
+
+  def _dauth_cache_stop_refresh(self):
+    self.__refresh_stop.set()
+    if self.__refresh_thread is not None:
+      self.__refresh_thread.join(timeout=5)
+      self.__refresh_thread = None
+    return
+
+  def __refresh_loop(self):
+    while not self.__refresh_stop.wait(self.cfg_dauth_refresh_interval):
+      self._dauth_cache_refresh()
+    return
+
+  def _dauth_cache_refresh(self):
+    """
+    Fetch the oracle list and rebuild the env template. On failure the previous values are kept.
+    """
+    with self.__refresh_lock:
+      try:
+        oracles = self.bc.get_oracles(include_eth_addrs=True)
+        env_template = self.build_dauth_env_template()
+        # plain reference assignments, so the request handlers see either the old or the new values
+        self.__oracles = oracles
+        self.__env_template = env_template
+        self.__dauth_cache_stats['refreshes'] += 1
+      except Exception as e:
+        self.__dauth_cache_stats['refresh_errors'] += 1
+        self.P(f"Error refreshing the dAuth oracles and env template: {e}", color='r')
+    return
+
+  def dauth_get_oracles(self):
+    """
+    Get the cached oracle list, fetching it if it was never refreshed.
+
+    Returns
+    -------
+    tuple
+        (oracles, oracles_names, oracles_eth) as returned by `bc.get_oracles`.
+    """
+    if self.__oracles is None:
+      self.__oracles = self.bc.get_oracles(include_eth_addrs=True)
+    return self.__oracles
+
+  def dauth_get_env_template(self):
+    """
+    Get the cached dAuth env template, building it if it was never refreshed.
+    """
+    if self.__env_template is None:
+      self.__env_template = self.build_dauth_env_template()
+    return self.__env_template
+
+  def dauth_is_node_licensed(self, node_address_eth: str):
+    """
+    Check if a node is licensed, using the cached result if it did not expire.
+    Positive results are kept for `DAUTH_LICENSE_CACHE_TTL` seconds and negative ones for
+    `DAUTH_LICENSE_NEGATIVE_TTL` seconds. A lookup error is not cached and is raised to all the
+    requests waiting for that lookup.
+
+    Parameters
+    ----------
+    node_address_eth : str
+        The EVM address of the node.
+
+    Returns
+    -------
+    bool
+        True if the node is licensed.
+    """
+    with self.__license_lock:
+      cached = self.__license_cache.get(node_address_eth)
+      if cached is not None and cached[1] > self.time():
+        self.__dauth_cache_stats['license_hits'] += 1
+        return cached[0]
+      lookup = self.__license_inflight.get(node_address_eth)
+      is_owner = lookup is None
+      if is_owner:
+        lookup = {'done': threading.Event(), 'result': None, 'error': None}
+        self.__license_inflight[node_address_eth] = lookup
+        self.__dauth_cache_stats['license_misses'] += 1
+      else:
+        self.__dauth_cache_stats['license_coalesced'] += 1
+    # endwith lock
+
+    if not is_owner:
+      lookup['done'].wait()
+      if lookup['error'] is not None:
+        raise lookup['error']
+      return lookup['result']
+    # endif waiting for another lookup
+
+    try:
+      result = self.bc.is_node_licensed(node_address_eth=node_address_eth)
+      lookup['result'] = result
+      ttl = self.cfg_dauth_license_cache_ttl if result else self.cfg_dauth_license_negative_ttl
+      with self.__license_lock:
+        # re-inserted at the end, so the oldest entries are evicted first
+        self.__license_cache.pop(node_address_eth, None)
+        self.__license_cache[node_address_eth] = (result, self.time() + ttl)
+        while len(self.__license_cache) > self.cfg_dauth_license_cache_size:
+          self.__license_cache.pop(next(iter(self.__license_cache)))
+      # endwith lock
+    except Exception as e:
+      lookup['error'] = e
+      raise
+    finally:
+      with self.__license_lock:
+        self.__license_inflight.pop(node_address_eth, None)
+      lookup['done'].set()
+    # endtry
+    return result
+
+  def _dauth_cache_get_stats(self):
+    return dict(self.__dauth_cache_stats)
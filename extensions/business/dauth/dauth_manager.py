@@ -13,6 +13,8 @@ WHITELIST (oracles)
 from naeural_core.business.default.web_app.supervisor_fast_api_web_app import SupervisorFastApiWebApp as BasePlugin
 from ratio1.bc import DefaultBlockEngine
 from extensions.business.dauth.dauth_mixin import _DauthMixin
+from extensions.business.dauth.dauth_cache_mixin import _DauthCacheMixin
+from extensions.business.dauth.dauth_rate_limit_mixin import _DauthRateLimitMixin
 
 __VER__ = '0.2.2'
 
@@ -27,6 +29,24 @@ _CONFIG = {
   
   'SUPRESS_LOGS_AFTER_INTERVAL' : 300,
   
+  # seconds a license check result is cached - negative results are kept less
+  # so that newly licensed nodes are accepted soon
+  'DAUTH_LICENSE_CACHE_TTL' : 300,
+  'DAUTH_LICENSE_NEGATIVE_TTL' : 30,
+  'DAUTH_LICENSE_CACHE_SIZE' : 100_000,
+  
+  # seconds between the background refreshes of the oracle list and the env template
+  'DAUTH_REFRESH_INTERVAL' : 60,
+  
+  # per-address token bucket checked before the request signature verification
+  'DAUTH_RATE_LIMIT_BURST' : 5,
+  'DAUTH_RATE_LIMIT_PER_SEC' : 0.2,
+  'DAUTH_RATE_LIMIT_MAX_ADDRESSES' : 100_000,
+  
+  # seconds of the time window in which the retries of a requester get the same signed response
+  # (0 disables the response cache)
+  'DAUTH_RESPONSE_CACHE_WINDOW' : 10,
+  
   # required ENV keys are defined in plugin template and should be added here  
   "AUTH_ENV_KEYS" : [
   ],
@@ -58,6 +78,8 @@ _CONFIG = {
 class DauthManagerPlugin(
   BasePlugin,
   _DauthMixin,
+  _DauthCacheMixin,
+  _DauthRateLimitMixin,
   ):
   """
   This plugin is the dAuth FastAPI web app that provides an endpoints for decentralized authentication.
@@ -74,11 +96,20 @@ class DauthManagerPlugin(
     super(DauthManagerPlugin, self).on_init()
     my_address = self.bc.address
     my_eth_address = self.bc.eth_address
+    self._dauth_cache_init()
+    self._dauth_cache_start_refresh()
+    self._dauth_rate_limit_init()
     self.P("Started {} plugin on {} / {}\n - Auth keys: {}\n - Predefined keys: {}".format(
       self.__class__.__name__, my_address, my_eth_address,
       self.cfg_auth_env_keys, self.cfg_auth_predefined_keys)
     )        
     return
+
+
+  def on_close(self):
+    self._dauth_cache_stop_refresh()
+    super(DauthManagerPlugin, self).on_close()
+    return
     
   
   def __get_current_epoch(self):
@@ -164,15 +195,43 @@ class DauthManagerPlugin(
       }      
     }    
     """
+    dAuthConst = self.const.BASE_CT.dAuth
+    requester = body.get(self.const.BASE_CT.BCctbase.SENDER) if isinstance(body, dict) else None
+    now = self.time()
+    if not self._dauth_rate_limit_allow(requester, now):
+      self.Pd("dAuth request from <{}> rejected by the rate limiter".format(requester))
+      return self.__get_response({
+        dAuthConst.DAUTH_SUBKEY : {
+          'error' : 'Too many dAuth requests. Please retry later.',
+        },
+        'dauth_server_stats' : self._dauth_rate_limit_get_stats(),
+      })
+    # endif rate limited
+
+    cached_responses = []
+    def is_response_cached(requester):
+      response = self._dauth_response_cache_get(requester, now)
+      if response is not None:
+        cached_responses.append(response)
+      return response is not None
+
     try:
-      data = self.process_dauth_request(body)
+      data = self.process_dauth_request(body, is_response_cached=is_response_cached)
     except Exception as e:
       self.P("Error processing request: {}".format(e), color='r')
       data = {
         'error' : str(e)
       }
     
+    if len(cached_responses) > 0:
+      # already signed, served as is
+      return cached_responses[0]
+
     response = self.__get_response({
-      **data
+      **data,
+      'dauth_server_stats' : self._dauth_rate_limit_get_stats(),
     })
+    # only the successful responses are reused, the failed requests are processed again
+    if dAuthConst.DAUTH_WHITELIST in data.get(dAuthConst.DAUTH_SUBKEY, {}):
+      self._dauth_response_cache_set(requester, response, now)
     return response
@@ -118,7 +118,7 @@ class _DauthMixin(object):
     else:
       try:
         if version_check_data.requester_type != self.const.BASE_CT.dAuth.DAUTH_SENDER_TYPE_SDK:
-          result = self.bc.is_node_licensed(node_address_eth=node_address_eth)
+          result = self.dauth_is_node_licensed(node_address_eth=node_address_eth)
           str_allowed = "allowed" if result else "not allowed"
           msg = f"node {node_address_eth} {str_allowed} on {self.evm_network}"
       except Exception as e:
@@ -147,9 +147,18 @@ class _DauthMixin(object):
     return
   
   
-  def fill_dauth_data(self, dauth_data, requester_node_address, is_node=False):
+  def build_dauth_env_template(self):
     """
-    Fill the data with the authentication data.
+    Build the env values sent to the requesters. The configuration and the env do not
+    change between requests, so the template is built once and refreshed periodically.
+
+    Returns
+    -------
+    dict
+      - universal: the (node, sdk, core) keys and values
+      - node_only: the node-only keys and values
+      - predefined: the predefined keys and values, that overwrite the env ones
+      - supervisor: the keys and values sent only to the oracles
     """
     dAuthCt = self.const.BASE_CT.dAuth
     
@@ -172,11 +181,41 @@ class _DauthMixin(object):
     
     if dct_auth_predefined_keys is None:
       raise ValueError("No predefined keys defined (AUTH_PREDEFINED_KEYS==null). Please check the configuration")
+
+    # first set is the universal (node, sdk, core) keys
+    dct_universal = {
+      key: self.os_environ.get(key) for key in lst_auth_env_keys
+      if key.startswith(dAuthCt.DAUTH_ENV_KEYS_PREFIX) and key not in lst_auth_node_only_keys
+    }
+    # then the node-only keys
+    dct_node_only = {
+      key: self.os_environ.get(key) for key in lst_auth_node_only_keys
+      if key.startswith(dAuthCt.DAUTH_ENV_KEYS_PREFIX)
+    }
+    dct_supervisor = {
+      key: self.os_environ.get(key) for key in self.cfg_supervisor_keys
+      if isinstance(key, str) and len(key) > 0
+    }
+    return {
+      'universal': dct_universal,
+      'node_only': dct_node_only,
+      'predefined': dct_auth_predefined_keys,
+      'supervisor': dct_supervisor,
+    }
+
+
+  def fill_dauth_data(self, dauth_data, requester_node_address, is_node=False):
+    """
+    Fill the data with the authentication data.
+    """
+    dAuthCt = self.const.BASE_CT.dAuth
+    env_template = self.dauth_get_env_template()
     
     full_whitelist = []
+    oracles = []
     if is_node:
       ### get the mandatory oracles whitelist and populate answer  ###  
-      oracles, oracles_names, oracles_eth = self.bc.get_oracles(include_eth_addrs=True)   
+      oracles, oracles_names, oracles_eth = self.dauth_get_oracles()
       self.Pd(f"Oracles on {self.evm_network}: {oracles_eth}")
       full_whitelist = [
         a + (f"  {b}" if len(b) > 0 else "") 
@@ -187,29 +226,19 @@ class _DauthMixin(object):
     #####  finally prepare the env auth data #####
     
     # first set is the universal (node, sdk, core) keys
-    for key in lst_auth_env_keys:
-      if key.startswith(dAuthCt.DAUTH_ENV_KEYS_PREFIX) and key not in lst_auth_node_only_keys:
-        dauth_data[key] = self.os_environ.get(key)
+    dauth_data.update(env_template['universal'])
         
     if is_node:
       # then set the node-only keys
-      for key in lst_auth_node_only_keys:
-        if key.startswith(dAuthCt.DAUTH_ENV_KEYS_PREFIX):
-          dauth_data[key] = self.os_environ.get(key)
-      # end for
+      dauth_data.update(env_template['node_only'])
     
     # overwrite the predefined keys
-    for key in dct_auth_predefined_keys:
-      dauth_data[key] = dct_auth_predefined_keys[key]
+    dauth_data.update(env_template['predefined'])
     
     # set the supervisor flag if this is identified as an oracle
     if is_node and requester_node_address in oracles:
       dauth_data["EE_SUPERVISOR"] = True
-      for key in self.cfg_supervisor_keys:
-        if isinstance(key, str) and len(key) > 0:
-          dauth_data[key] = self.os_environ.get(key)
-        # end if
-      # end for
+      dauth_data.update(env_template['supervisor'])
     else:
       dauth_data["EE_SUPERVISOR"] = False
     # end set supervisor flag
@@ -244,9 +273,19 @@ class _DauthMixin(object):
   
   
   
-  def process_dauth_request(self, body):
+  def process_dauth_request(self, body, is_response_cached=None):
     """
     This is the main method that processes the request for authentication.
+
+    Parameters
+    ----------
+    body : dict
+        The signed dAuth request.
+
+    is_response_cached : callable, optional
+        Called with the requester address once the request signature is verified. If it
+        returns True, the processing stops and None is returned, as the caller already
+        has a signed response for this requester.
     """
     error = None
     _non_critical_error = None
@@ -293,6 +332,8 @@ class _DauthMixin(object):
       verify_data = self.bc.verify(body, return_full_info=True)
       if not verify_data.valid:
         error = 'Invalid request signature: {}'.format(verify_data.message)
+      elif is_response_cached is not None and is_response_cached(requester):
+        return None
 
     ###### basic version checks ######
     if error is None:
@@ -378,6 +419,8 @@ if __name__ == '__main__':
   from ratio1.bc import DefaultBlockEngine
   from ratio1 import Logger
   from ver import __VER__ as ee_ver
+  from time import time
+  from extensions.business.dauth.dauth_cache_mixin import _DauthCacheMixin
   
   l = Logger("DAUTH", base_folder=".", app_folder="_local_cache")
   bc_eng = DefaultBlockEngine(log=l, name="default")
@@ -386,7 +429,10 @@ if __name__ == '__main__':
   
   
   # os.environ['EE_EVM_NET'] = 'testnet'
-  eng = _DauthMixin()
+  class _DauthEngine(_DauthMixin, _DauthCacheMixin):
+    pass
+
+  eng = _DauthEngine()
   eng.DEBUG_BYPASS = True
   eng.const = ct
   eng.bc = bc
@@ -401,6 +447,12 @@ if __name__ == '__main__':
   eng.cfg_auth_env_keys = ADMIN_PIPELINE["DAUTH_MANAGER"]["AUTH_ENV_KEYS"]
   eng.cfg_auth_predefined_keys = ADMIN_PIPELINE["DAUTH_MANAGER"]["AUTH_PREDEFINED_KEYS"]
   eng.cfg_auth_node_env_keys = ADMIN_PIPELINE["DAUTH_MANAGER"]["AUTH_NODE_ENV_KEYS"]
+  eng.cfg_supervisor_keys = []
+  eng.cfg_dauth_license_cache_ttl = 300
+  eng.cfg_dauth_license_negative_ttl = 30
+  eng.cfg_dauth_license_cache_size = 100_000
+  eng.time = time
+  eng._dauth_cache_init()
   
   
   
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+
+class _DauthRateLimitMixin(object):
+  """
+  Protection of the dAuth endpoint against requesters that hammer it.
+
+  - a token bucket per requester address, checked before any signature verification: each
+    address can burst `DAUTH_RATE_LIMIT_BURST` requests, refilled at `DAUTH_RATE_LIMIT_PER_SEC`
+  - a short-lived cache of the signed responses keyed by (address, time window), so the retries
+    within the same `DAUTH_RESPONSE_CACHE_WINDOW` seconds reuse the already signed response
+
+  The clock is passed explicitly, so both can be driven by a fake clock.
+  """
+  def __init__(self):
+    super(_DauthRateLimitMixin, self).__init__()
+    return
+
+  def _dauth_rate_limit_init(self):
+    # address -> [tokens, last refill time], least recently used first
+    self.__buckets = OrderedDict()
+    # (address, window) -> signed response, only for the current window
+    self.__responses = {}
+    self.__responses_window = None
+    self.__dauth_rate_limit_stats = {
+      'rejected': 0,
+      'served_from_cache': 0,
+    }
+    return
+
+  def _dauth_rate_limit_allow(self, address: str, now: float):
+    """
+    Take a token from the bucket of an address.
+
+    Parameters
+    ----------
+    address : str
+        The requester address (not yet verified).
+    now : float
+        The current time.
+
+    Returns
+    -------
+    bool
+        True if the request is allowed, False if it is rejected.
+    """
+    burst = self.cfg_dauth_rate_limit_burst
+    bucket = self.__buckets.get(address)
+    if bucket is None:
+      if len(self.__buckets) >= self.cfg_dauth_rate_limit_max_addresses:
+        # the least recently used bucket is the most likely to be full again
+        self.__buckets.popitem(last=False)
+      bucket = [burst, now]
+      self.__buckets[address] = bucket
+    else:
+      self.__buckets.move_to_end(address)
+      elapsed = max(now - bucket[1], 0)
+      bucket[0] = min(burst, bucket[0] + elapsed * self.cfg_dauth_rate_limit_per_sec)
+      bucket[1] = now
+    # endif new bucket
+    if bucket[0] < 1:
+      self.__dauth_rate_limit_stats['rejected'] += 1
+      return False
+    bucket[0] -= 1
+    return True
+
+  def __get_response_window(self, now: float):
+    return int(now // self.cfg_dauth_response_cache_window)
+
+  def _dauth_response_cache_get(self, address: str, now: float):
+    """
+    Get the signed response cached for an address in the current time window.
+
+    Returns
+    -------
+    dict
+        The signed response, or None.
+    """
+    window = self.__get_response_window(now) if self.cfg_dauth_response_cache_window else None
+    if window is None or window != self.__responses_window:
+      return None
+    response = self.__responses.get((address, window))
+    if response is not None:
+      self.__dauth_rate_limit_stats['served_from_cache'] += 1
+    return response
+
+  def _dauth_response_cache_set(self, address: str, response: dict, now: float):
+    if not self.cfg_dauth_response_cache_window:
+      return
+    window = self.__get_response_window(now)
+    if window != self.__responses_window:
+      # the responses of the previous windows can never be served again
+      self.__responses = {}
+      self.__responses_window = window
+    self.__responses[(address, window)] = response
+    return
+
+  def _dauth_rate_limit_get_stats(self):
+    return dict(self.__dauth_rate_limit_stats)
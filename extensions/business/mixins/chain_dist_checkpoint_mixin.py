@@ -0,0 +1,202 @@
+import os
+import pickle
+
+
+class _ChainDistCheckpointMixin(object):
+  """
+  Incremental checkpointing of a state made of a small metadata part and a few large lists
+  that only grow by appending (the data collected from the nodes).
+
+  Each save appends to a write-ahead log only what changed since the previous save: the
+  metadata if it changed and the new items of each list. When the log grows larger than the
+  last snapshot, the whole state is compacted in a new snapshot and the log is emptied, so the
+  total checkpointing cost stays linear in the size of the state. The state is recovered by
+  replaying the log over the snapshot.
+
+  Each save appends a single frame (seq, records), so a crash in the middle of a save loses the
+  whole save, never a part of it. The snapshot holds the seq of the last save it includes, so the
+  frames left in the log by a crash during the compaction are not replayed twice.
+
+  Log records:
+    ('META', meta)        - the new metadata
+    ('EXTEND', key, items) - items appended to a list
+    ('SET', key, items)    - a list was replaced (or shrank)
+    ('DROP', key)          - a list was removed
+  """
+  def __init__(self):
+    super(_ChainDistCheckpointMixin, self).__init__()
+    return
+
+  def _checkpoint_init(self, folder, compaction_min_size=1 << 20, fsync=False):
+    """
+    Parameters
+    ----------
+    folder : str
+        The folder of the snapshot and of the log.
+    compaction_min_size : int, optional
+        The log is never compacted below this size in bytes, by default 1MB
+    fsync : bool, optional
+        Sync the log to the disk after each save, by default False
+    """
+    os.makedirs(folder, exist_ok=True)
+    self.__checkpoint_snapshot_path = os.path.join(folder, 'snapshot.pkl')
+    self.__checkpoint_log_path = os.path.join(folder, 'wal.log')
+    self.__checkpoint_compaction_min_size = compaction_min_size
+    self.__checkpoint_fsync = fsync
+    self.__checkpoint_log = None
+    self.__checkpoint_snapshot_size = 0
+    self.__checkpoint_meta = None
+    self.__checkpoint_seq = 0
+    # key -> (list, checkpointed length); the lists are referenced so their identity is stable
+    self.__checkpoint_lists = {}
+    return
+
+  def __checkpoint_get_log(self):
+    if self.__checkpoint_log is None:
+      self.__checkpoint_log = open(self.__checkpoint_log_path, 'ab')
+    return self.__checkpoint_log
+
+  def __checkpoint_close_log(self):
+    if self.__checkpoint_log is not None:
+      self.__checkpoint_log.close()
+      self.__checkpoint_log = None
+    return
+
+  def __checkpoint_compact(self, meta, dct_lists):
+    state = {
+      'seq': self.__checkpoint_seq,
+      'meta': meta,
+      'lists': {key: list(lst) for key, lst in dct_lists.items()},
+    }
+    tmp_path = self.__checkpoint_snapshot_path + '.tmp'
+    with open(tmp_path, 'wb') as fh:
+      pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+      fh.flush()
+      os.fsync(fh.fileno())
+    os.replace(tmp_path, self.__checkpoint_snapshot_path)
+    self.__checkpoint_snapshot_size = os.path.getsize(self.__checkpoint_snapshot_path)
+    # the log is emptied only after the new snapshot is in place
+    self.__checkpoint_close_log()
+    open(self.__checkpoint_log_path, 'wb').close()
+    return
+
+  def _checkpoint_save(self, meta, dct_lists):
+    """
+    Save the state, appending to the log only the changes since the previous save.
+
+    Parameters
+    ----------
+    meta : dict
+        The metadata of the state, saved whole when it changes.
+    dct_lists : dict
+        The lists of the state by key. Between two saves a list must either only be appended
+        to, or be replaced by another list object.
+
+    Returns
+    -------
+    int
+        The number of bytes appended to the log, 0 if the state was compacted instead.
+    """
+    records = []
+    meta_bytes = pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL)
+    if meta_bytes != self.__checkpoint_meta:
+      records.append(('META', meta))
+      self.__checkpoint_meta = meta_bytes
+
+    for key in list(self.__checkpoint_lists):
+      if key not in dct_lists:
+        records.append(('DROP', key))
+        del self.__checkpoint_lists[key]
+    # endfor dropped lists
+
+    for key, lst in dct_lists.items():
+      tracked = self.__checkpoint_lists.get(key)
+      if tracked is not None and tracked[0] is lst and len(lst) >= tracked[1]:
+        if len(lst) > tracked[1]:
+          records.append(('EXTEND', key, lst[tracked[1]:]))
+      else:
+        records.append(('SET', key, list(lst)))
+      self.__checkpoint_lists[key] = (lst, len(lst))
+    # endfor lists
+
+    if len(records) == 0:
+      return 0
+
+    self.__checkpoint_seq += 1
+    log = self.__checkpoint_get_log()
+    start = log.tell()
+    pickle.dump((self.__checkpoint_seq, records), log, protocol=pickle.HIGHEST_PROTOCOL)
+    log.flush()
+    if self.__checkpoint_fsync:
+      os.fsync(log.fileno())
+    log_size = log.tell()
+
+    if log_size > max(self.__checkpoint_compaction_min_size, self.__checkpoint_snapshot_size):
+      self.__checkpoint_compact(meta, dct_lists)
+      return 0
+    return log_size - start
+
+  def _checkpoint_load(self):
+    """
+    Recover the state by replaying the log over the snapshot. A torn frame at the end of the
+    log (a crash in the middle of a save) is discarded.
+
+    Returns
+    -------
+    (meta, dct_lists) : tuple
+        The recovered metadata and lists, or (None, None) if nothing was saved.
+    """
+    meta, dct_lists, seq = None, {}, 0
+    if os.path.isfile(self.__checkpoint_snapshot_path):
+      with open(self.__checkpoint_snapshot_path, 'rb') as fh:
+        state = pickle.load(fh)
+      meta, dct_lists, seq = state['meta'], state['lists'], state['seq']
+      self.__checkpoint_snapshot_size = os.path.getsize(self.__checkpoint_snapshot_path)
+
+    if os.path.isfile(self.__checkpoint_log_path):
+      valid_size = 0
+      with open(self.__checkpoint_log_path, 'rb') as fh:
+        while True:
+          try:
+            frame_seq, records = pickle.load(fh)
+          except Exception:
+            break
+          valid_size = fh.tell()
+          if frame_seq <= seq:
+            # already in the snapshot
+            continue
+          for record in records:
+            if record[0] == 'META':
+              meta = record[1]
+            elif record[0] == 'EXTEND':
+              dct_lists[record[1]].extend(record[2])
+            elif record[0] == 'SET':
+              dct_lists[record[1]] = record[2]
+            elif record[0] == 'DROP':
+              dct_lists.pop(record[1], None)
+          # endfor records
+          seq = frame_seq
+        # endwhile frames
+      # drop the torn tail, so the next records are appended after the last valid one
+      with open(self.__checkpoint_log_path, 'r+b') as fh:
+        fh.truncate(valid_size)
+    # endif log
+    self.__checkpoint_seq = seq
+
+    if meta is None:
+      return None, None
+    return meta, dct_lists
+
+  def _checkpoint_start(self, meta, dct_lists):
+    """
+    Start checkpointing from a known state (the recovered one or a migrated one), compacting
+    it in a new snapshot.
+    """
+    self.__checkpoint_meta = pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL)
+    self.__checkpoint_lists = {key: (lst, len(lst)) for key, lst in dct_lists.items()}
+    self.__checkpoint_compact(meta, dct_lists)
+    return
+
+  def _checkpoint_close(self):
+    self.__checkpoint_close_log()
+    return
@@ -1,25 +1,55 @@
 import os
 from naeural_core.local_libraries.vision.ffmpeg_utils import FFMPEGUtils
+from extensions.business.mixins.chain_dist_parallel_mixin import _ChainDistParallelMixin
 
 
-class _ChainDistMergeMixin(object):
+class _ChainDistMergeMixin(_ChainDistParallelMixin):
   def __init__(self):
     super(_ChainDistMergeMixin, self).__init__()
     return
 
-  def _merge_concatenate_video_shards(self, video_shards, output_path, upload=True):
+  def _download_video_shard(self, idx, video_shard):
     """
-    Merge the video shards into a single video file. This method assumes all video shards
-    are stored locally.
+    Download a video shard, if it is an url.
+
+    Parameters
+    ----------
+    idx : int
+        The index of the shard, part of the local file name, since the shards of different
+        workers can have the same name.
+    video_shard : str
+        The path or the url of the video shard.
+
+    Returns
+    -------
+    str
+        The local path of the video shard.
+    """
+    if not video_shard.startswith(('http://', 'https://')):
+      return video_shard
+    basename = os.path.basename(video_shard.split('?')[0])
+    fn = os.path.join("ChainDist", self.get_stream_id(), "merge", f"{idx:03d}_{basename}")
+    saved_files, _ = self.maybe_download(url=video_shard, fn=fn, target='output')
+    if saved_files is None or len(saved_files) == 0 or saved_files[0] is None:
+      raise ValueError(f"Could not download the video shard {video_shard}")
+    return saved_files[0]
+
+  def _merge_concatenate_video_shards(self, video_shards, output_path, upload=True, progress_callback=None):
+    """
+    Merge the video shards into a single video file. The shards given as urls are downloaded
+    in parallel first.
 
     Parameters
     ----------
     video_shards : list
-        List of video shards to merge.
+        List of video shards to merge, local paths or urls.
     output_path : str
         The path to the output file.
     upload : bool, optional
         Upload the output file to minio, by default True
+    progress_callback : callable, optional
+        Called as `progress_callback('DOWNLOAD', nr_done, nr_total)` while downloading the
+        shards, by default None
 
     Returns
     -------
@@ -31,6 +61,13 @@ class _ChainDistMergeMixin(object):
 
     os.makedirs(output_path, exist_ok=True)
 
+    video_shards = self._parallel_shard_map(
+      func=lambda idx_shard: self._download_video_shard(*idx_shard),
+      items=list(enumerate(video_shards)),
+      description='DOWNLOAD',
+      progress_callback=progress_callback,
+    )
+
     merged_video = self.os_path.join(output_path, f"{self.get_stream_id()}_blurred.mp4")
     ffmpeg_utils.concatenate_multiple_video_files(
       input_paths=video_shards,
@@ -0,0 +1,82 @@
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class _ChainDistParallelMixin(object):
+  """
+  Bounded parallel execution of the per-shard tasks of the chain dist split and merge
+  (uploads, downloads, frame counting), with per-shard retries.
+
+  The host class may provide `self.cfg_shard_transfer_workers` (number of workers) and
+  `self.cfg_shard_transfer_retries` (retries of each shard task).
+  """
+  def __init__(self):
+    super(_ChainDistParallelMixin, self).__init__()
+    return
+
+  def __run_shard_task(self, func, item, max_retries, retry_delay):
+    for attempt in range(max_retries + 1):
+      try:
+        return func(item)
+      except Exception as exc:
+        if attempt == max_retries:
+          raise
+        self.P("Shard task failed for {} (attempt {}/{}): {}".format(item, attempt + 1, max_retries + 1, exc), color='r')
+        sleep(retry_delay * 2 ** attempt)
+    # endfor attempts
+    return
+
+  def _parallel_shard_map(self, func, items, description='shards', progress_callback=None, retry_delay=1):
+    """
+    Run `func` on each shard item with a bounded thread pool, retrying the failed items.
+
+    Parameters
+    ----------
+    func : callable
+        The task, called with one item.
+    items : list
+        The shard items.
+    description : str, optional
+        The name of the stage, passed to the progress callback, by default 'shards'
+    progress_callback : callable, optional
+        Called as `progress_callback(description, nr_done, nr_total)` after each finished item,
+        from the calling thread, by default None
+    retry_delay : float, optional
+        The delay before the first retry in seconds, doubled for each retry, by default 1
+
+    Returns
+    -------
+    results : list
+        The results of the tasks, in the order of the items. The exception of an item that
+        failed all its retries is raised after all the other items are done.
+    """
+    items = list(items)
+    max_workers = max(int(getattr(self, 'cfg_shard_transfer_workers', None) or 1), 1)
+    max_retries = max(int(getattr(self, 'cfg_shard_transfer_retries', None) or 0), 0)
+    nr_total = len(items)
+    results = [None] * nr_total
+    if nr_total == 0:
+      return results
+
+    errors = []
+    nr_done = 0
+    with ThreadPoolExecutor(max_workers=min(max_workers, nr_total), thread_name_prefix='chain_dist_shards') as executor:
+      futures = {
+        executor.submit(self.__run_shard_task, func, item, max_retries, retry_delay): idx
+        for idx, item in enumerate(items)
+      }
+      for future in as_completed(futures):
+        idx = futures[future]
+        try:
+          results[idx] = future.result()
+        except Exception as exc:
+          errors.append(exc)
+        nr_done += 1
+        if progress_callback is not None:
+          progress_callback(description, nr_done, nr_total)
+      # endfor futures
+    # endwith executor
+
+    if len(errors) > 0:
+      raise errors[0]
+    return results
@@ -0,0 +1,36 @@
+import statistics
+
+
+class _ChainDistSpeculationMixin(object):
+  def __init__(self):
+    super(_ChainDistSpeculationMixin, self).__init__()
+    return
+
+  def _find_straggler_jobs(self, dct_job_progress, dct_job_elapsed, min_elapsed, progress_lag):
+    """
+    Find the jobs whose progress lags behind the median progress of all the jobs.
+
+    Parameters
+    ----------
+    dct_job_progress : dict
+        The progress (0-100) of all the jobs, including the finished ones.
+    dct_job_elapsed : dict
+        The running time of the jobs that can be speculated.
+    min_elapsed : float
+        The minimum running time of a straggler, so the jobs that just started are not speculated.
+    progress_lag : float
+        The minimum lag, in percentage points, behind the median progress.
+
+    Returns
+    -------
+    stragglers : list
+        The ids of the straggler jobs, the most lagging first.
+    """
+    if len(dct_job_progress) < 2:
+      return []
+    median_progress = statistics.median(dct_job_progress.values())
+    stragglers = [
+      job_id for job_id, elapsed in dct_job_elapsed.items()
+      if elapsed >= min_elapsed and median_progress - dct_job_progress.get(job_id, 0) >= progress_lag
+    ]
+    return sorted(stragglers, key=lambda job_id: dct_job_progress.get(job_id, 0))
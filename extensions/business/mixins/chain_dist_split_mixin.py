@@ -1,16 +1,219 @@
 import os
+import json
+import bisect
+import subprocess
 
 from naeural_core.local_libraries.vision.ffmpeg_utils import FFMPEGUtils
+from extensions.business.mixins.chain_dist_parallel_mixin import _ChainDistParallelMixin
 
 
-class _ChainDistSplitMixin(object):
+# the segment times are moved this much before the keyframes, against the rounding of the timestamps
+KEYFRAME_CUT_EPSILON = 0.001  # seconds
+
+
+class _ChainDistSplitMixin(_ChainDistParallelMixin):
   def __init__(self):
     super(_ChainDistSplitMixin, self).__init__()
     return
 
-  def _split_video_file(self, video_file, no_shards, upload=True):
+  def _compute_shard_weights(self, nodes, dct_node_throughput, min_weight_ratio=0.0):
+    """
+    Compute the share of the work given to each node, proportional to its recent throughput.
+    Nodes without a measured throughput get the median throughput of the known nodes.
+
+    Parameters
+    ----------
+    nodes : list
+        The nodes that will process the shards, one node per shard.
+    dct_node_throughput : dict
+        The measured throughput of each node.
+    min_weight_ratio : float, optional
+        The minimum weight of a node, relative to the weight of the fastest node, by default 0.0
+
+    Returns
+    -------
+    weights : list
+        The weight of each shard. The weights sum up to 1.
+    """
+    if len(nodes) == 0:
+      return []
+    known = sorted(
+      dct_node_throughput[node] for node in nodes
+      if node is not None and dct_node_throughput.get(node, 0) > 0
+    )
+    if len(known) == 0:
+      return [1 / len(nodes)] * len(nodes)
+    default_throughput = known[len(known) // 2]
+    throughputs = [
+      dct_node_throughput.get(node) or default_throughput
+      for node in nodes
+    ]
+    max_throughput = max(throughputs)
+    throughputs = [max(t, min_weight_ratio * max_throughput) for t in throughputs]
+    total = sum(throughputs)
+    return [t / total for t in throughputs]
+
+  def _split_sizes_by_weights(self, total_size, weights):
+    """
+    Split `total_size` units of work into integer shard sizes proportional to `weights`.
+    The rounding leftovers go to the shards with the largest remainders.
+
+    Parameters
+    ----------
+    total_size : int
+        The number of units of work.
+    weights : list
+        The weight of each shard.
+
+    Returns
+    -------
+    sizes : list
+        The size of each shard. The sizes sum up to `total_size`.
+    """
+    total_weight = sum(weights)
+    exact = [total_size * w / total_weight for w in weights]
+    sizes = [int(x) for x in exact]
+    leftover = total_size - sum(sizes)
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - sizes[i], reverse=True)
+    for i in by_remainder[:leftover]:
+      sizes[i] += 1
+    return sizes
+
+  def _split_list_by_weights(self, items, weights):
+    """
+    Split a list into consecutive shards with sizes proportional to `weights`.
+
+    Parameters
+    ----------
+    items : list
+        The items to split.
+    weights : list
+        The weight of each shard.
+
+    Returns
+    -------
+    shards : list
+        The list of shards, one for each weight.
+    """
+    shards = []
+    start = 0
+    for size in self._split_sizes_by_weights(len(items), weights):
+      shards.append(items[start:start + size])
+      start += size
+    return shards
+
+  def _probe_video_packets(self, video_file):
+    """
+    Probe the packets of the video stream once.
+
+    Parameters
+    ----------
+    video_file : str
+        The path to the video file.
+
+    Returns
+    -------
+    (packet_times, keyframe_indices) : tuple
+        The timestamps of the video packets in decoding order, relative to the start of the file,
+        and the indices of the keyframe packets.
     """
-    Split a video file into multiple shards of equal size.
+    cmd = [
+      'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+      '-show_entries', 'format=start_time:packet=pts_time,flags',
+      '-of', 'json', video_file,
+    ]
+    dct_probe = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout)
+    start_time = float(dct_probe.get('format', {}).get('start_time', 0) or 0)
+    packet_times = []
+    keyframe_indices = []
+    for packet in dct_probe.get('packets', []):
+      if packet.get('pts_time') in [None, 'N/A']:
+        continue
+      if 'K' in packet.get('flags', ''):
+        keyframe_indices.append(len(packet_times))
+      packet_times.append(float(packet['pts_time']) - start_time)
+    # endfor packets
+    return packet_times, keyframe_indices
+
+  def _choose_keyframe_cuts(self, keyframe_indices, total_frames, weights):
+    """
+    Choose the keyframes where the shards start, the nearest ones to the frames where the
+    shards of sizes proportional to `weights` would start.
+
+    Parameters
+    ----------
+    keyframe_indices : list
+        The sorted indices of the keyframes.
+    total_frames : int
+        The number of frames.
+    weights : list
+        The weight of each shard.
+
+    Returns
+    -------
+    cuts : list
+        The increasing frame indices where the shards after the first one start. There are
+        fewer shards than weights if there are not enough keyframes.
+    """
+    candidates = [idx for idx in keyframe_indices if 0 < idx < total_frames]
+    cuts = []
+    target = 0
+    for size in self._split_sizes_by_weights(total_frames, weights)[:-1]:
+      target += size
+      # only the keyframes after the previous cut
+      lo = bisect.bisect_right(candidates, cuts[-1]) if len(cuts) > 0 else 0
+      if lo >= len(candidates):
+        break
+      pos = max(bisect.bisect_left(candidates, target, lo=lo), lo)
+      options = candidates[max(pos - 1, lo):pos + 1]
+      cuts.append(min(options, key=lambda idx: abs(idx - target)))
+    # endfor shards
+    return cuts
+
+  def _split_video_file_on_keyframes(self, video_file, output_path, weights):
+    """
+    Split a video file on the keyframes nearest to the shard boundaries given by `weights`,
+    with stream copy (no re-encoding) in a single ffmpeg run of the segment muxer. The frames
+    of the shards are counted from the same single probe used to find the keyframes.
+
+    Returns
+    -------
+    dct_ret : dict
+        A dictionary containing the following keys:
+        - segment_times: the start time of each shard, after the first one
+        - output_files: the list of output files, relative to `output_path`
+        - video_frames: the number of frames of each shard
+        - shard_weights: the share of the frames of each shard. There are fewer shards than
+          weights when the keyframes are too sparse.
+        - errors: the list of errors, if any occurred
+    """
+    packet_times, keyframe_indices = self._probe_video_packets(video_file)
+    total_frames = len(packet_times)
+    cuts = self._choose_keyframe_cuts(keyframe_indices, total_frames, weights)
+    bounds = [0] + cuts + [total_frames]
+    segment_times = [packet_times[idx] for idx in cuts]
+
+    file_name, ext = os.path.splitext(os.path.basename(video_file))
+    output_pattern = os.path.join(output_path, f"{file_name}_%03d{ext}")
+    cmd = ['ffmpeg', '-v', 'error', '-y', '-i', video_file, '-map', '0', '-c', 'copy', '-f', 'segment', '-reset_timestamps', '1']
+    if len(segment_times) > 0:
+      cmd += ['-segment_times', ','.join(f"{max(t - KEYFRAME_CUT_EPSILON, 0):.6f}" for t in segment_times)]
+    cmd.append(output_pattern)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    video_frames = [bounds[idx + 1] - bounds[idx] for idx in range(len(bounds) - 1)]
+    return {
+      'segment_times': segment_times,
+      'output_files': [os.path.basename(output_pattern % idx) for idx in range(len(bounds) - 1)],
+      'video_frames': video_frames,
+      'shard_weights': [nr_frames / max(total_frames, 1) for nr_frames in video_frames],
+      'errors': [result.stderr] if result.returncode != 0 else [],
+    }
+
+  def _split_video_file(self, video_file, no_shards, upload=True, progress_callback=None, keyframe_aligned=False, weights=None):
+    """
+    Split a video file into multiple shards of equal size. The frames of the shards are counted
+    and the shards are uploaded in parallel.
 
     Parameters
     ----------
@@ -20,15 +223,31 @@ class _ChainDistSplitMixin(object):
         The number of shards to split the video file into.
     upload : bool, optional
         Upload the files to minio, by default True
+    progress_callback : callable, optional
+        Called as `progress_callback(stage, nr_done, nr_total)` while counting the frames
+        ('FRAMES') and uploading ('UPLOAD') the shards, by default None
+    keyframe_aligned : bool, optional
+        Cut the shards on keyframes with stream copy, see `_split_video_file_on_keyframes`,
+        instead of equal time segments, by default False
+    weights : list, optional
+        The weight of each of the `no_shards` shards when `keyframe_aligned`, for example
+        `self.get_shard_weights()`, by default equal weights
 
     Returns
     -------
     dct_ret : dict
         A dictionary containing the following keys:
-        - segment_time: the time of each segment
+        - segment_time: the time of each segment (`segment_times` when `keyframe_aligned`)
         - output_files: the list of output files
+        - video_resolution: the resolution of the video
+        - video_frames: the number of frames of each shard
+        - shard_weights: when `keyframe_aligned`, the share of the frames of each shard. If the
+          keyframes are too sparse there are fewer shards than `no_shards`, and the caller must
+          re-plan the nodes of the shards.
         - errors: the list of errors, if any occurred
     """
+    if weights is not None and len(weights) != no_shards:
+      raise ValueError("Got {} shard weights for {} shards".format(len(weights), no_shards))
 
     ffmpeg_utils = FFMPEGUtils(caller=self)
 
@@ -37,34 +256,50 @@ class _ChainDistSplitMixin(object):
     output_path = self.os_path.join(file_path, f"{file_name}_shards")
     os.makedirs(output_path, exist_ok=True)
 
-    dct_ret = ffmpeg_utils.split_video_file(
-      path=video_file,
-      nr_chunks=no_shards,
-      path_to_output=output_path,
-    )
+    if keyframe_aligned:
+      dct_ret = self._split_video_file_on_keyframes(
+        video_file=video_file,
+        output_path=output_path,
+        weights=weights if weights is not None else [1] * no_shards,
+      )
+      if len(dct_ret['output_files']) < no_shards:
+        self.P("Only {}/{} keyframe aligned shards for {}, the keyframes are too sparse".format(
+          len(dct_ret['output_files']), no_shards, video_file), color='r'
+        )
+    else:
+      dct_ret = ffmpeg_utils.split_video_file(
+        path=video_file,
+        nr_chunks=no_shards,
+        path_to_output=output_path,
+      )
 
-    dct_ret["video_resolution"] = ffmpeg_utils.video_resolution(video_file)
+      dct_ret["video_frames"] = self._parallel_shard_map(
+        func=lambda file_path: ffmpeg_utils.no_frames(os.path.join(output_path, file_path)),
+        items=dct_ret["output_files"],
+        description='FRAMES',
+        progress_callback=progress_callback,
+      )
+    # endif keyframe aligned
 
-    dct_ret["video_frames"] = [
-      ffmpeg_utils.no_frames(os.path.join(output_path, file_path))
-      for file_path in dct_ret["output_files"]]
+    dct_ret["video_resolution"] = ffmpeg_utils.video_resolution(video_file)
 
     if not upload:
       return dct_ret
 
     # upload the output files
-    output_files = dct_ret["output_files"]
-    uploaded_files = []
-
-    for file_path in output_files:
+    def upload_shard(file_path):
       target_path = os.path.join("ChainDist", self.get_stream_id(), os.path.basename(file_path))
       url, _ = self.upload_file(
         file_path=os.path.join(output_path, file_path),
         target_path=target_path,
       )
+      return url
 
-      uploaded_files.append(url)
-
-    dct_ret["output_files"] = uploaded_files
+    dct_ret["output_files"] = self._parallel_shard_map(
+      func=upload_shard,
+      items=dct_ret["output_files"],
+      description='UPLOAD',
+      progress_callback=progress_callback,
+    )
 
     return dct_ret
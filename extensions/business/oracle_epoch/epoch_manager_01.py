@@ -9,7 +9,16 @@ Each request will generate data as follows:
 - other oracle peers signatures are added - all must be on same agreed availability
 - package is node-signed and returned to the client
 
+The past epochs are immutable once agreed, so the EVM-signed epochs data is cached per
+(node, epoch range, last synced epoch) and the node-signed responses are reused for a few
+seconds. Both caches are dropped when a new agreed epoch is recorded by the epoch manager.
+
+The active nodes are indexed in sorted snapshots rebuilt every `ACTIVE_NODES_REFRESH_INTERVAL`
+seconds, so each `active_nodes_list` page is a slice of the current snapshot. The cursor returned
+with each page pins the snapshot, so a client walking all the pages gets a consistent view.
+
 """
+from collections import OrderedDict
 
 from naeural_core.business.default.web_app.supervisor_fast_api_web_app import SupervisorFastApiWebApp as BasePlugin
 
@@ -19,6 +28,14 @@ _CONFIG = {
   **BasePlugin.CONFIG,
 
   'PORT': None,
+  # Maximum number of (node, epoch range) entries kept in the EVM-signed epochs cache.
+  'NODE_EPOCHS_CACHE_SIZE': 10_000,
+  # Seconds for which an already signed response is served again for the same request. 0 disables it.
+  'SIGNED_RESPONSE_CACHE_TTL': 5,
+  # Seconds between the rebuilds of the sorted active nodes index.
+  'ACTIVE_NODES_REFRESH_INTERVAL': 10,
+  # Number of active nodes snapshots kept alive for the clients paginating with a cursor.
+  'ACTIVE_NODES_SNAPSHOTS': 5,
   # 'ASSETS': 'plugins/business/fastapi/epoch_manager',
   'VALIDATION_RULES': {
     **BasePlugin.CONFIG['VALIDATION_RULES'],
@@ -40,6 +57,15 @@ class EpochManager01Plugin(BasePlugin):
 
   def on_init(self):
     super(EpochManager01Plugin, self).on_init()
+    # (node, start_epoch, end_epoch, last_synced_epoch) -> EVM-signed epochs data
+    self.__node_epochs_cache = OrderedDict()
+    # (endpoint, node, start_epoch, end_epoch, current_epoch, last_synced_epoch) -> (time, signed response)
+    self.__responses_cache = OrderedDict()
+    self.__cache_synced_epoch = None
+    self.__cache_stats = {'hits': 0, 'misses': 0, 'response_hits': 0}
+    # snapshot_id -> {'time', 'keys', 'nodes', 'error'}, oldest first
+    self.__active_nodes_snapshots = OrderedDict()
+    self.__active_nodes_snapshot_id = 0
     my_address = self.bc.address
     current_epoch = self.__get_current_epoch()
     start_epoch = current_epoch - 6
@@ -115,6 +141,127 @@ class EpochManager01Plugin(BasePlugin):
     return self.netmon.epoch_manager.get_current_epoch()
   
   
+  def __get_cache_synced_epoch(self):
+    """
+    Get the last epoch agreed by the oracles, dropping the cached data if it changed.
+
+    Returns
+    -------
+    int
+        The last synced epoch.
+    """
+    last_synced_epoch = self.netmon.epoch_manager.get_last_sync_epoch()
+    if last_synced_epoch != self.__cache_synced_epoch:
+      # a new agreed epoch was recorded, so the oracle state of the cached epochs may have changed
+      if self.__cache_synced_epoch is not None:
+        self.P(f"Last synced epoch changed {self.__cache_synced_epoch} -> {last_synced_epoch}. "
+               f"Dropping {len(self.__node_epochs_cache)} cached entries. Stats: {self.__cache_stats}")
+      self.__node_epochs_cache.clear()
+      self.__responses_cache.clear()
+      self.__cache_synced_epoch = last_synced_epoch
+    # endif synced epoch changed
+    return last_synced_epoch
+
+
+  def __get_cached_response(self, endpoint: str, node_addr: str, start_epoch=None, end_epoch=None, get_response=None):
+    """
+    Get the signed response of an endpoint from the cache, or build it with `get_response`
+    and cache it for `SIGNED_RESPONSE_CACHE_TTL` seconds.
+
+    Parameters
+    ----------
+    endpoint : str
+        The name of the endpoint.
+
+    node_addr : str
+        The internal address of the node.
+
+    start_epoch, end_epoch : int
+        The requested epoch range, if any.
+
+    get_response : callable
+        Builds the signed response on cache miss.
+
+    Returns
+    -------
+    dict
+        The signed response.
+    """
+    ttl = self.cfg_signed_response_cache_ttl
+    if not ttl:
+      return get_response()
+    key = (
+      endpoint, node_addr, start_epoch, end_epoch,
+      self.__get_current_epoch(), self.__get_cache_synced_epoch(),
+    )
+    cached = self.__responses_cache.get(key)
+    if cached is not None and self.time() - cached[0] < ttl:
+      self.__cache_stats['response_hits'] += 1
+      return cached[1]
+    response = get_response()
+    self.__responses_cache[key] = (self.time(), response)
+    self.__responses_cache.move_to_end(key)
+    while len(self.__responses_cache) > self.cfg_node_epochs_cache_size:
+      self.__responses_cache.popitem(last=False)
+    return response
+
+
+  def __get_active_nodes_snapshot(self, snapshot_id: int = None):
+    """
+    Get a snapshot of the active nodes index, rebuilding the current one if it is older
+    than `ACTIVE_NODES_REFRESH_INTERVAL` seconds.
+
+    Parameters
+    ----------
+    snapshot_id : int, optional
+        The snapshot pinned by a cursor. If None or expired, the current snapshot is used.
+
+    Returns
+    -------
+    (snapshot_id, snapshot) : tuple
+        The id of the snapshot and the snapshot, a dict with the sorted node `keys`, the `nodes`
+        stats and the `error` reported by the epoch manager.
+    """
+    if snapshot_id is not None and snapshot_id in self.__active_nodes_snapshots:
+      return snapshot_id, self.__active_nodes_snapshots[snapshot_id]
+    current = self.__active_nodes_snapshots.get(self.__active_nodes_snapshot_id)
+    if current is None or self.time() - current['time'] >= self.cfg_active_nodes_refresh_interval:
+      nodes = self.netmon.epoch_manager.get_stats(display=True, online_only=True)
+      error = nodes.pop("error", None)
+      current = {
+        'time': self.time(),
+        'keys': sorted(nodes.keys()),
+        'nodes': nodes,
+        'error': error,
+      }
+      self.__active_nodes_snapshot_id += 1
+      self.__active_nodes_snapshots[self.__active_nodes_snapshot_id] = current
+      while len(self.__active_nodes_snapshots) > max(self.cfg_active_nodes_snapshots, 1):
+        self.__active_nodes_snapshots.popitem(last=False)
+    # endif rebuild
+    return self.__active_nodes_snapshot_id, current
+
+
+  def __parse_cursor(self, cursor: str):
+    """
+    Parse a `<snapshot_id>:<offset>` pagination cursor.
+
+    Returns
+    -------
+    (snapshot_id, offset) : tuple
+        Both None if the cursor is missing or malformed.
+    """
+    if not isinstance(cursor, str):
+      return None, None
+    try:
+      snapshot_id, offset = (int(x) for x in cursor.split(':'))
+    except ValueError:
+      return None, None
+    if offset < 0:
+      return None, None
+    return snapshot_id, offset
+
+
   def __eth_to_internal(self, eth_node_address):
     result = self.netmon.epoch_manager.eth_to_internal(eth_node_address)
     if result is None:
@@ -242,12 +389,34 @@ class EpochManager01Plugin(BasePlugin):
         'error': error_msg,
       }
     else:
-      self.P(f"Getting epochs for node {node_addr} from {start_epoch} to {end_epoch}")
-      epochs_vals = self.netmon.epoch_manager.get_node_epochs(
-        node_addr, 
-        autocomplete=True,
-        as_list=False
-      )    
+      cache_key = (node_addr, start_epoch, end_epoch, self.__get_cache_synced_epoch())
+      cached = self.__node_epochs_cache.get(cache_key)
+      if cached is not None:
+        self.__cache_stats['hits'] += 1
+        self.__node_epochs_cache.move_to_end(cache_key)
+        valid, oracle_state, signed_data = cached
+        epochs_vals = signed_data['epochs_vals']
+      else:
+        self.__cache_stats['misses'] += 1
+        self.P(f"Getting epochs for node {node_addr} from {start_epoch} to {end_epoch}")
+        epochs_vals = self.netmon.epoch_manager.get_node_epochs(
+          node_addr, 
+          autocomplete=True,
+          as_list=False
+        )    
+        if epochs_vals is not None:
+          epochs = list(range(start_epoch, end_epoch + 1)) 
+          epochs_vals_selected = [epochs_vals[x] for x in epochs]
+          oracle_state = self.netmon.epoch_manager.get_oracle_state(
+            start_epoch=start_epoch, end_epoch=end_epoch
+          )
+          valid = oracle_state['manager']['valid']
+          signed_data = self.__get_signed_data(node_addr, epochs, epochs_vals_selected, sign=valid)
+          self.__node_epochs_cache[cache_key] = (valid, oracle_state, signed_data)
+          while len(self.__node_epochs_cache) > self.cfg_node_epochs_cache_size:
+            self.__node_epochs_cache.popitem(last=False)
+        # endif epochs_vals
+      # endif cached
       if epochs_vals is None:
         data = {
           'node': node_addr,
@@ -255,13 +424,8 @@ class EpochManager01Plugin(BasePlugin):
           'error': "No epochs found for the given node",
         }
       else:
-        epochs = list(range(start_epoch, end_epoch + 1)) 
-        epochs_vals_selected = [epochs_vals[x] for x in epochs]
-        oracle_state = self.netmon.epoch_manager.get_oracle_state(
-          start_epoch=start_epoch, end_epoch=end_epoch
-        )
-        valid = oracle_state['manager']['valid']
-        data = self.__get_signed_data(node_addr, epochs, epochs_vals_selected, sign=valid)
+        # the live node fields are added to a copy, the cached signed data is left untouched
+        data = dict(signed_data)
         try:
           last_seen = round(self.netmon.network_node_last_seen(node_addr),2)
         except:
@@ -323,11 +487,24 @@ class EpochManager01Plugin(BasePlugin):
 
   @BasePlugin.endpoint
   # /active_nodes_list
-  def active_nodes_list(self, items_per_page: int = 10, page: int = 1):
+  def active_nodes_list(self, items_per_page: int = 10, page: int = 1, cursor: str = None):
     """
     Returns the list of known and currently active nodes in the network.
     For all the nodes use the `nodes_list` endpoint.
 
+    Parameters
+    ----------
+    items_per_page : int
+        The number of nodes per page.
+
+    page : int
+        The requested page, used when no cursor is given.
+
+    cursor : str, optional
+        The `nodes_next_cursor` of a previous page. The next page is returned from the same
+        snapshot of the active nodes, as long as the snapshot is still kept, otherwise from
+        the current snapshot.
+
     Returns
     -------
     dict
@@ -335,6 +512,9 @@ class EpochManager01Plugin(BasePlugin):
         - nodes: list
             A list of strings, each string is the address of a node in the network.
 
+        - nodes_next_cursor: str
+            The cursor of the next page, or None if this is the last page.
+
         - server_id: str
             The address of the responding node.
 
@@ -355,24 +535,33 @@ class EpochManager01Plugin(BasePlugin):
     #   } for x in nodes 
     #   if self.netmon.network_node_simple_status(addr=x) == self.const.DEVICE_STATUS_ONLINE
     # }
-    nodes = self.netmon.epoch_manager.get_stats(display=True, online_only=True)
-    error = nodes.pop("error", None)
-    keys = sorted(list(nodes.keys()))
+    items_per_page = max(int(items_per_page), 1)
+    cursor_snapshot_id, cursor_offset = self.__parse_cursor(cursor)
+    snapshot_id, snapshot = self.__get_active_nodes_snapshot(cursor_snapshot_id)
+    keys = snapshot['keys']
     total_items = len(keys)
     total_pages = (total_items + items_per_page - 1) // items_per_page
-    if page < 1:
-      page = 1
-    if page > total_pages:
-      page = total_pages
-    start = (page - 1) * items_per_page
+    if cursor_offset is not None:
+      # if the snapshot of the cursor expired, the walk continues on the current snapshot
+      start = cursor_offset
+      page = start // items_per_page + 1
+    else:
+      if page < 1:
+        page = 1
+      if page > total_pages:
+        page = total_pages
+      start = max(page - 1, 0) * items_per_page
+    # endif cursor
     end = start + items_per_page
-    nodes = {k: nodes[k] for k in keys[start:end]}
+    nodes = {k: snapshot['nodes'][k] for k in keys[start:end]}
+    next_cursor = f"{snapshot_id}:{end}" if end < total_items else None
     response = self.__get_response({
-      'error' : error,
+      'error' : snapshot['error'],
       'nodes_total_items': total_items,
       'nodes_total_pages': total_pages,
       'nodes_items_per_page': items_per_page,
       'nodes_page': page,
+      'nodes_next_cursor': next_cursor,
       'nodes': nodes,      
     })
     return response
@@ -430,9 +619,12 @@ class EpochManager01Plugin(BasePlugin):
     elif node_addr is None:
       raise ValueError("Please provide either `eth_node_addr` or `node_addr`")
     
-    response = self.__get_response(self.__get_node_epochs(
-      node_addr, start_epoch=start_epoch, end_epoch=end_epoch
-    ))
+    response = self.__get_cached_response(
+      'node_epochs_range', node_addr, start_epoch=start_epoch, end_epoch=end_epoch,
+      get_response=lambda: self.__get_response(self.__get_node_epochs(
+        node_addr, start_epoch=start_epoch, end_epoch=end_epoch
+      )),
+    )
     return response
 
 
@@ -466,7 +658,10 @@ class EpochManager01Plugin(BasePlugin):
     if not isinstance(node_addr, str):
       return None
 
-    response = self.__get_response(self.__get_node_epochs(node_addr))
+    response = self.__get_cached_response(
+      'node_epochs', node_addr,
+      get_response=lambda: self.__get_response(self.__get_node_epochs(node_addr)),
+    )
     return response
 
   @BasePlugin.endpoint
@@ -13,8 +13,11 @@ Then, in a loop
   - if the node cannot participate in the sync process, it will request the availability table from the other oracles
   - otherwise, it will continue to the next stage
 2. Exchange the local table of availability between oracles
+  - tables can be sent as deltas relative to the last agreed table (message version 4)
 3. Compute the median table of availability, based on the local tables received from the oracles 
-  - for each node in the table, compute the median value and sign it
+  - for each node in the table, compute the median value
+  - sign the whole table once (message version 2) or each value separately (version 1),
+    depending on the version advertised by the other oracles in step 2
 4. Exchange the median table of availability between oracles
 5. Compute the agreed median table of availability, based on the median tables received from the oracles
   - for each node in the table, compute the most frequent median value
@@ -56,14 +59,29 @@ To deploy for the first time:
 from naeural_core.business.base.network_processor import NetworkProcessorPlugin
 from naeural_core.constants import SUPERVISOR_MIN_AVAIL_PRC, EPOCH_MAX_VALUE
 
+from extensions.business.oracle_sync.oracle_sync_verify_mixin import _OracleSyncVerifyMixin
+from extensions.business.oracle_sync.oracle_sync_chunks_mixin import _OracleSyncEpochChunksMixin, OracleSyncChunkCt
+from extensions.business.oracle_sync.oracle_sync_delta_mixin import _OracleSyncTableDeltaMixin
+from extensions.business.oracle_sync.oracle_sync_timers_mixin import _OracleSyncTimersMixin
+from extensions.business.oracle_sync.oracle_sync_inbox_mixin import _OracleSyncInboxMixin
+from extensions.business.oracle_sync.oracle_sync_consensus import (
+  compute_median_values, compute_most_frequent_values,
+)
+
 """
 TODO list:
 - rename states so that STATE8 becomes STATE0 and STATES 0-7 become 1-8
 """
 
-MAX_RECEIVED_MESSAGES_SIZE = 1000
+# Only the newest message is kept for each (stage, epoch) of a sender, so this bounds
+# mostly the chunks of the historical epoch tables.
+MAX_RECEIVED_MESSAGES_PER_ORACLE = 1000
 DEBUG_MODE = False
 SIGNATURES_EXCHANGE_MULTIPLIER = 5
+# Name of the deadline that wakes up the state machine.
+STATE_MACHINE_STEP_TIMER = 'STATE_MACHINE_STEP'
+# Margin added to the send deadlines, since the timeouts are checked with strict comparisons.
+STATE_MACHINE_STEP_MARGIN = 0.01  # seconds
 
 # Full availability means that the node was seen online for at least SUPERVISOR_MIN_AVAIL_PRC% of the time.
 FULL_AVAILABILITY_THRESHOLD = round(SUPERVISOR_MIN_AVAIL_PRC * EPOCH_MAX_VALUE)
@@ -76,6 +94,17 @@ POTENTIALLY_FULL_AVAILABILITY_THRESHOLD = EPOCH_MAX_VALUE - 2 * (EPOCH_MAX_VALUE
 ORACLE_SYNC_ACCEPTED_REPORTS_THRESHOLD = 1
 ORACLE_SYNC_ACCEPTED_MEDIAN_ERROR_MARGIN = EPOCH_MAX_VALUE - POTENTIALLY_FULL_AVAILABILITY_THRESHOLD
 
+# Message versions. Messages without a version field are considered version 1.
+# 1 - the median table is signed node by node
+# 2 - the median table is signed once, as a canonical digest of the whole table
+# 3 - the historical epoch tables are sent in compressed chunks
+# 4 - the local and median tables can be sent as deltas relative to the last agreed table
+ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES = 1
+ORACLE_SYNC_VERSION_TABLE_SIGNATURE = 2
+ORACLE_SYNC_VERSION_CHUNKED_EPOCHS = 3
+ORACLE_SYNC_VERSION_TABLE_DELTA = 4
+ORACLE_SYNC_MESSAGE_VERSION = ORACLE_SYNC_VERSION_TABLE_DELTA
+
 
 _CONFIG = {
   **NetworkProcessorPlugin.CONFIG,
@@ -98,6 +127,20 @@ _CONFIG = {
   # More powerful debug sync
   'DEBUG_SYNC_FULL': False,
   'ORACLE_LIST_REFRESH_INTERVAL': 300,  # seconds
+  # Number of workers used for signature verification. None means the CPU count.
+  'VERIFY_WORKERS': None,
+  # Sign the median table once instead of once per node, if all participating oracles support it.
+  'TABLE_LEVEL_SIGNATURES': True,
+  # Number of epochs sent in each compressed chunk when answering historical table requests.
+  'EPOCHS_PER_CHUNK': 10,
+  # Send the local and median tables as deltas relative to the last agreed table, if all
+  # participating oracles support it.
+  'DELTA_TABLES': True,
+  # Step the state machine only when a deadline expires or new messages arrive, instead of
+  # on every loop iteration.
+  'EVENT_DRIVEN_STEPS': True,
+  # How often the epoch change is checked while waiting for it, in event driven mode.
+  'EPOCH_CHECK_INTERVAL': 1,  # seconds
 
   'VALIDATION_RULES': {
     **NetworkProcessorPlugin.CONFIG['VALIDATION_RULES'],
@@ -128,6 +171,16 @@ class OracleSyncCt:
   AGREEMENT_SIGNATURE = 'AGREEMENT_SIGNATURE'
   AGREEMENT_SIGNATURES = 'AGREEMENT_SIGNATURES'
   AVAILABILITIES = 'AVAILABILITIES'
+  VERSION = 'VERSION'
+  MEDIAN_TABLE_DIGEST = 'MEDIAN_TABLE_DIGEST'
+  MEDIAN_TABLE_SIGNATURE = 'MEDIAN_TABLE_SIGNATURE'
+  EPOCH_CHUNK = 'EPOCH_CHUNK'
+  EPOCH_CHUNK_DATA = 'EPOCH_CHUNK_DATA'
+  REQUESTED_CHUNKS = 'REQUESTED_CHUNKS'
+  DELTA_BASE_EPOCH = 'DELTA_BASE_EPOCH'
+  DELTA_REMOVED = 'DELTA_REMOVED'
+  TABLE_DIGEST = 'TABLE_DIGEST'
+  FULL_TABLE_REQUESTS = 'FULL_TABLE_REQUESTS'
 
 
 
@@ -150,13 +203,29 @@ VALUE_STANDARDS = {
   OracleSyncCt.AGREED_MEDIAN_TABLE: {
     'type': dict,
   },
+  OracleSyncCt.MEDIAN_TABLE_SIGNATURE: {
+    'type': dict,
+  },
+  OracleSyncCt.EPOCH_CHUNK: {
+    'type': dict,
+  },
+  OracleSyncCt.EPOCH_CHUNK_DATA: {
+    'type': str,
+  },
   'EE_SIGN': {
     'type': str,
   }
 }
 
 
-class OracleSync01Plugin(NetworkProcessorPlugin):
+class OracleSync01Plugin(
+  NetworkProcessorPlugin,
+  _OracleSyncVerifyMixin,
+  _OracleSyncEpochChunksMixin,
+  _OracleSyncTableDeltaMixin,
+  _OracleSyncTimersMixin,
+  _OracleSyncInboxMixin,
+):
 
   class STATES:
     S0_WAIT_FOR_EPOCH_CHANGE = 'WAIT_FOR_EPOCH_CHANGE'
@@ -202,7 +271,16 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       self.sleep(1)
     # endwhile
     self.__oracle_list = []
+    self.__oracle_set = set()
     self.__last_oracle_list_refresh = None
+    # The message version advertised by each oracle in the local table exchange.
+    # Kept between epochs, since delta tables are negotiated before the first exchange of an epoch.
+    self.dct_oracle_versions = {}
+    self.__delta_base = (None, None)
+    self._verify_init()
+    self._timers_init()
+    self.__n_payloads_sent = 0
+    self.__n_messages_consumed = 0
     self.maybe_refresh_oracle_list()
     self.__reset_to_initial_state()
 
@@ -212,13 +290,14 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
     # because they have to request the agreed median table and wait to receive
     # the agreed median table from the previous epochs.
     self.state_machine_name = 'OracleSyncPlugin'
-    self.__received_messages_from_oracles = self.deque(maxlen=MAX_RECEIVED_MESSAGES_SIZE)
+    self._inbox_init(max_messages_per_sender=MAX_RECEIVED_MESSAGES_PER_ORACLE)
     self.state_machine_api_init(
       name=self.state_machine_name,
       state_machine_transitions=self._prepare_job_state_transition_map(),
       initial_state=self.STATES.S8_SEND_REQUEST_AGREED_MEDIAN_TABLE,
       on_successful_step_callback=self.state_machine_api_callback_do_nothing,
     )
+    self._timers_schedule(STATE_MACHINE_STEP_TIMER, self.time())
     return
 
   def get_all_nodes(self):
@@ -396,6 +475,9 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       Reset the plugin to the initial state.
       """
       self.P(f'Resetting to initial state')
+      if self.cfg_debug_sync:
+        self.P(f'State machine steps: {self._timers_get_counters()}')
+      # endif debug_sync
       self.__current_epoch = self.netmon.epoch_manager.get_current_epoch()
       self.current_epoch_computed = False
 
@@ -407,7 +489,14 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       self.last_time_local_table_sent = None
 
       self.median_table = None
+      self.median_table_version = ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES
+      self.median_table_signature = None
       self.dct_median_tables = {}
+
+      # Oracles that could not rebuild a delta table received from us ask for full tables.
+      self.send_full_tables = False
+      # Oracles whose delta tables we could not rebuild.
+      self.full_table_requests = set()
       self.first_time_median_table_sent = None
       self.last_time_median_table_sent = None
 
@@ -423,6 +512,7 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       # about the previous epochs.
       self.dct_agreed_availability_table = {}
       self.dct_agreed_availability_signatures = {}
+      self._epoch_chunks_reset()
 
       self.__last_epoch_synced = self.netmon.epoch_manager.get_last_sync_epoch()
       self.first_time_request_agreed_median_table_sent = None
@@ -431,11 +521,9 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       return
 
     # S0_WAIT_FOR_EPOCH_CHANGE
-    def __send_epoch__agreed_median_table(self, start_epoch, end_epoch):
+    def __get_epoch__agreed_median_table(self, epoch_keys):
       dct_epoch__agreed_median_table = {}
       dct_epoch__signatures = {}
-
-      epoch_keys = list(range(start_epoch, end_epoch + 1))
       for epoch in epoch_keys:
         availability_table, dct_signatures = self.netmon.epoch_manager.get_epoch_availability(
           epoch=epoch, return_signatures=True
@@ -443,6 +531,30 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         dct_epoch__agreed_median_table[epoch] = availability_table
         dct_epoch__signatures[epoch] = dct_signatures
       # end for epoch keys
+      return dct_epoch__agreed_median_table, dct_epoch__signatures
+
+    def __send_epoch__agreed_median_table(self, start_epoch, end_epoch, version=None, requested_chunks=None):
+      """
+      Send the agreed median tables and their signatures for the requested epochs.
+
+      Parameters
+      ----------
+      start_epoch : int
+          The first requested epoch
+      end_epoch : int
+          The last requested epoch
+      version : int, optional
+          The message version of the requester. Requesters that support it receive the response
+          in compressed chunks, the others in a single payload. By default None (version 1).
+      requested_chunks : list, optional
+          The chunk indexes still needed by the requester. If None, all the chunks are sent.
+      """
+      if version is not None and version >= ORACLE_SYNC_VERSION_CHUNKED_EPOCHS:
+        self.__send_epoch__agreed_median_table_chunks(start_epoch, end_epoch, requested_chunks)
+        return
+
+      epoch_keys = list(range(start_epoch, end_epoch + 1))
+      dct_epoch__agreed_median_table, dct_epoch__signatures = self.__get_epoch__agreed_median_table(epoch_keys)
 
       if self.cfg_debug_sync:
         self.P(f'Broadcasting availability_tables from {start_epoch} to {end_epoch}.')
@@ -467,6 +579,60 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       )
       return
 
+    def __send_epoch__agreed_median_table_chunks(self, start_epoch, end_epoch, requested_chunks=None):
+      """
+      Send the agreed median tables and their signatures for the requested epochs, split in
+      compressed chunks of `EPOCHS_PER_CHUNK` epochs each.
+
+      Parameters
+      ----------
+      start_epoch : int
+          The first requested epoch
+      end_epoch : int
+          The last requested epoch
+      requested_chunks : list, optional
+          The chunk indexes still needed by the requester. If None, all the chunks are sent.
+      """
+      epochs_per_chunk = max(int(self.cfg_epochs_per_chunk), 1)
+      all_epoch_keys = list(range(start_epoch, end_epoch + 1))
+      lst_chunk_epoch_keys = [
+        all_epoch_keys[i:i + epochs_per_chunk]
+        for i in range(0, len(all_epoch_keys), epochs_per_chunk)
+      ]
+      total = len(lst_chunk_epoch_keys)
+      if requested_chunks is None:
+        requested_chunks = range(total)
+      lst_chunk_idxs = sorted(set(idx for idx in requested_chunks if isinstance(idx, int) and 0 <= idx < total))
+
+      total_bytes = 0
+      for chunk_idx in lst_chunk_idxs:
+        epoch_keys = lst_chunk_epoch_keys[chunk_idx]
+        dct_epoch__agreed_median_table, dct_epoch__signatures = self.__get_epoch__agreed_median_table(epoch_keys)
+        chunk_body = {
+          OracleSyncCt.EPOCH__AGREED_MEDIAN_TABLE: dct_epoch__agreed_median_table,
+          OracleSyncCt.EPOCH__AGREEMENT_SIGNATURES: dct_epoch__signatures,
+          OracleSyncCt.EPOCH_KEYS: epoch_keys,
+        }
+        chunk_meta, chunk_data = self._epoch_chunk_encode(
+          body=chunk_body, start=start_epoch, end=end_epoch, chunk_idx=chunk_idx, total=total,
+        )
+        total_bytes += len(chunk_data)
+        oracle_data = {
+          OracleSyncCt.EPOCH_CHUNK: chunk_meta,
+          OracleSyncCt.EPOCH_CHUNK_DATA: chunk_data,
+          OracleSyncCt.STAGE: self.__get_current_state(),
+        }
+        self.add_payload_by_fields(
+          oracle_data=oracle_data,
+        )
+      # endfor chunks
+
+      if self.cfg_debug_sync:
+        self.P(f'Broadcasting availability_tables from {start_epoch} to {end_epoch} in '
+               f'{len(lst_chunk_idxs)}/{total} chunks ({total_bytes} bytes).')
+      # endif debug_sync
+      return
+
     def __maybe_process_request_agreed_median_table(self, dct_message: dict):
       """
       Process the request in case it is a request for the agreed median table.
@@ -498,8 +664,21 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         return processed
 
       if request_agreed_median_table:
-        self.P(f"Received request from oracle {sender}: {stage = }, {start_epoch = }, {end_epoch = }")
-        self.__send_epoch__agreed_median_table(start_epoch, end_epoch)
+        version = self.__get_message_version(oracle_data)
+        requested_chunks = oracle_data.get(OracleSyncCt.REQUESTED_CHUNKS)
+        requested_chunks = requested_chunks.get(self.node_addr) if isinstance(requested_chunks, dict) else None
+        if not isinstance(requested_chunks, list):
+          # Nothing received from us yet, so the full response is needed.
+          requested_chunks = None
+        elif len(requested_chunks) == 0:
+          # The requester already has our full response.
+          return processed
+        # endif requested chunks
+        self.P(f"Received request from oracle {sender}: {stage = }, {start_epoch = }, {end_epoch = }, "
+               f"{version = }, {requested_chunks = }")
+        self.__send_epoch__agreed_median_table(
+          start_epoch, end_epoch, version=version, requested_chunks=requested_chunks,
+        )
         processed = True
       # endif request_agreed_median_table
       return processed
@@ -621,6 +800,7 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         # endif debug_sync
         self.P(log_str)
         self.dct_local_tables[sender] = local_table
+        self.dct_oracle_versions[sender] = oracle_data.get(OracleSyncCt.VERSION, ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES)
       # end for
 
       # Send value to oracles
@@ -633,8 +813,10 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       self.P(f"Sending {self.local_table=}")
 
       oracle_data = {
-        OracleSyncCt.LOCAL_TABLE: self.local_table,
-        OracleSyncCt.STAGE: self.__get_current_state()
+        **self.__get_table_fields(OracleSyncCt.LOCAL_TABLE, self.local_table),
+        OracleSyncCt.STAGE: self.__get_current_state(),
+        # Advertise the supported message version, in order to negotiate the table formats.
+        OracleSyncCt.VERSION: ORACLE_SYNC_MESSAGE_VERSION,
       }
       self.bc.sign(oracle_data, add_data=True, use_digest=True)
 
@@ -685,38 +867,95 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
 
       # compute median for each node in list
       self.median_table = {}
-
-      all_nodes_in_local_tables = set().union(*(set(value_table.keys()) for value_table in valid_local_tables))
-      for node in all_nodes_in_local_tables:
-        # default value 0 because if node not in value_table, it means it was not seen
-        all_node_local_table_values = (value_table.get(node, 0) for value_table in valid_local_tables)
-        # Filter out the None values in case of faulty oracle tables.
-        valid_node_local_table_values = list(x for x in all_node_local_table_values if x is not None)
-
-        # compute median and sign -- signature will be used in the next step
-        median_value = round(self.np.median(valid_node_local_table_values))
-        local_value = self.local_table.get(node, 0)
-        median_error = abs(local_value - median_value)
-        if median_error > ORACLE_SYNC_ACCEPTED_MEDIAN_ERROR_MARGIN:
-          # TODO: record this error and maybe add it to signed package for BC storage.
-          str_msg = f"{node} median error: {local_value=} | {median_value=} | {median_error} > {ORACLE_SYNC_ACCEPTED_MEDIAN_ERROR_MARGIN}"
-          self.P(str_msg, color='r', boxed=True)
-        # endif median_error
+      self.median_table_version = self.__get_median_table_version()
+      use_table_signature = self.median_table_version >= ORACLE_SYNC_VERSION_TABLE_SIGNATURE
+
+      # Compute all the medians at once on the oracles x nodes matrix.
+      # A node missing from a local table counts as 0 (not seen) and None values are ignored.
+      nodes, median_values = compute_median_values(valid_local_tables)
+      local_values = self.np.array([self.local_table.get(node, 0) for node in nodes], dtype=self.np.int64)
+      median_errors = self.np.abs(local_values - median_values)
+      for idx in self.np.flatnonzero(median_errors > ORACLE_SYNC_ACCEPTED_MEDIAN_ERROR_MARGIN):
+        # TODO: record this error and maybe add it to signed package for BC storage.
+        node, local_value, median_value = nodes[idx], int(local_values[idx]), int(median_values[idx])
+        str_msg = f"{node} median error: {local_value=} | {median_value=} | {median_errors[idx]} > {ORACLE_SYNC_ACCEPTED_MEDIAN_ERROR_MARGIN}"
+        self.P(str_msg, color='r', boxed=True)
+      # endfor median errors
+
+      # sign the medians -- signature will be used in the next step
+      for node, median_value in zip(nodes, median_values.tolist()):
         self.median_table[node] = {
           'VALUE': median_value,
-          # self.__current_epoch - 1, since the consensus is for the previous epoch
-          OracleSyncCt.EPOCH: self.__current_epoch - 1,
-          OracleSyncCt.NODE: node
         }
+        if use_table_signature:
+          # The whole table will be signed once, after all the medians are computed.
+          continue
+        # self.__current_epoch - 1, since the consensus is for the previous epoch
+        self.median_table[node][OracleSyncCt.EPOCH] = self.__current_epoch - 1
+        self.median_table[node][OracleSyncCt.NODE] = node
         self.bc.sign(self.median_table[node], add_data=True, use_digest=True)
         # No reason to leave these keys in the dictionary, since they can be added again when verifying.
         self.median_table[node].pop(OracleSyncCt.EPOCH)
         self.median_table[node].pop(OracleSyncCt.NODE)
       # end for all_nodes
 
-      self.P(f"Computed median table {self.__compute_simple_median_table(self.median_table)}")
+      if use_table_signature:
+        self.median_table_signature = self.__sign_median_table(self.median_table)
+      # endif use_table_signature
+
+      self.P(f"Computed median table (v{self.median_table_version}) "
+             f"{self.__compute_simple_median_table(self.median_table)}")
       return
 
+    def __get_median_table_version(self):
+      """
+      Negotiate the median table format for the current epoch.
+      The table-level signature is used only if it is enabled and every oracle expected to participate
+      advertised support for it during the local table exchange.
+
+      Returns
+      -------
+      int : The median table message version
+      """
+      if not self.cfg_table_level_signatures:
+        return ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES
+
+      participating_oracles = [
+        oracle for oracle, expected in self.should_expect_to_participate.items()
+        if expected and oracle != self.node_addr
+      ]
+      all_support_table_signature = all(
+        self.dct_oracle_versions.get(oracle, ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES) >= ORACLE_SYNC_VERSION_TABLE_SIGNATURE
+        for oracle in participating_oracles
+      )
+      if not all_support_table_signature:
+        return ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES
+      return ORACLE_SYNC_VERSION_TABLE_SIGNATURE
+
+    def __sign_median_table(self, median_table):
+      """
+      Sign the canonical digest of the whole median table.
+
+      Parameters
+      ----------
+      median_table : dict
+          The median table, in the internal format {node: {"VALUE": value}}
+
+      Returns
+      -------
+      dict : The signature fields (EE_SIGN, EE_SENDER, EE_HASH, ...)
+      """
+      signature_dict = {
+        OracleSyncCt.MEDIAN_TABLE_DIGEST: self._compute_table_digest(self.__compute_simple_median_table(median_table)),
+        # self.__current_epoch - 1, since the consensus is for the previous epoch
+        OracleSyncCt.EPOCH: self.__current_epoch - 1,
+      }
+      self.bc.sign(signature_dict, add_data=True, use_digest=True)
+      # The digest and epoch are recomputed by the receivers when verifying.
+      signature_dict.pop(OracleSyncCt.MEDIAN_TABLE_DIGEST)
+      signature_dict.pop(OracleSyncCt.EPOCH)
+      return signature_dict
+
     # S4_SEND_MEDIAN_TABLE
     def __receive_median_table_and_maybe_send_median_table(self):
       """
@@ -753,6 +992,10 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
 
         stage = oracle_data[OracleSyncCt.STAGE]
         median_table = oracle_data[OracleSyncCt.MEDIAN_TABLE]
+        if self.__get_message_version(oracle_data) >= ORACLE_SYNC_VERSION_TABLE_SIGNATURE:
+          # Table signed median tables carry only the values, so convert them to the internal format.
+          median_table = {node: {'VALUE': value} for node, value in median_table.items()}
+        # endif table signature
 
         simple_median = self.__compute_simple_median_table(median_table)
         if self.cfg_debug_sync:
@@ -772,10 +1015,22 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       if self.cfg_debug_sync:
         self.P(f"Sending median {self.__compute_simple_median_table(self.median_table)}")
       # endif debug_sync
-      oracle_data = {
-        OracleSyncCt.STAGE: self.__get_current_state(),
-        OracleSyncCt.MEDIAN_TABLE: self.median_table,
-      }
+      if self.median_table is not None and self.median_table_version >= ORACLE_SYNC_VERSION_TABLE_SIGNATURE:
+        oracle_data = {
+          OracleSyncCt.STAGE: self.__get_current_state(),
+          **self.__get_table_fields(OracleSyncCt.MEDIAN_TABLE, self.__compute_simple_median_table(self.median_table)),
+          OracleSyncCt.MEDIAN_TABLE_SIGNATURE: self.median_table_signature,
+          OracleSyncCt.VERSION: self.median_table_version,
+        }
+      else:
+        oracle_data = {
+          OracleSyncCt.STAGE: self.__get_current_state(),
+          OracleSyncCt.MEDIAN_TABLE: self.median_table,
+          OracleSyncCt.VERSION: ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES,
+        }
+        if len(self.full_table_requests) > 0:
+          oracle_data[OracleSyncCt.FULL_TABLE_REQUESTS] = sorted(self.full_table_requests)
+      # endif table signature
       self.bc.sign(oracle_data, add_data=True, use_digest=True)
 
       self.add_payload_by_fields(oracle_data=oracle_data)
@@ -828,59 +1083,49 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       # expecting all median tables to contain all nodes
       # but some errors can occur, so this does no harm
       self.dct_median_tables[self.node_addr] = self.median_table
-      all_nodes = set().union(*(set(value_table.keys()) for value_table in self.dct_median_tables.values()))
-
-      # keep in a dictionary a list with all median signed values for each node
-      dct_node_median_signed_values = {}
-      for node in all_nodes:
-        dct_node_median_signed_values[node] = [
-          median_table[node]
-          for median_table in self.dct_median_tables.values()
-          if node in median_table
-        ]
-      # end for node
-
-      # compute the frequency of each median value for each node
-      for node in all_nodes:
+      lst_median_tables = [median_table for median_table in self.dct_median_tables.values() if median_table is not None]
+
+      # compute the most frequent median value for each node at once on the oracles x nodes matrix
+      nodes, most_frequent_medians, median_frequencies, agreement_mask = compute_most_frequent_values([
+        self.__compute_simple_median_table(median_table)
+        for median_table in lst_median_tables
+      ])
+
+      min_frequency = self.__count_half_of_valid_oracles()
+      failed_nodes = self.np.flatnonzero(median_frequencies <= min_frequency)
+      if len(failed_nodes) > 0:
+        idx = failed_nodes[0]
+        node, median_frequency = nodes[idx], int(median_frequencies[idx])
         dct_median_frequency = {}
-        for median in (dct_median['VALUE'] for dct_median in dct_node_median_signed_values[node]):
-          if median not in dct_median_frequency:
-            dct_median_frequency[median] = 0
-          dct_median_frequency[median] += 1
-        # end for median
-
-        max_count = max(dct_median_frequency.values())
-        most_frequent_median = next(k for k, v in dct_median_frequency.items() if v == max_count)
+        for median_table in lst_median_tables:
+          if node in median_table:
+            median = median_table[node]['VALUE']
+            dct_median_frequency[median] = dct_median_frequency.get(median, 0) + 1
+        # endfor median tables
+        self.P(f"Failed to compute agreed median table for node {node}. "
+               f"Could not achieve consensus. Highest median frequency is {median_frequency}, while the minimum frequency is"
+               f"{min_frequency}. Dct freq:\n{self.json_dumps(dct_median_frequency, indent=2)}\n"
+               f"{self.json_dumps(self.dct_median_tables, indent=2)}", color='r')
+        # this is a situation without recovery -- it can happen if the network is attacked
+        # either the node is malicious or some oracles are malicious
+        raise Exception("Failed to compute agreed median table")
+      # endif median_frequency not above min_frequency
 
+      for idx, (node, most_frequent_median) in enumerate(zip(nodes, most_frequent_medians.tolist())):
         # get all median table values that have the most frequent median
         # we do this because in the median table we find both the value and the signature
         lst_dct_freq_median = [
-          dct_median
-          for dct_median in dct_node_median_signed_values[node]
-          if dct_median['VALUE'] == most_frequent_median
+          lst_median_tables[oracle_idx][node]
+          for oracle_idx in self.np.flatnonzero(agreement_mask[:, idx])
         ]
-
-        median_frequency = len(lst_dct_freq_median)
-        min_frequency = self.__count_half_of_valid_oracles()
-        if median_frequency > min_frequency:
-          if self.cfg_debug_sync:
-            self.P(f"Computed agreed median table for node {node}: {most_frequent_median}. "
-                   f"Dct freq {dct_median_frequency}")
-          # endif debug_sync
-          self.agreed_median_table[node] = {
-            'VALUE': most_frequent_median,
-            'SIGNATURES': lst_dct_freq_median,
-          }
-        else:
-          all_valid_oracles = []
-          self.P(f"Failed to compute agreed median table for node {node}. "
-                 f"Could not achieve consensus. Highest median frequency is {median_frequency}, while the minimum frequency is"
-                 f"{min_frequency}. Dct freq:\n{self.json_dumps(dct_median_frequency, indent=2)}\n"
-                 f"{self.json_dumps(self.dct_median_tables, indent=2)}", color='r')
-          # this is a situation without recovery -- it can happen if the network is attacked
-          # either the node is malicious or some oracles are malicious
-          raise Exception("Failed to compute agreed median table")
-        # endif median_frequency above min_frequency
+        if self.cfg_debug_sync:
+          self.P(f"Computed agreed median table for node {node}: {most_frequent_median}. "
+                 f"Frequency {len(lst_dct_freq_median)}")
+        # endif debug_sync
+        self.agreed_median_table[node] = {
+          'VALUE': most_frequent_median,
+          'SIGNATURES': lst_dct_freq_median,
+        }
       # end for
 
       if len(self.agreed_median_table) == 0:
@@ -1107,91 +1352,23 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         sender = dct_message.get(self.ct.PAYLOAD_DATA.EE_SENDER)
         oracle_data = dct_message.get('ORACLE_DATA')
 
-        if not self.__check_received_epoch__agreed_median_table_ok(sender, oracle_data):
-          continue
-
-        # Here, both the agreed median table and the agreement signatures should have the same keys,
-        # but as string instead of int. We also know that in epoch_keys we have
-        # the keys in int format. Thus, we need to convert the keys of the received tables
-        dct_epoch_agreed_median_table = oracle_data[OracleSyncCt.EPOCH__AGREED_MEDIAN_TABLE]
-        dct_epoch_agreement_signatures = oracle_data[OracleSyncCt.EPOCH__AGREEMENT_SIGNATURES]
-        epoch_keys = oracle_data[OracleSyncCt.EPOCH_KEYS]
-
-        # sort epoch_keys in ascending order
-        received_epochs = sorted(epoch_keys)
-        # convert to dict with int keys
-        dct_epoch_agreed_median_table = {
-          epoch: dct_epoch_agreed_median_table[str(epoch)]
-          for epoch in received_epochs
-        }
-        dct_epoch_agreement_signatures = {
-          epoch: dct_epoch_agreement_signatures[str(epoch)]
-          for epoch in received_epochs
-        }
-        if self.cfg_debug_sync_full:
-          msg = f"DEBUG Decoded following dct_epoch_agreed_median_table:\n"
-          msg += f"{dct_epoch_agreed_median_table}\n"
-          msg += f"With the following signatures: {dct_epoch_agreement_signatures}\n"
-          self.P(msg)
-        # endif debug_sync_full
-
-        message_invalid = False
-        for epoch, agreed_median_table in dct_epoch_agreed_median_table.items():
-          # At this point we did not need to convert the keys of the dictionaries yet,
-          # because in valid messages both the agreement table and the agreement signatures
-          # should have the same keys and in the checked sub-dictionaries there weren't any
-          # non-string keys to begin with.
-          # However, we converted it before in order for the epoch key to be in int format,
-          # since at the verification of the signatures we also need the epoch as int.
-          epoch_signatures = dct_epoch_agreement_signatures.get(epoch)
-          if self.cfg_debug_sync_full:
-            msg = f'##########################\n'
-            msg += f'DEBUG Received availability table for epoch {epoch} from {sender = } with values:\n'
-            msg += f'{agreed_median_table}\n AND signatures:\n{epoch_signatures}\n###################'
-            self.P(msg)
-          # endif debug_sync_full
-
-          if not self.__check_agreed_median_table(
-              sender=sender, agreed_median_table=agreed_median_table,
-              epoch_signatures=epoch_signatures, epoch=epoch
-          ):
-            # if one signature for the received table is invalid, ignore the entire message
-            message_invalid = True
-            break
-        # end for epoch agreed table
-
-        if message_invalid:
-          if self.cfg_debug_sync:
-            self.P(f"Received invalid availability table from {sender = }. Ignoring", color='r')
-          continue
-        # endif
-
-        if self.__last_epoch_synced + 1 not in received_epochs or self.__current_epoch - 1 not in received_epochs:
-          # Expected epochs in range [last_epoch_synced + 1, current_epoch - 1]
-          # received epochs don t contain the full range
-          if self.cfg_debug_sync:
-            min_epoch = min(received_epochs) if len(received_epochs) > 0 else None
-            max_epoch = max(received_epochs) if len(received_epochs) > 0 else None
-            msg = (f'Expected epochs in range [{self.__last_epoch_synced + 1}, {self.__current_epoch - 1}] '
-                   f'and received only {len(received_epochs)} epochs (min: {min_epoch}, max: {max_epoch}). '
-                   f'Ignoring...')
-            self.P(msg, color='r')
-          continue
-        # endif received epochs not containing the full requested interval
-
-        self.P(f"Received availability table for epochs {received_epochs} from {sender = }. Keeping only the "
-               f"tables for epochs in range [{self.__last_epoch_synced + 1}, {self.__current_epoch - 1}]")
-        epochs_range = range(self.__last_epoch_synced + 1, self.__current_epoch)
-        self.dct_agreed_availability_table[sender] = {
-          # No need for get here, since in S0 we send a continuous range of epochs.
-          i: dct_epoch_agreed_median_table[i]
-          for i in epochs_range
-        }
-        self.dct_agreed_availability_signatures[sender] = {
-          # No need for get here, since in S0 we send a continuous range of epochs.
-          i: dct_epoch_agreement_signatures[i]
-          for i in epochs_range
-        }
+        chunk_meta = None
+        if isinstance(oracle_data, dict) and OracleSyncCt.EPOCH_CHUNK in oracle_data:
+          chunk_meta = oracle_data[OracleSyncCt.EPOCH_CHUNK]
+          oracle_data = self.__maybe_assemble_epoch__agreed_median_table_chunk(sender, oracle_data)
+          if oracle_data is None:
+            # The chunk was invalid or the response is not complete yet.
+            continue
+        # endif chunked response
+
+        accepted = self.__process_received_epoch__agreed_median_table(sender, oracle_data)
+        if chunk_meta is not None and accepted:
+          # Only a verified response stops the re-requests of its chunks. A rejected one is
+          # requested again in full from the sender.
+          self._epoch_chunks_mark_done(
+            sender=sender, start=chunk_meta[OracleSyncChunkCt.START], end=chunk_meta[OracleSyncChunkCt.END],
+          )
+        # endif verified chunked response
       # end for received messages
 
       # Send request to get agreed value from oracles
@@ -1211,6 +1388,11 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         OracleSyncCt.REQUEST_AGREED_MEDIAN_TABLE: True,
         'START_EPOCH': self.__last_epoch_synced + 1,
         'END_EPOCH': self.__current_epoch - 1,
+        OracleSyncCt.VERSION: ORACLE_SYNC_MESSAGE_VERSION,
+        # Oracles that already sent part of their response will only resend the missing chunks.
+        OracleSyncCt.REQUESTED_CHUNKS: self._epoch_chunks_requested(
+          start=self.__last_epoch_synced + 1, end=self.__current_epoch - 1,
+        ),
       }
 
       self.P("Sending broadcast request for agreed median table for epochs "
@@ -1219,6 +1401,172 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       self.last_time_request_agreed_median_table_sent = self.time()
       return
 
+    def __maybe_assemble_epoch__agreed_median_table_chunk(self, sender, oracle_data):
+      """
+      Validate a received chunk of historical agreed median tables and add it to its response.
+
+      Parameters
+      ----------
+      sender : str
+          The sender of the message
+      oracle_data : dict
+          The data received from the oracle
+
+      Returns
+      -------
+      dict : The full response, in the same format as the non-chunked one, if this was its
+        last missing chunk, None otherwise
+      """
+      if not self.__check_received_oracle_data_for_values(
+        sender=sender,
+        oracle_data=oracle_data,
+        expected_variable_names=[OracleSyncCt.EPOCH_CHUNK, OracleSyncCt.EPOCH_CHUNK_DATA],
+        expected_stage=self.STATES.S0_WAIT_FOR_EPOCH_CHANGE,
+        # The agreement signatures of every epoch are verified after the assembly.
+        verify=False,
+      ):
+        return None
+
+      chunk_meta = oracle_data[OracleSyncCt.EPOCH_CHUNK]
+      start_epoch, end_epoch = chunk_meta.get(OracleSyncChunkCt.START), chunk_meta.get(OracleSyncChunkCt.END)
+      if (start_epoch, end_epoch) != (self.__last_epoch_synced + 1, self.__current_epoch - 1):
+        if self.cfg_debug_sync:
+          self.P(f"Received chunk for epochs [{start_epoch}, {end_epoch}] from {sender = }, while expecting "
+                 f"[{self.__last_epoch_synced + 1}, {self.__current_epoch - 1}]. Ignoring...", color='r')
+        return None
+      # endif not the requested range
+
+      chunk_body = self._epoch_chunk_decode(chunk_meta, oracle_data[OracleSyncCt.EPOCH_CHUNK_DATA])
+      if chunk_body is None:
+        self.P(f"Received invalid chunk {chunk_meta} from {sender = }. Ignoring...", color='r')
+        return None
+
+      lst_chunk_bodies = self._epoch_chunks_add(sender=sender, meta=chunk_meta, body=chunk_body)
+      if self.cfg_debug_sync:
+        self.P(f"Received chunk {chunk_meta.get(OracleSyncChunkCt.CHUNK_IDX)}/{chunk_meta.get(OracleSyncChunkCt.TOTAL)} "
+               f"for epochs [{start_epoch}, {end_epoch}] from {sender = }")
+      # endif debug_sync
+      if lst_chunk_bodies is None:
+        return None
+
+      dct_epoch_agreed_median_table = {}
+      dct_epoch_agreement_signatures = {}
+      epoch_keys = []
+      for chunk_body in lst_chunk_bodies:
+        dct_epoch_agreed_median_table.update(chunk_body.get(OracleSyncCt.EPOCH__AGREED_MEDIAN_TABLE) or {})
+        dct_epoch_agreement_signatures.update(chunk_body.get(OracleSyncCt.EPOCH__AGREEMENT_SIGNATURES) or {})
+        epoch_keys.extend(chunk_body.get(OracleSyncCt.EPOCH_KEYS) or [])
+      # endfor chunks
+      return {
+        OracleSyncCt.EPOCH__AGREED_MEDIAN_TABLE: dct_epoch_agreed_median_table,
+        OracleSyncCt.EPOCH__AGREEMENT_SIGNATURES: dct_epoch_agreement_signatures,
+        OracleSyncCt.EPOCH_KEYS: epoch_keys,
+        OracleSyncCt.STAGE: oracle_data[OracleSyncCt.STAGE],
+      }
+
+    def __process_received_epoch__agreed_median_table(self, sender, oracle_data):
+      """
+      Check the agreed median tables received for multiple epochs and keep them for
+      the S9_COMPUTE_REQUESTED_AGREED_MEDIAN_TABLE stage if they are valid.
+
+      Parameters
+      ----------
+      sender : str
+          The sender of the message
+      oracle_data : dict
+          The data received from the oracle
+
+      Returns
+      -------
+      bool : True if the tables were kept, False otherwise
+      """
+      if not self.__check_received_epoch__agreed_median_table_ok(sender, oracle_data):
+        return False
+
+      # Here, both the agreed median table and the agreement signatures should have the same keys,
+      # but as string instead of int. We also know that in epoch_keys we have
+      # the keys in int format. Thus, we need to convert the keys of the received tables
+      dct_epoch_agreed_median_table = oracle_data[OracleSyncCt.EPOCH__AGREED_MEDIAN_TABLE]
+      dct_epoch_agreement_signatures = oracle_data[OracleSyncCt.EPOCH__AGREEMENT_SIGNATURES]
+      epoch_keys = oracle_data[OracleSyncCt.EPOCH_KEYS]
+
+      # sort epoch_keys in ascending order
+      received_epochs = sorted(epoch_keys)
+      # convert to dict with int keys
+      dct_epoch_agreed_median_table = {
+        epoch: dct_epoch_agreed_median_table[str(epoch)]
+        for epoch in received_epochs
+      }
+      dct_epoch_agreement_signatures = {
+        epoch: dct_epoch_agreement_signatures[str(epoch)]
+        for epoch in received_epochs
+      }
+      if self.cfg_debug_sync_full:
+        msg = f"DEBUG Decoded following dct_epoch_agreed_median_table:\n"
+        msg += f"{dct_epoch_agreed_median_table}\n"
+        msg += f"With the following signatures: {dct_epoch_agreement_signatures}\n"
+        self.P(msg)
+      # endif debug_sync_full
+
+      message_invalid = False
+      for epoch, agreed_median_table in dct_epoch_agreed_median_table.items():
+        # At this point we did not need to convert the keys of the dictionaries yet,
+        # because in valid messages both the agreement table and the agreement signatures
+        # should have the same keys and in the checked sub-dictionaries there weren't any
+        # non-string keys to begin with.
+        # However, we converted it before in order for the epoch key to be in int format,
+        # since at the verification of the signatures we also need the epoch as int.
+        epoch_signatures = dct_epoch_agreement_signatures.get(epoch)
+        if self.cfg_debug_sync_full:
+          msg = f'##########################\n'
+          msg += f'DEBUG Received availability table for epoch {epoch} from {sender = } with values:\n'
+          msg += f'{agreed_median_table}\n AND signatures:\n{epoch_signatures}\n###################'
+          self.P(msg)
+        # endif debug_sync_full
+
+        if not self.__check_agreed_median_table(
+            sender=sender, agreed_median_table=agreed_median_table,
+            epoch_signatures=epoch_signatures, epoch=epoch
+        ):
+          # if one signature for the received table is invalid, ignore the entire message
+          message_invalid = True
+          break
+      # end for epoch agreed table
+
+      if message_invalid:
+        if self.cfg_debug_sync:
+          self.P(f"Received invalid availability table from {sender = }. Ignoring", color='r')
+        return False
+      # endif
+
+      if self.__last_epoch_synced + 1 not in received_epochs or self.__current_epoch - 1 not in received_epochs:
+        # Expected epochs in range [last_epoch_synced + 1, current_epoch - 1]
+        # received epochs don t contain the full range
+        if self.cfg_debug_sync:
+          min_epoch = min(received_epochs) if len(received_epochs) > 0 else None
+          max_epoch = max(received_epochs) if len(received_epochs) > 0 else None
+          msg = (f'Expected epochs in range [{self.__last_epoch_synced + 1}, {self.__current_epoch - 1}] '
+                 f'and received only {len(received_epochs)} epochs (min: {min_epoch}, max: {max_epoch}). '
+                 f'Ignoring...')
+          self.P(msg, color='r')
+        return False
+      # endif received epochs not containing the full requested interval
+
+      self.P(f"Received availability table for epochs {received_epochs} from {sender = }. Keeping only the "
+             f"tables for epochs in range [{self.__last_epoch_synced + 1}, {self.__current_epoch - 1}]")
+      epochs_range = range(self.__last_epoch_synced + 1, self.__current_epoch)
+      self.dct_agreed_availability_table[sender] = {
+        # No need for get here, since in S0 we send a continuous range of epochs.
+        i: dct_epoch_agreed_median_table[i]
+        for i in epochs_range
+      }
+      self.dct_agreed_availability_signatures[sender] = {
+        # No need for get here, since in S0 we send a continuous range of epochs.
+        i: dct_epoch_agreement_signatures[i]
+        for i in epochs_range
+      }
+      return True
+
     def __send_request_agreed_median_table_timeout(self):
       """
       Check if the exchange phase of the agreed median table has finished.
@@ -1407,6 +1755,7 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       if self.__last_oracle_list_refresh is None or self.time() - self.__last_oracle_list_refresh < self.cfg_oracle_list_refresh_interval:
         self.P(f'Refreshing oracle list.')
         self.__oracle_list, _ = self.bc.get_oracles()
+        self.__oracle_set = set(self.__oracle_list)
         if len(self.__oracle_list) == 0:
           self.P(f'NO ORACLES FOUND. BLOCKCHAIN ERROR', boxed=True, color='r')
         self.__last_oracle_list_refresh = self.time()
@@ -1432,7 +1781,9 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       -------
       bool : True if the node is an oracle, False otherwise
       """
-      return node in self.get_oracle_list()
+      if DEBUG_MODE:
+        return node in self.get_oracle_list()
+      return node in self.__oracle_set
 
     def oracle_sync_get_node_local_availability(self, node: str):
       """
@@ -1494,6 +1845,228 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       """
       return self.state_machine_api_get_current_state(self.state_machine_name)
 
+    def __get_send_deadline(self, first_time_sent: float, last_time_sent: float, period: float):
+      """
+      Get the moment when a send state has to be stepped again: either to send
+      the next message or to check the timeout of the state.
+
+      Parameters
+      ----------
+      first_time_sent : float
+          The first time the message was sent in the current state, or None
+      last_time_sent : float
+          The last time the message was sent in the current state, or None
+      period : float
+          The duration of the state
+
+      Returns
+      -------
+      float : The deadline
+      """
+      if first_time_sent is None or last_time_sent is None:
+        return self.time()
+      return min(
+        last_time_sent + self.cfg_send_interval,
+        first_time_sent + period + STATE_MACHINE_STEP_MARGIN,
+      )
+
+    def __schedule_next_step(self):
+      """
+      Schedule the next step of the state machine, according to the current state.
+      The send states wake up for the next send or for their timeout, the waiting state
+      checks the epoch periodically and the compute states are stepped right away.
+      Received messages step the state machine regardless of the deadline.
+      """
+      current_state = self.__get_current_state()
+      if current_state == self.STATES.S0_WAIT_FOR_EPOCH_CHANGE:
+        deadline = self.time() + self.cfg_epoch_check_interval
+      elif current_state == self.STATES.S2_SEND_LOCAL_TABLE:
+        deadline = self.__get_send_deadline(
+          self.first_time_local_table_sent, self.last_time_local_table_sent, self.cfg_send_period
+        )
+      elif current_state == self.STATES.S4_SEND_MEDIAN_TABLE:
+        deadline = self.__get_send_deadline(
+          self.first_time_median_table_sent, self.last_time_median_table_sent, self.cfg_send_period
+        )
+      elif current_state == self.STATES.S6_SEND_AGREED_MEDIAN_TABLE:
+        deadline = self.__get_send_deadline(
+          self.first_time__agreement_signature_sent, self.last_time__agreement_signature_sent,
+          self.cfg_send_period
+        )
+      elif current_state == self.STATES.S10_EXCHANGE_AGREEMENT_SIGNATURES:
+        deadline = self.__get_send_deadline(
+          self.first_time__agreement_signatures_exchanged, self.last_time__agreement_signatures_exchanged,
+          self.cfg_send_period * SIGNATURES_EXCHANGE_MULTIPLIER
+        )
+      elif current_state == self.STATES.S8_SEND_REQUEST_AGREED_MEDIAN_TABLE:
+        deadline = self.__get_send_deadline(
+          self.first_time_request_agreed_median_table_sent, self.last_time_request_agreed_median_table_sent,
+          self.cfg_send_period * 10
+        )
+      else:
+        deadline = self.time()
+      # endif current_state
+      self._timers_schedule(STATE_MACHINE_STEP_TIMER, deadline)
+      return
+
+    def __step_state_machine(self):
+      """
+      Step the state machine and count the step as productive if it changed the state,
+      consumed received messages or sent a payload.
+      """
+      state_before = self.__get_current_state()
+      n_payloads_sent, n_messages_consumed = self.__n_payloads_sent, self.__n_messages_consumed
+      self.state_machine_api_step(self.state_machine_name)
+      productive = (
+        self.__get_current_state() != state_before or
+        self.__n_payloads_sent != n_payloads_sent or
+        self.__n_messages_consumed != n_messages_consumed
+      )
+      self._timers_record_step(productive)
+      self.__schedule_next_step()
+      return
+
+    def __get_delta_base_table(self, epoch: int):
+      """
+      Get the agreed availability table of an epoch, used as base for the delta tables.
+
+      Parameters
+      ----------
+      epoch : int
+          The epoch of the base table
+
+      Returns
+      -------
+      dict : The agreed availability table, or None if not available
+      """
+      if epoch is None or epoch < 0 or epoch > self.__last_epoch_synced:
+        return None
+      base_epoch, base_table = self.__delta_base
+      if base_epoch != epoch:
+        base_table, _ = self.netmon.epoch_manager.get_epoch_availability(epoch=epoch, return_signatures=True)
+        self.__delta_base = (epoch, base_table)
+      # endif not cached
+      return base_table
+
+    def __can_send_table_delta(self):
+      """
+      Check if the tables can be sent as deltas in the current epoch: the feature is enabled,
+      no oracle asked for full tables, and every oracle expected to participate supports it.
+
+      Returns
+      -------
+      bool : True if the tables can be sent as deltas, False otherwise
+      """
+      if not self.cfg_delta_tables or self.send_full_tables:
+        return False
+      return all(
+        self.dct_oracle_versions.get(oracle, ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES) >= ORACLE_SYNC_VERSION_TABLE_DELTA
+        for oracle, expected in self.should_expect_to_participate.items()
+        if expected and oracle != self.node_addr
+      )
+
+    def __get_table_fields(self, table_key: str, table: dict):
+      """
+      Get the message fields for sending a {node: value} table, either in full or as a delta
+      relative to the last agreed table.
+
+      Parameters
+      ----------
+      table_key : str
+          The message key of the table
+      table : dict
+          The full table
+
+      Returns
+      -------
+      dict : The message fields
+      """
+      dct_fields = {table_key: table}
+      if len(self.full_table_requests) > 0:
+        dct_fields[OracleSyncCt.FULL_TABLE_REQUESTS] = sorted(self.full_table_requests)
+      if not table or not self.__can_send_table_delta():
+        return dct_fields
+
+      base_table = self.__get_delta_base_table(self.__last_epoch_synced)
+      if base_table is None:
+        return dct_fields
+
+      changed, removed, digest = self._table_delta_compute(base_table=base_table, table=table)
+      dct_fields[table_key] = changed
+      dct_fields[OracleSyncCt.DELTA_BASE_EPOCH] = self.__last_epoch_synced
+      dct_fields[OracleSyncCt.DELTA_REMOVED] = removed
+      dct_fields[OracleSyncCt.TABLE_DIGEST] = digest
+      return dct_fields
+
+    def __maybe_expand_table_delta(self, sender: str, oracle_data: dict, table_key: str):
+      """
+      Handle the delta related fields of an already verified message.
+      If the table was sent as a delta, it is replaced in place with the rebuilt full table.
+      If it cannot be rebuilt, full tables are requested from the sender.
+
+      Parameters
+      ----------
+      sender : str
+          The sender of the message
+      oracle_data : dict
+          The data received from the oracle
+      table_key : str
+          The message key of the table
+
+      Returns
+      -------
+      bool : True if `oracle_data[table_key]` holds the full table, False otherwise
+      """
+      full_table_requests = oracle_data.get(OracleSyncCt.FULL_TABLE_REQUESTS)
+      if isinstance(full_table_requests, list) and self.node_addr in full_table_requests:
+        if not self.send_full_tables:
+          self.P(f"Oracle {sender} could not rebuild our delta tables. Sending full tables from now on.", color='r')
+        self.send_full_tables = True
+      # endif full tables requested
+
+      base_epoch = oracle_data.get(OracleSyncCt.DELTA_BASE_EPOCH)
+      if base_epoch is None:
+        return True
+
+      base_table = self.__get_delta_base_table(base_epoch) if isinstance(base_epoch, int) else None
+      changed = oracle_data.get(table_key)
+      removed = oracle_data.get(OracleSyncCt.DELTA_REMOVED)
+      table = None
+      if base_table is not None and isinstance(changed, dict) and isinstance(removed, list):
+        table = self._table_delta_apply(
+          base_table=base_table, changed=changed, removed=removed,
+          digest=oracle_data.get(OracleSyncCt.TABLE_DIGEST),
+        )
+      # endif delta can be applied
+
+      if table is None:
+        self.P(f"Could not rebuild delta {table_key} from oracle {sender} (base epoch {base_epoch}). "
+               f"Requesting full tables.", color='r')
+        self.full_table_requests.add(sender)
+        return False
+      # endif delta failed
+
+      oracle_data[table_key] = table
+      return True
+
+    def __get_message_version(self, oracle_data: dict):
+      """
+      Get the version of a received message. Messages without a version field are version 1.
+
+      Parameters
+      ----------
+      oracle_data : dict
+          The data received from the oracle
+
+      Returns
+      -------
+      int : The message version
+      """
+      version = oracle_data.get(OracleSyncCt.VERSION, ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES)
+      if not isinstance(version, int):
+        return ORACLE_SYNC_VERSION_PER_NODE_SIGNATURES
+      return version
+
     def __count_half_of_valid_oracles(self):
       """
       Count the number of oracles that are expected to participate in the sync process.
@@ -1517,9 +2090,50 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       sender = payload.get(self.ct.PAYLOAD_DATA.EE_SENDER)
       if not self.__is_oracle(sender):
         return
-      self.__received_messages_from_oracles.append(payload)
+      self._inbox_add(sender, self.__get_message_key(payload.get('ORACLE_DATA')), payload)
+      self._timers_signal_input()
       return
 
+    def __get_message_key(self, oracle_data: dict):
+      """
+      Get the deduplication key of a message received from an oracle.
+      The oracles resend the same data for a stage during the whole stage, so the key is made of
+      the stage, the epoch in which the message was received and, for the historical epoch tables,
+      the requested epochs and the chunk index.
+
+      Parameters
+      ----------
+      oracle_data : dict
+          The data received from the oracle
+
+      Returns
+      -------
+      tuple : The key of the message
+      """
+      if not isinstance(oracle_data, dict):
+        return None, self.__current_epoch, None
+      part = None
+      try:
+        chunk_meta = oracle_data.get(OracleSyncCt.EPOCH_CHUNK)
+        if isinstance(chunk_meta, dict):
+          part = (
+            chunk_meta.get(OracleSyncChunkCt.START),
+            chunk_meta.get(OracleSyncChunkCt.END),
+            chunk_meta.get(OracleSyncChunkCt.CHUNK_IDX),
+          )
+        elif OracleSyncCt.EPOCH_KEYS in oracle_data:
+          epoch_keys = oracle_data[OracleSyncCt.EPOCH_KEYS]
+          part = (min(epoch_keys), max(epoch_keys)) if len(epoch_keys) > 0 else None
+        elif 'START_EPOCH' in oracle_data:
+          part = (oracle_data.get('START_EPOCH'), oracle_data.get('END_EPOCH'))
+        # endif part
+        key = (oracle_data.get(OracleSyncCt.STAGE), self.__current_epoch, part)
+        hash(key)
+      except Exception:
+        # malformed messages share a single slot, they will be rejected when processed anyway
+        key = (None, self.__current_epoch, None)
+      return key
+
     def get_received_messages_from_oracles(self):
       """
       Get the messages received from the oracles.
@@ -1530,9 +2144,9 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       generator : The messages received from the oracles
       """
       # dct_messages = self.dataapi_struct_datas()
-      # retrieve messages from self.__received_messages_from_oracles
-      dct_messages = list(self.__received_messages_from_oracles)
-      self.__received_messages_from_oracles.clear()
+      # retrieve messages from the inbox of each oracle
+      dct_messages = self._inbox_drain()
+      self.__n_messages_consumed += len(dct_messages)
       # This will return a generator that will be used in the next steps.
       received_messages = (dct_messages[i] for i in range(len(dct_messages)))
 
@@ -1633,7 +2247,7 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       # endif expected_stage specified
 
       if verify:
-        result = self.bc.verify(dct_data=oracle_data, str_signature=None, sender_address=None)
+        result = self._verify_one(oracle_data)
         if not result.valid:
           self.P(f"Invalid signature from oracle {sender}: {result.message}", color='r')
           return False
@@ -1667,6 +2281,9 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         return False
       # endif generic checks
 
+      if not self.__maybe_expand_table_delta(sender, oracle_data, OracleSyncCt.LOCAL_TABLE):
+        return False
+
       local_table = oracle_data.get(OracleSyncCt.LOCAL_TABLE, None)
 
       if not self.should_expect_to_participate.get(sender, False) and local_table is not None:
@@ -1719,10 +2336,7 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       -------
       bool : True if the received values are ok, False otherwise
       """
-      verify_results = [
-        self.bc.verify(dct_data=dct_value, str_signature=None, sender_address=None)
-        for dct_value in dct_values.values()
-      ]
+      verify_results = self._verify_batch(list(dct_values.values()))
       verified_all = all(
         result.valid
         for result in verify_results
@@ -1812,11 +2426,15 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       bool : True if the received values are ok, False otherwise
       """
       # Firstly, all signatures should be valid.
+      # All signatures are verified in one batch and regrouped afterwards by value.
+      lst_signatures = [
+        dct_signature
+        for dct_value in dct_values.values()
+        for dct_signature in dct_value['SIGNATURES']
+      ]
+      flat_results = iter(self._verify_batch(lst_signatures))
       verify_results = [
-        [
-          self.bc.verify(dct_data=dct_signature, str_signature=None, sender_address=None)
-          for dct_signature in dct_value['SIGNATURES']
-        ]
+        [next(flat_results) for _ in dct_value['SIGNATURES']]
         for dct_value in dct_values.values()
       ]
       median_signatures_ok = all(
@@ -1865,17 +2483,26 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       -------
       bool : True if the received median is ok, False otherwise
       """
+      is_table_signature = isinstance(oracle_data, dict) and \
+        self.__get_message_version(oracle_data) >= ORACLE_SYNC_VERSION_TABLE_SIGNATURE
+      expected_variable_names = [OracleSyncCt.STAGE, OracleSyncCt.MEDIAN_TABLE]
+      if is_table_signature:
+        expected_variable_names.append(OracleSyncCt.MEDIAN_TABLE_SIGNATURE)
+
       if not self.__check_received_oracle_data_for_values(
         sender=sender,
         oracle_data=oracle_data,
-        expected_variable_names=[
-          OracleSyncCt.STAGE, OracleSyncCt.MEDIAN_TABLE,
-        ],
+        expected_variable_names=expected_variable_names,
         expected_stage=self.STATES.S4_SEND_MEDIAN_TABLE,
         verify=True,
       ):
         return False
 
+      # Only table signed median tables can be sent as deltas, but full table requests
+      # can be attached to any median table message.
+      if not self.__maybe_expand_table_delta(sender, oracle_data, OracleSyncCt.MEDIAN_TABLE):
+        return False
+
       median = oracle_data[OracleSyncCt.MEDIAN_TABLE]
 
       # in the should_expect_to_participate dictionary, only oracles that were seen
@@ -1888,6 +2515,14 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         self.P(f"Oracle {sender} could not compute median. ignoring...", color='r')
         return False
 
+      if is_table_signature:
+        return self.__check_median_table_signature(
+          sender=sender,
+          simple_median_table=median,
+          signature_dict=oracle_data[OracleSyncCt.MEDIAN_TABLE_SIGNATURE],
+        )
+      # endif table signature
+
       # Rebuilding the original signed data dictionaries.
       # For additional info check method __compute_median_table
       dct_values_for_checking = {
@@ -1911,6 +2546,40 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
 
       return True
 
+    def __check_median_table_signature(self, sender: str, simple_median_table: dict, signature_dict: dict):
+      """
+      Check the table-level signature of a median table.
+      For additional info check method __sign_median_table.
+
+      Parameters
+      ----------
+      sender : str
+          The sender of the message
+      simple_median_table : dict
+          The received median table, in the format {node: value}
+      signature_dict : dict
+          The signature fields of the median table
+
+      Returns
+      -------
+      bool : True if the median table signature is valid, False otherwise
+      """
+      if signature_dict.get('EE_SENDER') != sender:
+        self.P(f"Invalid median table from oracle {sender}: signed by {signature_dict.get('EE_SENDER')}", color='r')
+        return False
+
+      data_to_verify = {
+        **signature_dict,
+        OracleSyncCt.MEDIAN_TABLE_DIGEST: self._compute_table_digest(simple_median_table),
+        # self.__current_epoch - 1, since the median table is for the previous epoch
+        OracleSyncCt.EPOCH: self.__current_epoch - 1,
+      }
+      verify_result = self._verify_one(data_to_verify)
+      if not verify_result.valid:
+        self.P(f"Invalid median table from oracle {sender}: Verification failed: {verify_result.message}", color='r')
+        return False
+      return True
+
     def __check_agreement_signature(
         self, sender: str, signature_dict: dict, epoch: int = None,
         compiled_agreed_median_table: dict = None,
@@ -1936,10 +2605,35 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       -------
       bool : True if the compiled agreed median table is valid, False otherwise
       """
-      if signature_dict is None:
-        self.P(f"Invalid agreement signature for {epoch=} from oracle {sender}: No signature provided", color='r')
-        return False
+      invalid_signer = self.__check_agreement_signatures(
+        dct_signatures={sender: signature_dict},
+        epoch=epoch,
+        compiled_agreed_median_table=compiled_agreed_median_table,
+      )
+      return invalid_signer is None
 
+    def __check_agreement_signatures(
+        self, dct_signatures: dict, epoch: int = None,
+        compiled_agreed_median_table: dict = None,
+    ):
+      """
+      Check multiple agreement signatures for the same compiled agreed median table.
+      All the signatures are verified in a single batch.
+      For the rest of the details check `__check_agreement_signature`.
+      Parameters
+      ----------
+      dct_signatures : dict
+          The signatures of the compiled agreed median table, keyed by the signer address
+      epoch : int, optional
+          The epoch for which the compiled agreed median table is received, by default None
+      compiled_agreed_median_table : dict
+          The compiled agreed median table received from an oracle for a particular epoch.
+          If None, the method will use the one from the cache, by default None
+
+      Returns
+      -------
+      str : The address of the first signer with an invalid signature, None if all signatures are valid
+      """
       if compiled_agreed_median_table is None:
         compiled_agreed_median_table = self.compiled_agreed_median_table
 
@@ -1948,10 +2642,16 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         # Thus, the epoch is the current epoch - 1.
         epoch = self.__current_epoch - 1
 
+      for signer, signature_dict in dct_signatures.items():
+        if signature_dict is None:
+          self.P(f"Invalid agreement signature for {epoch=} from oracle {signer}: No signature provided", color='r')
+          return signer
+      # endfor signatures
+
       if self.cfg_debug_sync:
-        self.P(f"DEBUG Received agreement signature for epoch {epoch} from oracle {sender}")
+        self.P(f"DEBUG Received agreement signatures for epoch {epoch} from oracles {list(dct_signatures.keys())}")
 
-      # Rebuild the original signed data dictionary.
+      # Rebuild the original signed data dictionaries.
       # For additional info check method
       # __receive_agreement_signature_and_maybe_send_agreement_signature
 
@@ -1960,20 +2660,27 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
         if availability != 0
       }
 
-      data_to_verify = {
-        **signature_dict,
-        OracleSyncCt.COMPILED_AGREED_MEDIAN_TABLE: non_zero_agreed_median_table,
-        OracleSyncCt.EPOCH: epoch,
-      }
+      lst_signers = list(dct_signatures.keys())
+      lst_data_to_verify = [
+        {
+          **dct_signatures[signer],
+          OracleSyncCt.COMPILED_AGREED_MEDIAN_TABLE: non_zero_agreed_median_table,
+          OracleSyncCt.EPOCH: epoch,
+        }
+        for signer in lst_signers
+      ]
 
-      # Check if the compiled agreed median table is signed by the oracle
-      verify_result = self.bc.verify(dct_data=data_to_verify, str_signature=None, sender_address=None)
-      if not verify_result.valid:
-        if self.cfg_debug_sync_full:
-          self.P(f"DEBUG FULL invalid verify dictionary: {data_to_verify}")
-        self.P(f"Invalid agreement signature for {epoch=} from oracle {sender}:{verify_result.message}", color='r')
-        return False
-      return True
+      # Check if the compiled agreed median table is signed by the oracles
+      verify_results = self._verify_batch(lst_data_to_verify)
+      for signer, data_to_verify, verify_result in zip(lst_signers, lst_data_to_verify, verify_results):
+        if not verify_result.valid:
+          if self.cfg_debug_sync_full:
+            self.P(f"DEBUG FULL invalid verify dictionary: {data_to_verify}")
+          self.P(f"Invalid agreement signature for {epoch=} from oracle {signer}:{verify_result.message}", color='r')
+          return signer
+        # endif invalid
+      # endfor verify results
+      return None
 
     def __check_received_agreement_signature_ok(self, sender, oracle_data):
       """
@@ -2063,7 +2770,7 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
 
       agreement_signatures = oracle_data[OracleSyncCt.AGREEMENT_SIGNATURES]
 
-      for sig_sender, signature_dict in agreement_signatures.items():
+      for sig_sender in agreement_signatures.keys():
         if not self.should_expect_to_participate.get(sig_sender, False):
           self.P(f"Oracle {sig_sender} should not have sent signature for agreement. ignoring...", color='r')
           # TODO: review if this should make the entire message invalid
@@ -2073,14 +2780,13 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
           # participating oracle.
           return False
         # endif not expected to participate
-        if not self.__check_agreement_signature(
-          sender=sig_sender,
-          signature_dict=signature_dict
-        ):
-          self.P(f"Invalid agreement signature from oracle {sig_sender}!", color='r')
-          return False
-        # endif agreement signature
       # endfor agreement signatures
+
+      invalid_signer = self.__check_agreement_signatures(dct_signatures=agreement_signatures)
+      if invalid_signer is not None:
+        self.P(f"Invalid agreement signature from oracle {invalid_signer}!", color='r')
+        return False
+      # endif agreement signatures
       return True
 
     def __check_received_epoch__agreed_median_table_ok(self, sender, oracle_data):
@@ -2175,17 +2881,16 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
       if self.cfg_debug_sync_full:
         self.P(f"DEBUG Received agreed median table from oracle {sender}: {agreed_median_table}")
 
-      for oracle_addr, oracle_signature in epoch_signatures.items():
-        if not self.__check_agreement_signature(
-          sender=sender, signature_dict=oracle_signature,
-          epoch=epoch, compiled_agreed_median_table=agreed_median_table
-        ):
-          if self.cfg_debug_sync:
-            self.P(f'Invalid signature of {oracle_addr} in signatures received from {sender}!', color='r')
-          # endif debug_sync
-          return False
-        # endif agreement signature ok for received table
-      # endfor signatures
+      invalid_signer = self.__check_agreement_signatures(
+        dct_signatures=epoch_signatures,
+        epoch=epoch, compiled_agreed_median_table=agreed_median_table
+      )
+      if invalid_signer is not None:
+        if self.cfg_debug_sync:
+          self.P(f'Invalid signature of {invalid_signer} in signatures received from {sender}!', color='r')
+        # endif debug_sync
+        return False
+      # endif agreement signatures ok for received table
       return True
 
     def __compute_simple_median_table(self, median_table):
@@ -2232,6 +2937,17 @@ class OracleSync01Plugin(NetworkProcessorPlugin):
 
       return simple_agreed_value_table
 
+  def on_close(self):
+    self._verify_shutdown()
+    super(OracleSync01Plugin, self).on_close()
+    return
+
+  def add_payload_by_fields(self, **kwargs):
+    self.__n_payloads_sent += 1
+    return super(OracleSync01Plugin, self).add_payload_by_fields(**kwargs)
+
   def process(self):
-    self.state_machine_api_step(self.state_machine_name)
+    if self.cfg_event_driven_steps and not self._timers_should_step(self.time()):
+      return
+    self.__step_state_machine()
     return
@@ -0,0 +1,193 @@
+import json
+import zlib
+import base64
+import hashlib
+
+
+# Upper bound for a decompressed chunk, to protect against decompression bombs.
+ORACLE_SYNC_MAX_CHUNK_BYTES = 32 * 1024 * 1024
+
+
+class OracleSyncChunkCt:
+  START = 'START'
+  END = 'END'
+  CHUNK_IDX = 'CHUNK_IDX'
+  TOTAL = 'TOTAL'
+  SHA256 = 'SHA256'
+
+
+class _OracleSyncEpochChunksMixin(object):
+  """
+  Compressed and chunked transfer of the historical epoch availability tables.
+
+  Every chunk is a zlib-compressed json body, tagged with (start, end, chunk_idx, total, sha256),
+  where start and end are the epochs of the whole response and sha256 is computed over the
+  uncompressed body. The receiver assembles the chunks per (sender, start, end) and can
+  re-request only the missing ones.
+  """
+  def __init__(self):
+    super(_OracleSyncEpochChunksMixin, self).__init__()
+    return
+
+  def _epoch_chunks_reset(self):
+    # (sender, start, end) -> {TOTAL: int, CHUNKS: {chunk_idx: body}}
+    self.__epoch_chunks = {}
+    # (sender, start, end) of the assembled and verified responses
+    self.__epoch_chunks_done = set()
+    return
+
+  def _epoch_chunk_encode(self, body: dict, start: int, end: int, chunk_idx: int, total: int):
+    """
+    Compress a chunk body and tag it.
+
+    Parameters
+    ----------
+    body : dict
+        The json-serializable chunk body
+    start : int
+        The first epoch of the whole response
+    end : int
+        The last epoch of the whole response
+    chunk_idx : int
+        The index of this chunk
+    total : int
+        The total number of chunks of the response
+
+    Returns
+    -------
+    (meta, data) : tuple, where:
+    meta : dict
+      The chunk tag.
+    data : str
+      The base64 encoded, zlib compressed body.
+    """
+    raw = json.dumps(body, separators=(',', ':')).encode('utf-8')
+    meta = {
+      OracleSyncChunkCt.START: start,
+      OracleSyncChunkCt.END: end,
+      OracleSyncChunkCt.CHUNK_IDX: chunk_idx,
+      OracleSyncChunkCt.TOTAL: total,
+      OracleSyncChunkCt.SHA256: hashlib.sha256(raw).hexdigest(),
+    }
+    data = base64.b64encode(zlib.compress(raw)).decode('utf-8')
+    return meta, data
+
+  def _epoch_chunk_decode(self, meta: dict, data: str):
+    """
+    Decompress a chunk and validate it against its tag.
+
+    Parameters
+    ----------
+    meta : dict
+        The chunk tag
+    data : str
+        The base64 encoded, zlib compressed body
+
+    Returns
+    -------
+    dict : The chunk body, or None if the chunk is invalid
+    """
+    try:
+      start = meta[OracleSyncChunkCt.START]
+      end = meta[OracleSyncChunkCt.END]
+      chunk_idx = meta[OracleSyncChunkCt.CHUNK_IDX]
+      total = meta[OracleSyncChunkCt.TOTAL]
+      if not all(isinstance(x, int) for x in [start, end, chunk_idx, total]):
+        return None
+      if end < start or total < 1 or total > end - start + 1 or not 0 <= chunk_idx < total:
+        return None
+      decompressor = zlib.decompressobj()
+      raw = decompressor.decompress(base64.b64decode(data), ORACLE_SYNC_MAX_CHUNK_BYTES)
+      if decompressor.unconsumed_tail:
+        return None
+      if hashlib.sha256(raw).hexdigest() != meta[OracleSyncChunkCt.SHA256]:
+        return None
+      body = json.loads(raw)
+    except Exception:
+      return None
+    if not isinstance(body, dict):
+      return None
+    return body
+
+  def _epoch_chunks_add(self, sender: str, meta: dict, body: dict):
+    """
+    Add a decoded chunk to the assembly of its response.
+
+    Parameters
+    ----------
+    sender : str
+        The sender of the chunk
+    meta : dict
+        The chunk tag
+    body : dict
+        The decoded chunk body
+
+    Returns
+    -------
+    list : The bodies of all the chunks, in order, if the response is now complete, None otherwise
+    """
+    key = (sender, meta[OracleSyncChunkCt.START], meta[OracleSyncChunkCt.END])
+    if key in self.__epoch_chunks_done:
+      return None
+    total = meta[OracleSyncChunkCt.TOTAL]
+    assembly = self.__epoch_chunks.get(key)
+    if assembly is None or assembly[OracleSyncChunkCt.TOTAL] != total:
+      # A different chunking of the same response restarts the assembly.
+      assembly = {OracleSyncChunkCt.TOTAL: total, 'CHUNKS': {}}
+      self.__epoch_chunks[key] = assembly
+    # endif new assembly
+    assembly['CHUNKS'][meta[OracleSyncChunkCt.CHUNK_IDX]] = body
+    if len(assembly['CHUNKS']) < total:
+      return None
+    self.__epoch_chunks.pop(key)
+    return [assembly['CHUNKS'][idx] for idx in range(total)]
+
+  def _epoch_chunks_mark_done(self, sender: str, start: int, end: int):
+    """
+    Mark the assembled response of a sender as complete, once it passed verification.
+    Until then the sender is asked again for the full response.
+
+    Parameters
+    ----------
+    sender : str
+        The sender of the response
+    start : int
+        The first epoch of the response
+    end : int
+        The last epoch of the response
+    """
+    self.__epoch_chunks_done.add((sender, start, end))
+    return
+
+  def _epoch_chunks_requested(self, start: int, end: int):
+    """
+    Get the chunks still needed from each sender for a response.
+    Senders with a partially received response are mapped to their missing chunk indexes,
+    while senders with a complete response are mapped to an empty list.
+    Senders not present should send the full response.
+
+    Parameters
+    ----------
+    start : int
+        The first requested epoch
+    end : int
+        The last requested epoch
+
+    Returns
+    -------
+    dict : {sender: [chunk_idx, ...]}
+    """
+    dct_requested = {}
+    for (sender, chunk_start, chunk_end), assembly in self.__epoch_chunks.items():
+      if (chunk_start, chunk_end) != (start, end):
+        continue
+      dct_requested[sender] = [
+        idx for idx in range(assembly[OracleSyncChunkCt.TOTAL])
+        if idx not in assembly['CHUNKS']
+      ]
+    # endfor partial assemblies
+    for (sender, chunk_start, chunk_end) in self.__epoch_chunks_done:
+      if (chunk_start, chunk_end) == (start, end):
+        dct_requested[sender] = []
+    # endfor done assemblies
+    return dct_requested
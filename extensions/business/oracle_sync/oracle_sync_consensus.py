@@ -0,0 +1,160 @@
+"""
+Columnar consensus engine for the oracle sync.
+
+The availability tables received from the oracles are packed once per round in a dense
+`oracles x nodes` float matrix, where NaN marks a missing report. Medians and the
+most frequent values are then computed with single vectorized calls instead of per-node
+Python loops.
+
+The `*_reference` functions are the original per-node implementations and are kept for
+equivalence checks (see `xperimental/oracle_sync/consensus_timings.py`).
+"""
+import numpy as np
+
+
+def build_availability_matrix(lst_tables: list, missing_value=np.nan):
+  """
+  Pack a list of {node: value} tables in a dense `len(lst_tables) x n_nodes` matrix.
+
+  Parameters
+  ----------
+  lst_tables : list[dict]
+      The tables, one per oracle.
+  missing_value : float, optional
+      The value used when a node is not present in a table, by default NaN.
+      `None` values reported for a node are always stored as NaN.
+
+  Returns
+  -------
+  (nodes, matrix) : tuple, where:
+  nodes : list
+    The node addresses, in the order of the matrix columns.
+  matrix : np.ndarray
+    The float64 matrix of values.
+  """
+  # dict.fromkeys keeps the first-seen order of the nodes
+  nodes = list(dict.fromkeys(node for table in lst_tables for node in table))
+  node_index = {node: idx for idx, node in enumerate(nodes)}
+  matrix = np.full((len(lst_tables), len(nodes)), missing_value, dtype=np.float64)
+  for row, table in enumerate(lst_tables):
+    if len(table) == 0:
+      continue
+    cols = np.fromiter((node_index[node] for node in table), dtype=np.int64, count=len(table))
+    vals = np.fromiter(
+      (np.nan if value is None else value for value in table.values()),
+      dtype=np.float64, count=len(table)
+    )
+    matrix[row, cols] = vals
+  # endfor tables
+  return nodes, matrix
+
+
+def compute_median_values(lst_tables: list):
+  """
+  Compute the rounded median value for each node seen in at least one table.
+  A node missing from a table counts as 0 (not seen), while `None` values are ignored.
+
+  Parameters
+  ----------
+  lst_tables : list[dict]
+      The local tables, one per oracle.
+
+  Returns
+  -------
+  (nodes, medians) : tuple, where:
+  nodes : list
+    The node addresses.
+  medians : np.ndarray
+    The int64 median for each node, in the order of `nodes`.
+  """
+  nodes, matrix = build_availability_matrix(lst_tables, missing_value=0)
+  if len(nodes) == 0:
+    return nodes, np.zeros(0, dtype=np.int64)
+  all_missing = np.isnan(matrix).all(axis=0)
+  if all_missing.any():
+    # Nodes reported only as None by every oracle are considered not seen.
+    matrix[:, all_missing] = 0
+  medians = np.round(np.nanmedian(matrix, axis=0)).astype(np.int64)
+  return nodes, medians
+
+
+def compute_most_frequent_values(lst_tables: list):
+  """
+  Compute the most frequent value for each node seen in at least one table.
+  Nodes missing from a table are not counted. In case of a tie, the value reported by the
+  first table (in list order) wins.
+
+  Parameters
+  ----------
+  lst_tables : list[dict]
+      The median tables in the {node: value} format, one per oracle.
+
+  Returns
+  -------
+  (nodes, values, frequencies, agreement_mask) : tuple, where:
+  nodes : list
+    The node addresses.
+  values : np.ndarray
+    The int64 most frequent value for each node.
+  frequencies : np.ndarray
+    The number of tables reporting the most frequent value for each node.
+  agreement_mask : np.ndarray
+    `len(lst_tables) x n_nodes` bool matrix, True where the table reports the most frequent value.
+  """
+  nodes, matrix = build_availability_matrix(lst_tables)
+  if len(nodes) == 0:
+    empty = np.zeros(0, dtype=np.int64)
+    return nodes, empty, empty, np.zeros((len(lst_tables), 0), dtype=bool)
+  # counts[i, j] = number of tables reporting for node j the same value as table i (NaN never matches).
+  # One vectorized comparison per table keeps the memory at `n_tables x n_nodes`.
+  counts = np.empty(matrix.shape, dtype=np.int64)
+  for row in range(matrix.shape[0]):
+    counts[row] = (matrix == matrix[row]).sum(axis=0)
+  # argmax returns the first table with the maximum count, which gives the tie-break on table order
+  best_rows = counts.argmax(axis=0)
+  cols = np.arange(len(nodes))
+  values = matrix[best_rows, cols].astype(np.int64)
+  frequencies = counts[best_rows, cols]
+  agreement_mask = matrix == matrix[best_rows, cols][None, :]
+  return nodes, values, frequencies, agreement_mask
+
+
+def compute_median_values_reference(lst_tables: list):
+  """
+  Reference (per-node loop) implementation of `compute_median_values`.
+
+  Returns
+  -------
+  dict : {node: median_value}
+  """
+  dct_medians = {}
+  all_nodes = set().union(*(set(table.keys()) for table in lst_tables))
+  for node in all_nodes:
+    all_values = (table.get(node, 0) for table in lst_tables)
+    valid_values = list(x for x in all_values if x is not None)
+    if len(valid_values) == 0:
+      valid_values = [0]
+    dct_medians[node] = round(np.median(valid_values))
+  # endfor nodes
+  return dct_medians
+
+
+def compute_most_frequent_values_reference(lst_tables: list):
+  """
+  Reference (per-node frequency dict) implementation of `compute_most_frequent_values`.
+
+  Returns
+  -------
+  dict : {node: (most_frequent_value, frequency)}
+  """
+  dct_result = {}
+  all_nodes = set().union(*(set(table.keys()) for table in lst_tables))
+  for node in all_nodes:
+    dct_frequency = {}
+    for value in (table[node] for table in lst_tables if node in table):
+      dct_frequency[value] = dct_frequency.get(value, 0) + 1
+    max_count = max(dct_frequency.values())
+    most_frequent = next(k for k, v in dct_frequency.items() if v == max_count)
+    dct_result[node] = (most_frequent, max_count)
+  # endfor nodes
+  return dct_result
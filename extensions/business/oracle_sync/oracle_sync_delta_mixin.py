@@ -0,0 +1,66 @@
+class _OracleSyncTableDeltaMixin(object):
+  """
+  Delta encoding of the {node: value} tables exchanged between oracles.
+
+  A delta is made of the entries that changed compared to a base table (the table agreed in
+  a previous epoch), the nodes removed from it, and the digest of the full table, so the
+  receiver can check the reconstruction. The host class must provide `_compute_table_digest`.
+  """
+  def __init__(self):
+    super(_OracleSyncTableDeltaMixin, self).__init__()
+    return
+
+  def _table_delta_compute(self, base_table: dict, table: dict):
+    """
+    Compute the delta of a table relative to a base table.
+
+    Parameters
+    ----------
+    base_table : dict
+        The base {node: value} table
+    table : dict
+        The full {node: value} table
+
+    Returns
+    -------
+    (changed, removed, digest) : tuple, where:
+    changed : dict
+      The entries of `table` that are missing from or different in `base_table`.
+    removed : list
+      The nodes of `base_table` that are missing from `table`.
+    digest : str
+      The canonical digest of `table`.
+    """
+    changed = {
+      node: value for node, value in table.items()
+      if node not in base_table or base_table[node] != value
+    }
+    removed = [node for node in base_table if node not in table]
+    return changed, removed, self._compute_table_digest(table)
+
+  def _table_delta_apply(self, base_table: dict, changed: dict, removed: list, digest: str):
+    """
+    Rebuild a table from its delta relative to a base table.
+
+    Parameters
+    ----------
+    base_table : dict
+        The base {node: value} table
+    changed : dict
+        The changed entries
+    removed : list
+        The removed nodes
+    digest : str
+        The expected canonical digest of the full table
+
+    Returns
+    -------
+    dict : The rebuilt table, or None if its digest does not match
+    """
+    table = dict(base_table)
+    for node in removed:
+      table.pop(node, None)
+    table.update(changed)
+    if self._compute_table_digest(table) != digest:
+      return None
+    return table
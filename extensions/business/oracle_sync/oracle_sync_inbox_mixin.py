@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+
+class _OracleSyncInboxMixin(object):
+  """
+  Bounded inbox for the messages received from the oracles.
+
+  Each sender has its own bounded queue of messages, where a message replaces the previous one
+  with the same key. The oracles resend the same data each `SEND_INTERVAL` seconds, so only the
+  newest message for each key is useful, and a chatty sender can neither grow the inbox nor
+  evict the messages of the other senders.
+  """
+  def __init__(self):
+    super(_OracleSyncInboxMixin, self).__init__()
+    return
+
+  def _inbox_init(self, max_messages_per_sender: int):
+    # sender -> OrderedDict(key -> message), oldest first
+    self.__inbox = {}
+    self.__inbox_max_messages_per_sender = max_messages_per_sender
+    self.__inbox_replaced = 0
+    self.__inbox_evicted = 0
+    return
+
+  def _inbox_add(self, sender: str, key, message: dict):
+    """
+    Add a message to the inbox of its sender, replacing the previous message with the same key.
+    If the inbox of the sender is full, its oldest message is dropped.
+
+    Parameters
+    ----------
+    sender : str
+        The sender of the message
+    key : hashable
+        The deduplication key of the message
+    message : dict
+        The message
+    """
+    sender_inbox = self.__inbox.get(sender)
+    if sender_inbox is None:
+      sender_inbox = OrderedDict()
+      self.__inbox[sender] = sender_inbox
+    # endif new sender
+    if key in sender_inbox:
+      # the newest message takes the place of the previous one at the end of the queue
+      sender_inbox.move_to_end(key)
+      self.__inbox_replaced += 1
+    elif len(sender_inbox) >= self.__inbox_max_messages_per_sender:
+      sender_inbox.popitem(last=False)
+      self.__inbox_evicted += 1
+    # endif key
+    sender_inbox[key] = message
+    return
+
+  def _inbox_drain(self):
+    """
+    Remove and return all the messages in the inbox.
+
+    Returns
+    -------
+    list : The messages, grouped by sender, oldest first for each sender
+    """
+    messages = []
+    for sender_inbox in self.__inbox.values():
+      messages.extend(sender_inbox.values())
+    # endfor senders
+    self.__inbox = {}
+    return messages
+
+  def _inbox_len(self):
+    return sum(len(sender_inbox) for sender_inbox in self.__inbox.values())
+
+  def _inbox_get_stats(self):
+    return {
+      'PENDING': self._inbox_len(),
+      'REPLACED': self.__inbox_replaced,
+      'EVICTED': self.__inbox_evicted,
+    }
@@ -0,0 +1,134 @@
+import heapq
+
+
+class OracleSyncStepCt:
+  SKIPPED = 'SKIPPED'
+  PRODUCTIVE = 'PRODUCTIVE'
+  WASTED = 'WASTED'
+
+
+class _OracleSyncTimersMixin(object):
+  """
+  Deadline timers for driving the oracle sync state machine by events instead of polling.
+
+  Named deadlines are kept in a priority queue (a deadline can be rescheduled, the stale heap
+  entries are dropped lazily). Together with a "new input" flag, they decide if the state machine
+  needs to be stepped at a given moment. The clock is always passed explicitly, so the timers can be
+  driven by a fake clock.
+  """
+  def __init__(self):
+    super(_OracleSyncTimersMixin, self).__init__()
+    return
+
+  def _timers_init(self):
+    self.__timers_heap = []
+    # name -> deadline, the source of truth for the heap entries
+    self.__timers = {}
+    self.__timers_input_pending = False
+    self.__timers_counters = {
+      OracleSyncStepCt.SKIPPED: 0,
+      OracleSyncStepCt.PRODUCTIVE: 0,
+      OracleSyncStepCt.WASTED: 0,
+    }
+    return
+
+  def _timers_schedule(self, name: str, deadline: float):
+    """
+    Schedule (or reschedule) a named deadline.
+
+    Parameters
+    ----------
+    name : str
+        The name of the deadline
+    deadline : float
+        The moment when the deadline expires
+    """
+    self.__timers[name] = deadline
+    heapq.heappush(self.__timers_heap, (deadline, name))
+    return
+
+  def _timers_cancel(self, name: str):
+    self.__timers.pop(name, None)
+    return
+
+  def _timers_next_deadline(self):
+    """
+    Get the earliest active deadline.
+
+    Returns
+    -------
+    float : The earliest deadline, or None if there is no active deadline
+    """
+    while len(self.__timers_heap) > 0:
+      deadline, name = self.__timers_heap[0]
+      if self.__timers.get(name) == deadline:
+        return deadline
+      # stale entry, the deadline was rescheduled or cancelled
+      heapq.heappop(self.__timers_heap)
+    # endwhile heap
+    return None
+
+  def _timers_pop_expired(self, now: float):
+    """
+    Remove and return the deadlines expired at `now`.
+
+    Parameters
+    ----------
+    now : float
+        The current moment
+
+    Returns
+    -------
+    list : The names of the expired deadlines
+    """
+    expired = []
+    while True:
+      deadline = self._timers_next_deadline()
+      if deadline is None or deadline > now:
+        break
+      _, name = heapq.heappop(self.__timers_heap)
+      self.__timers.pop(name, None)
+      expired.append(name)
+    # endwhile expired
+    return expired
+
+  def _timers_signal_input(self):
+    """
+    Mark that new input arrived and the state machine should be stepped.
+    """
+    self.__timers_input_pending = True
+    return
+
+  def _timers_should_step(self, now: float):
+    """
+    Check if the state machine should be stepped at `now`, consuming the expired deadlines
+    and the pending input flag. The calls that do not lead to a step are counted as skipped.
+
+    Parameters
+    ----------
+    now : float
+        The current moment
+
+    Returns
+    -------
+    bool : True if a deadline expired or new input arrived, False otherwise
+    """
+    has_input = self.__timers_input_pending
+    self.__timers_input_pending = False
+    expired = self._timers_pop_expired(now)
+    should_step = has_input or len(expired) > 0
+    if not should_step:
+      self.__timers_counters[OracleSyncStepCt.SKIPPED] += 1
+    return should_step
+
+  def _timers_record_step(self, productive: bool):
+    """
+    Count a state machine step as productive (it changed the state, processed input or sent data)
+    or wasted.
+    """
+    key = OracleSyncStepCt.PRODUCTIVE if productive else OracleSyncStepCt.WASTED
+    self.__timers_counters[key] += 1
+    return
+
+  def _timers_get_counters(self):
+    return dict(self.__timers_counters)
@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Maximum number of (digest, signature) verification results kept in memory.
+ORACLE_SYNC_VERIFY_CACHE_SIZE = 200_000
+# Below this number of pending verifications the worker pool is not worth the overhead.
+ORACLE_SYNC_VERIFY_MIN_PARALLEL = 8
+
+
+class _OracleSyncVerifyMixin(object):
+  """
+  Batched and memoized signature verification for the oracle sync messages.
+
+  The host class must provide `self.bc` (with a `verify` method) and may provide
+  `self.cfg_verify_workers` (number of workers, None for the CPU count).
+  """
+  def __init__(self):
+    super(_OracleSyncVerifyMixin, self).__init__()
+    return
+
+  def _verify_init(self):
+    n_workers = getattr(self, 'cfg_verify_workers', None) or os.cpu_count() or 1
+    self.__verify_n_workers = max(int(n_workers), 1)
+    self.__verify_pool = None
+    self.__verify_cache = OrderedDict()
+    self.__verify_stats = {
+      'VERIFIED': 0,
+      'CACHE_HITS': 0,
+    }
+    return
+
+  def _verify_shutdown(self):
+    if self.__verify_pool is not None:
+      self.__verify_pool.shutdown(wait=False)
+      self.__verify_pool = None
+    return
+
+  def _verify_get_stats(self):
+    return {
+      **self.__verify_stats,
+      'CACHE_SIZE': len(self.__verify_cache),
+      'WORKERS': self.__verify_n_workers,
+    }
+
+  def _verify_digest(self, dct_data: dict):
+    """
+    Compute the memoization key for a signed dictionary.
+    The digest is computed locally over the whole received dictionary (data and signature fields),
+    so a forged payload reusing a valid signature will never hit a cached positive result.
+
+    Parameters
+    ----------
+    dct_data : dict
+        The signed dictionary
+
+    Returns
+    -------
+    tuple : (digest, signature)
+    """
+    str_data = json.dumps(dct_data, sort_keys=True, default=str)
+    digest = hashlib.sha256(str_data.encode('utf-8')).hexdigest()
+    return digest, dct_data.get('EE_SIGN')
+
+  def _compute_table_digest(self, dct_table: dict):
+    """
+    Compute the canonical digest of a {node: value} table.
+    The entries are sorted by node, so the digest does not depend on the insertion order.
+
+    Parameters
+    ----------
+    dct_table : dict
+        The table to digest
+
+    Returns
+    -------
+    str : The sha256 hex digest of the table
+    """
+    lst_items = sorted(dct_table.items(), key=lambda x: x[0])
+    str_table = json.dumps(lst_items, separators=(',', ':'))
+    return hashlib.sha256(str_table.encode('utf-8')).hexdigest()
+
+  def __verify_single(self, dct_data: dict):
+    return self.bc.verify(dct_data=dct_data, str_signature=None, sender_address=None)
+
+  def __verify_cache_put(self, key, result):
+    self.__verify_cache[key] = result
+    if len(self.__verify_cache) > ORACLE_SYNC_VERIFY_CACHE_SIZE:
+      self.__verify_cache.popitem(last=False)
+    return
+
+  def _verify_batch(self, lst_dct_data: list):
+    """
+    Verify a list of signed dictionaries.
+    Previously verified dictionaries are served from the cache, the rest are verified
+    in a worker pool sized to the CPU count.
+
+    Parameters
+    ----------
+    lst_dct_data : list[dict]
+        The signed dictionaries to verify
+
+    Returns
+    -------
+    list : The verification results, in the same order as `lst_dct_data`
+    """
+    results = [None] * len(lst_dct_data)
+    # key -> list of indexes, so the same payload is verified only once per batch
+    pending = OrderedDict()
+    for idx, dct_data in enumerate(lst_dct_data):
+      key = self._verify_digest(dct_data)
+      cached = self.__verify_cache.get(key)
+      if cached is not None:
+        self.__verify_cache.move_to_end(key)
+        self.__verify_stats['CACHE_HITS'] += 1
+        results[idx] = cached
+      else:
+        pending.setdefault(key, []).append(idx)
+      # endif cached
+    # endfor lst_dct_data
+
+    if len(pending) == 0:
+      return results
+
+    lst_keys = list(pending.keys())
+    lst_to_verify = [lst_dct_data[pending[key][0]] for key in lst_keys]
+    if len(lst_to_verify) < ORACLE_SYNC_VERIFY_MIN_PARALLEL or self.__verify_n_workers == 1:
+      lst_verified = [self.__verify_single(dct_data) for dct_data in lst_to_verify]
+    else:
+      if self.__verify_pool is None:
+        self.__verify_pool = ThreadPoolExecutor(
+          max_workers=self.__verify_n_workers,
+          thread_name_prefix='oracle_sync_verify',
+        )
+      # endif pool not created
+      lst_verified = list(self.__verify_pool.map(self.__verify_single, lst_to_verify))
+    # endif parallel
+
+    self.__verify_stats['VERIFIED'] += len(lst_verified)
+    for key, result in zip(lst_keys, lst_verified):
+      self.__verify_cache_put(key, result)
+      for idx in pending[key]:
+        results[idx] = result
+    # endfor verified
+    return results
+
+  def _verify_one(self, dct_data: dict):
+    """
+    Verify a single signed dictionary, using the memoization cache.
+
+    Parameters
+    ----------
+    dct_data : dict
+        The signed dictionary
+
+    Returns
+    -------
+    The verification result
+    """
+    return self._verify_batch([dct_data])[0]
@@ -12,6 +12,12 @@ _CONFIG = {
 
   "CUSTOM_DOWNLOADABLE_MODEL" : True,
   "CUSTOM_DOWNLOADABLE_MODEL_URL" : None,
+
+  # crop and letterbox all the boxes of the batch with a single roi_align on the preprocessed
+  # input, instead of one crop per box followed by the resize with pad
+  "SECOND_STAGE_BATCHED_CROP" : False,
+  # the letterbox padding of the batched crop, in the scale of the preprocessed input
+  "SECOND_STAGE_PAD_VALUE" : 114 / 255,
 }
 
 __VER__ = '0.1.0.0'
@@ -121,14 +127,97 @@ class ThYoloSecondStage(BaseServingProcess):
     #endif
     return lst_yolo_results
 
+  def _second_stage_rois(self, pred_nms, pred_masks):
+    """
+    Build the roi_align boxes (image index, x1, y1, x2, y2) of the target detections of the
+    batch, with the same bounds as the crops of the per box path.
+    """
+    rois = []
+    for i, (pred, pred_mask) in enumerate(zip(pred_nms, pred_masks)):
+      pred = pred[pred_mask]
+      if pred.shape[0] == 0:
+        continue
+      xyxy = pred[:, :4].int()
+      left = xyxy[:, 0].clamp(min=0)
+      top = xyxy[:, 1].clamp(min=0)
+      right = left + xyxy[:, 2] - xyxy[:, 0] + 1
+      bottom = top + xyxy[:, 3] - xyxy[:, 1] + 1
+      rois.append(self.th.stack([self.th.full_like(left, i), left, top, right, bottom], dim=1))
+    #endfor
+    if len(rois) == 0:
+      return None
+    return self.th.cat(rois, dim=0).float()
+
+  def _second_stage_roi_letterbox(self, th_inputs, rois):
+    """
+    Crop the boxes and resize them with pad (centered) to the second stage input size, all at
+    once: each roi is extended so that roi_align samples the letterboxed crop directly, then the
+    area outside the box is set to the padding value.
+    """
+    width, height = self.get_second_stage_input_size[0], self.get_second_stage_input_size[1]
+    box_w = (rois[:, 3] - rois[:, 1]).clamp(min=1)
+    box_h = (rois[:, 4] - rois[:, 2]).clamp(min=1)
+    scale = self.th.minimum(width / box_w, height / box_h)
+    new_w, new_h = box_w * scale, box_h * scale
+    pad_left, pad_top = (width - new_w) / 2, (height - new_h) / 2
+
+    extended_rois = self.th.stack([
+      rois[:, 0],
+      rois[:, 1] - pad_left / scale,
+      rois[:, 2] - pad_top / scale,
+      rois[:, 1] + (width - pad_left) / scale,
+      rois[:, 2] + (height - pad_top) / scale,
+    ], dim=1)
+    inputs = th_inputs if th_inputs.dtype == self.th.float32 else th_inputs.float()
+    crops = self.tv.ops.roi_align(
+      inputs, extended_rois.to(inputs.device),
+      output_size=(height, width), spatial_scale=1.0, sampling_ratio=1, aligned=True
+    )
+
+    xs = self.th.arange(width, device=crops.device) + 0.5
+    ys = self.th.arange(height, device=crops.device) + 0.5
+    pad_left, pad_top = pad_left.to(crops.device), pad_top.to(crops.device)
+    new_w, new_h = new_w.to(crops.device), new_h.to(crops.device)
+    inside_x = (xs[None, :] >= pad_left[:, None]) & (xs[None, :] < (pad_left + new_w)[:, None])
+    inside_y = (ys[None, :] >= pad_top[:, None]) & (ys[None, :] < (pad_top + new_h)[:, None])
+    inside = (inside_y[:, :, None] & inside_x[:, None, :])[:, None]
+    crops = self.th.where(inside, crops, self.th.full_like(crops, self.cfg_second_stage_pad_value))
+    return crops.to(th_inputs.dtype)
+
+  def _second_stage_assemble_results(self, masks, index_map, probs, classes):
+    """
+    Scatter the second stage results back to the (image, box) positions of the detections.
+
+    Parameters
+    ----------
+    masks : list
+        For each image, whether each of its detections is a second stage target.
+    index_map : list
+        The (image, box) position of each second stage input.
+    probs, classes : list
+        The second stage probability and class of each input.
+
+    Returns
+    -------
+    results : list
+        For each image, the (probability, class) of each detection, None for the non targets.
+    """
+    results = [[None] * len(image_masks) for image_masks in masks]
+    for (i, j), prob, cls in zip(index_map, probs, classes):
+      results[i][j] = (round(prob, 2), round(cls, 2))
+    return results
+
   def _second_stage_classifier(self, pred_nms, th_inputs):
     crop_imgs = []
-    identity = []
+    # the (image, box) position of each crop
+    index_map = []
 
     masks = []
+    pred_masks = []
     self._start_timer("crop")
 
     apply_custom_transforms = len(self._transform.transforms) > 0
+    batched_crop = self.cfg_second_stage_batched_crop and not apply_custom_transforms
     idxs = [self.class_names.index(_class_name) for _class_name in self.get_second_stage_target_class]
 
     if apply_custom_transforms:
@@ -138,25 +227,42 @@ class ThYoloSecondStage(BaseServingProcess):
 
     for i, pred in enumerate(pred_nms):
       pred_mask = self.th.any(self.th.stack([self.th.eq(pred[:, 5], idx) for idx in idxs], dim=0), dim=0)
-      masks.append(pred_mask.tolist())
-      for i_crop in range(pred.shape[0]):
+      image_masks = pred_mask.tolist()
+      masks.append(image_masks)
+      pred_masks.append(pred_mask)
+      # only the target detections are classified
+      image_targets = [j for j, is_target in enumerate(image_masks) if is_target]
+      index_map.extend((i, j) for j in image_targets)
+      if batched_crop:
+        continue
+      boxes = pred[:, :4].int().tolist()
+      for i_crop in image_targets:
+        x1, y1, x2, y2 = boxes[i_crop]
         crop_imgs.append(
           self.tv.transforms.functional.crop(
             images_to_crop[i],
-            left=max(pred[i_crop, 0].int(), 0),
-            top=max(pred[i_crop, 1].int(), 0),
-            width=pred[i_crop, 2].int() - pred[i_crop, 0].int() + 1,
-            height=pred[i_crop, 3].int() - pred[i_crop, 1].int() + 1,
+            left=max(x1, 0),
+            top=max(y1, 0),
+            width=x2 - x1 + 1,
+            height=y2 - y1 + 1,
           )
         )
-      identity = identity + [i] * pred.shape[0]
     #endfor
+    rois = self._second_stage_rois(pred_nms, pred_masks) if batched_crop and len(index_map) > 0 else None
     self._stop_timer("crop")
 
+    if len(index_map) == 0:
+      # no second stage targets in the whole batch
+      return [[None] * len(image_masks) for image_masks in masks]
+
     if apply_custom_transforms:
       self._start_timer("full_preprocess")
       batch = self._transform(crop_imgs)
       self._stop_timer("full_preprocess")
+    elif batched_crop:
+      self._start_timer("resize")
+      batch = self._second_stage_roi_letterbox(th_inputs, rois)
+      self._stop_timer("resize")
     else:
       self._start_timer("resize")
       batch, _ = self.th_resize_with_pad(
@@ -170,16 +276,9 @@ class ThYoloSecondStage(BaseServingProcess):
 
     self._start_timer("second_stage_fw")
     out = self.second_stage_model(batch)
-    out = self.th.max(out, dim=1)#.tolist()
-    results = []
+    out = self.th.max(out, dim=1)
     self._stop_timer("second_stage_fw")
 
-    k = 0
-    for i in range(len(pred_nms)):
-      results.append(
-        [(self.np.round(out[0].tolist()[k+j], 2), self.np.round(out[1].tolist()[k+j], 2))
-         if masks[i][j] else None
-         for j in range(len(masks[i]))]
-      )
-      k += len(masks[i])
+    # the outputs are converted once for the whole batch
+    results = self._second_stage_assemble_results(masks, index_map, out[0].tolist(), out[1].tolist())
     return results
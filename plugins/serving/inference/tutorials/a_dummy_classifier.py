@@ -1,4 +1,5 @@
 from naeural_core.serving.base import ModelServingProcess as BaseServingProcess
+from plugins.serving.mixins_libs.vectorized_predict_mixin import _VectorizedPredictMixin
 
 __VER__ = '0.1.0.0'
 
@@ -18,6 +19,12 @@ _CONFIG = {
   
   "RUNS_ON_EMPTY_INPUT" : False,
 
+  # stack the inputs of the streams of each step and run them through vectorized predicts
+  # of at most MAX_BATCH inputs; only the inputs of the same step are stacked, so this pays off
+  # with tens of streams and is about 2-3x slower with a single stream
+  "VECTORIZED_PREDICT" : False,
+  "MAX_BATCH" : 32,
+
   'VALIDATION_RULES': {
     **BaseServingProcess.CONFIG['VALIDATION_RULES'],
     
@@ -43,7 +50,7 @@ _CONFIG = {
 
 }
 
-class ADummyClassifier(BaseServingProcess):
+class ADummyClassifier(BaseServingProcess, _VectorizedPredictMixin):
 
   def __crash_simulator(self, thr):
     if thr > 0:
@@ -73,6 +80,8 @@ class ADummyClassifier(BaseServingProcess):
       self.P("Self-crashing programmed at post-proc iter {}".format(self.cfg_crash_postproc), color='error')
     else:
       self.P("CRASH_POSTPROC={}".format(self.cfg_crash_postproc))
+    if self.cfg_vectorized_predict:
+      self.P("Vectorized predict in batches of up to {} inputs".format(self.cfg_max_batch))
     return
   
     
@@ -100,9 +109,16 @@ class ADummyClassifier(BaseServingProcess):
     return preprocessed
   
 
+  def _predict_batch(self, np_batch, lst_params):
+    return self.np.round(np_batch).astype(int) % 2 == 0
+
   def predict(self, inputs):
     self.__crash_simulator(self.cfg_crash_predict)
     self._counter += 1
+    if self.cfg_vectorized_predict:
+      preds = self._vectorized_predict([inp[0] for inp in inputs], [inp[1] for inp in inputs])
+      dummy_result = [[pred, self._counter, inp[0], inp[1]] for pred, inp in zip(preds, inputs)]
+      return self.np.array(dummy_result)
     dummy_result = []
     for inp in inputs:
       # for each stream input    
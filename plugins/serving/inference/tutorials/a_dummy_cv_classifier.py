@@ -1,4 +1,5 @@
 from naeural_core.serving.base import ModelServingProcess as BaseServingProcess
+from plugins.serving.mixins_libs.vectorized_predict_mixin import _VectorizedPredictMixin
 
 __VER__ = '0.1.0.0'
 
@@ -18,6 +19,12 @@ _CONFIG = {
   
   "RUNS_ON_EMPTY_INPUT" : False,
 
+  # stack the inputs of the streams of each step and run them through vectorized predicts
+  # of at most MAX_BATCH inputs; only the inputs of the same step are stacked, so this pays off
+  # with tens of streams and is about 2-3x slower with a single stream
+  "VECTORIZED_PREDICT" : False,
+  "MAX_BATCH" : 32,
+
   'VALIDATION_RULES': {
     **BaseServingProcess.CONFIG['VALIDATION_RULES'],
     
@@ -43,7 +50,7 @@ _CONFIG = {
 
 }
 
-class ADummyCvClassifier(BaseServingProcess):
+class ADummyCvClassifier(BaseServingProcess, _VectorizedPredictMixin):
   
   def __crash_simulator(self, thr):
     if thr > 0:
@@ -66,6 +73,8 @@ class ADummyCvClassifier(BaseServingProcess):
       self.P("Self-crashing programmed at predict iter {}".format(self.cfg_crash_predict), color='error')
     if self.cfg_crash_postproc > 0:
       self.P("Self-crashing programmed at post-proc iter {}".format(self.cfg_crash_postproc), color='error')
+    if self.cfg_vectorized_predict:
+      self.P("Vectorized predict in batches of up to {} inputs".format(self.cfg_max_batch))
     return
   
     
@@ -85,8 +94,18 @@ class ADummyCvClassifier(BaseServingProcess):
     return preprocessed
   
 
+  def _predict_batch(self, np_batch, lst_params):
+    return np_batch.reshape(np_batch.shape[0], -1).sum(axis=1) + self.np.array(lst_params)
+
   def predict(self, inputs):
     self.__crash_simulator(self.cfg_crash_predict)
+    if self.cfg_vectorized_predict:
+      sums = self._vectorized_predict([inp[0] for inp in inputs], [inp[1] for inp in inputs])
+      dummy_result = []
+      for obs_sum, inp in zip(sums, inputs):
+        self._counter += 1
+        dummy_result.append((obs_sum, self._counter, inp[0].shape[0], inp[0].shape[1]))
+      return self.np.array(dummy_result)
     dummy_result = []
     for inp in inputs:
       # for each stream input      
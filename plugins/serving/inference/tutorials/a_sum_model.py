@@ -37,6 +37,7 @@ then:
 """
 
 from naeural_core.serving.base import ModelServingProcess as BaseServingProcess
+from plugins.serving.mixins_libs.vectorized_predict_mixin import _VectorizedPredictMixin
 
 __VER__ = '0.1.0.0'
 
@@ -56,6 +57,12 @@ _CONFIG = {
   
   "RUNS_ON_EMPTY_INPUT" : False,
 
+  # stack the inputs of the streams of each step and run them through vectorized predicts
+  # of at most MAX_BATCH inputs; only the inputs of the same step are stacked, so this pays off
+  # with tens of streams and is about 2-3x slower with a single stream
+  "VECTORIZED_PREDICT" : False,
+  "MAX_BATCH" : 32,
+
   'VALIDATION_RULES': {
     **BaseServingProcess.CONFIG['VALIDATION_RULES'],
     
@@ -81,7 +88,7 @@ _CONFIG = {
 
 }
 
-class ASumModel(BaseServingProcess):
+class ASumModel(BaseServingProcess, _VectorizedPredictMixin):
 
   def __crash_simulator(self, thr):
     if thr > 0:
@@ -103,6 +110,8 @@ class ASumModel(BaseServingProcess):
       self.P("Self-crashing programmed at predict iter {}".format(self.cfg_crash_predict), color='error')
     if self.cfg_crash_postproc > 0:
       self.P("Self-crashing programmed at post-proc iter {}".format(self.cfg_crash_postproc), color='error')
+    if self.cfg_vectorized_predict:
+      self.P("Vectorized predict in batches of up to {} inputs".format(self.cfg_max_batch))
     return
       
   def _pre_process(self, inputs): 
@@ -125,9 +134,15 @@ class ASumModel(BaseServingProcess):
     return preprocessed
   
 
+  def _predict_batch(self, np_batch, lst_params):
+    return np_batch.reshape(np_batch.shape[0], -1).sum(axis=1)
+
   def _predict(self, inputs):
     self.__crash_simulator(self.cfg_crash_predict)
     self._counter += 1
+    if self.cfg_vectorized_predict:
+      yhats = self._vectorized_predict([inp[0] for inp in inputs], [inp[1] for inp in inputs])
+      return [(yhat, self._counter, inp[0], inp[1]) for yhat, inp in zip(yhats, inputs)]
     result = []
     for inp in inputs:
       # for each stream input      
@@ -0,0 +1,52 @@
+class _VectorizedPredictMixin(object):
+  """
+  Vectorized predict of the stream inputs of a serving step.
+
+  The inputs of the step are grouped by shape, stacked in numpy arrays of at most `MAX_BATCH`
+  rows and run through `_predict_batch`, instead of one predict per input. The outputs are
+  returned in the order of the inputs.
+
+  The host serving must implement `_predict_batch(np_batch, lst_params)`, that returns one output
+  for each row of `np_batch`, and may provide `self.cfg_max_batch`.
+  """
+  def __init__(self):
+    super(_VectorizedPredictMixin, self).__init__()
+    return
+
+  def __get_max_batch(self):
+    return max(int(getattr(self, 'cfg_max_batch', None) or 1), 1)
+
+  def _vectorized_predict(self, lst_data, lst_params):
+    """
+    Run the inputs of a serving step through vectorized batches.
+
+    Parameters
+    ----------
+    lst_data : list
+        The inputs, one for each stream.
+    lst_params : list
+        The inference params of each input.
+
+    Returns
+    -------
+    results : list
+        The outputs of `_predict_batch` for each input, in the order of the inputs.
+    """
+    max_batch = self.__get_max_batch()
+    results = [None] * len(lst_data)
+    # inputs with different shapes cannot be stacked together
+    dct_groups = {}
+    for idx, data in enumerate(lst_data):
+      data = self.np.asarray(data)
+      dct_groups.setdefault(data.shape, []).append((idx, data))
+    # endfor inputs
+    for group in dct_groups.values():
+      for start in range(0, len(group), max_batch):
+        chunk = group[start:start + max_batch]
+        np_batch = self.np.stack([data for _, data in chunk])
+        outputs = self._predict_batch(np_batch, [lst_params[idx] for idx, _ in chunk])
+        for (idx, _), output in zip(chunk, outputs):
+          results[idx] = output
+      # endfor chunks
+    # endfor groups
+    return results
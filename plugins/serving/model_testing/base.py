@@ -1,15 +1,28 @@
 # global dependencies
 import random
-import torch as th
 import pandas as pd
 import numpy as np
 import cv2
 import os
+import json
+import queue
+import resource
+import threading
 import traceback
 
-from time import sleep
+from time import sleep, perf_counter
 from collections import OrderedDict
 
+try:
+  import torch as th
+except ImportError:
+  th = None
+
+try:
+  import psutil
+except ImportError:
+  psutil = None
+
 # local dependencies
 from naeural_core import DecentrAIObject
 from decentra_vision.draw_utils import DrawUtils
@@ -22,7 +35,7 @@ class Base(DecentrAIObject):
   def __init__(self,
                model_name,
                test_files,
-               sleep_time=10,
+               sleep_time=0,
                save_plots=True,
                show_plots=False,
                label_extension='json',
@@ -32,6 +45,13 @@ class Base(DecentrAIObject):
                serving_manager=None,
                print_errors=True,
                subdir_keys=None,
+               max_warmup=50,
+               warmup_window=5,
+               warmup_cv_threshold=0.1,
+               input_type='IMG',
+               image_load_workers=None,
+               image_cache_folder=None,
+               image_target_size=None,
                **kwargs):
     """
 
@@ -42,7 +62,7 @@ class Base(DecentrAIObject):
       Files to run inference on
 
     :param sleep_time: int
-      Sleep time at startup
+      Optional sleep time after the serving startup, for manual memory checks
 
     :param save_plots: bool
       Whether to save ploted images to disk
@@ -51,7 +71,7 @@ class Base(DecentrAIObject):
       Whether to show plotted images
 
     :param nr_warmup: int
-      How many warmup steps to run
+      The minimum number of warmup steps
 
     :param nr_predicts: int
       How many predicts to run in order to get mean resource consumption
@@ -67,6 +87,28 @@ class Base(DecentrAIObject):
     :param subdir_keys: list
       keys used to better organize the saved results (mainly plots) in subdirectories
 
+    :param max_warmup: int
+      The maximum number of warmup steps
+
+    :param warmup_window: int
+      The number of the last warmup latencies checked for stability
+
+    :param warmup_cv_threshold: float
+      The warmup stops when the coefficient of variation (std / mean) of the last warmup
+      latencies is below this threshold
+
+    :param input_type: str
+      The type of the serving inputs, 'IMG' or 'STRUCT_DATA'
+
+    :param image_load_workers: int
+      The number of threads decoding the test images
+
+    :param image_cache_folder: str
+      Optional folder caching the decoded test images, so the next runs skip the decoding
+
+    :param image_target_size: tuple
+      Optional (width, height) the test images are resized to when loaded
+
     :param kwargs:
     """
     super().__init__(**kwargs)
@@ -81,6 +123,13 @@ class Base(DecentrAIObject):
     #   self._gpu_device = 1 if th.cuda.device_count() > 1 else 0
     self._nr_predicts = nr_predicts
     self._nr_warmup = nr_warmup
+    self._max_warmup = max(max_warmup, nr_warmup)
+    self._warmup_window = max(warmup_window, 2)
+    self._warmup_cv_threshold = warmup_cv_threshold
+    self._input_type = input_type
+    self._image_load_workers = image_load_workers
+    self._image_cache_folder = image_cache_folder
+    self._image_target_size = image_target_size
     self._inprocess = inprocess
     self._print_errors = print_errors
     self.subdir_keys = [] if subdir_keys is None else subdir_keys
@@ -101,6 +150,8 @@ class Base(DecentrAIObject):
       'NUMBER_OF_IMAGES': [],
       'SUCCESS': []
     }
+    self._runs = []
+    self._load_stats = {}
     self._test_datasets = {}
     self._test_datasets_paths = {}
     self.label_extension = label_extension
@@ -122,7 +173,12 @@ class Base(DecentrAIObject):
         owner=self,
       )
     self._painter = DrawUtils(log=self.log)
-    self._dataset = Dataset(log=self.log)
+    self._dataset = Dataset(
+      log=self.log,
+      nr_workers=self._image_load_workers,
+      cache_folder=self._image_cache_folder,
+      target_size=self._image_target_size,
+    )
     self._serving_utils = ServingUtils(log=self.log)
     self._load_data()
     return
@@ -138,6 +194,11 @@ class Base(DecentrAIObject):
   def load_data(self):
     for dataset_name, dataset_paths in self._test_files.items():
       self._test_datasets[dataset_name] = self._dataset.load_images(dataset_paths)
+      self._load_stats[dataset_name] = dict(self._dataset.last_load_stats)
+      self.log.P("Loaded {} images of '{}' in {:.2f}s ({} load, {} cache hits)".format(
+        self._load_stats[dataset_name]['NR_IMAGES'], dataset_name, self._load_stats[dataset_name]['LOAD_TIME'],
+        self._load_stats[dataset_name]['MODE'].lower(), self._load_stats[dataset_name]['CACHE_HITS'],
+      ))
       self._test_datasets_paths[dataset_name] = [
         f'{os.path.splitext(dataset_path)[0]}.{self.label_extension}'
         for dataset_path in dataset_paths
@@ -146,6 +207,83 @@ class Base(DecentrAIObject):
     # self._lst_img_names = list(dct.keys())
     return
 
+  def _is_gpu_device(self, device):
+    return device is not None and str(device).startswith('cuda') and th is not None and th.cuda.is_available()
+
+  def _get_gpu_id(self, device):
+    gpus_info = self.log.gpu_info(show=True, mb=True)
+    device_name = th.cuda.get_device_name(device)
+    return [i for i, gpu_info in enumerate(gpus_info) if gpu_info['NAME'] == device_name][0]
+
+  def _get_free_gpu_mem(self, gpu_id):
+    return self.log.gpu_info(show=True, mb=True)[gpu_id]['FREE_MEM']
+
+  def _get_rss(self):
+    """The resident memory in MB of this process and of its children (the serving processes)."""
+    if psutil is not None:
+      process = psutil.Process()
+      processes = [process] + process.children(recursive=True)
+      rss = 0
+      for proc in processes:
+        try:
+          rss += proc.memory_info().rss
+        except psutil.Error:
+          pass
+      # endfor processes
+      return rss / 1024 ** 2
+    # without psutil only the peak of this process is available (KB on linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+  def _timed_predict(self, model_inputs):
+    start = perf_counter()
+    preds = self._serving_manager.predict(self._model_name, model_inputs)
+    elapsed = perf_counter() - start
+    if preds is None:
+      raise Exception("Error raised in predict")
+    return preds, elapsed
+
+  def _warmup_until_stable(self, model_inputs):
+    """
+    Run warmup predicts until the coefficient of variation of the last `warmup_window` latencies
+    is below `warmup_cv_threshold`, with at least `nr_warmup` and at most `max_warmup` steps.
+
+    Returns
+    -------
+    nr_steps, cv : int, float
+        The number of warmup steps and the final coefficient of variation.
+    """
+    latencies = []
+    cv = None
+    for step in range(self._max_warmup):
+      _, elapsed = self._timed_predict(model_inputs)
+      latencies.append(elapsed)
+      window = latencies[-self._warmup_window:]
+      if len(window) == self._warmup_window:
+        cv = float(np.std(window) / max(np.mean(window), 1e-9))
+        if len(latencies) >= self._nr_warmup and cv < self._warmup_cv_threshold:
+          break
+    # endfor warmup steps
+    if cv is not None and cv >= self._warmup_cv_threshold:
+      self.P("WARNING! Latency not stable after {} warmup steps (cv={:.3f})".format(len(latencies), cv), color='r')
+    return len(latencies), cv
+
+  def _latency_stats(self, latencies, nr_images, nr_bins=20):
+    """Latency percentiles and histogram in ms, and throughput in images per second."""
+    latencies_ms = np.array(latencies) * 1000
+    counts, bin_edges = np.histogram(latencies_ms, bins=nr_bins)
+    return {
+      'LATENCY_MEAN': float(latencies_ms.mean()),
+      'LATENCY_P50': float(np.percentile(latencies_ms, 50)),
+      'LATENCY_P90': float(np.percentile(latencies_ms, 90)),
+      'LATENCY_P99': float(np.percentile(latencies_ms, 99)),
+      'LATENCY_MAX': float(latencies_ms.max()),
+      'LATENCY_HISTOGRAM': {
+        'BIN_EDGES': [round(float(x), 4) for x in bin_edges],
+        'COUNTS': counts.tolist(),
+      },
+      'THROUGHPUT': float(nr_images * len(latencies) / latencies_ms.sum() * 1000),
+    }
+
   def run(self, dct_test={}, dct_params={}, _lst_images=None, kill_serving_manager=True):
     """
     TODO: big ambiguity in dct_test vs dct_params
@@ -156,10 +294,11 @@ class Base(DecentrAIObject):
       _lst_images = force the use of the given _lst_images
       kill_serving_manager = set to false in video file testing in order to not create a new manager for every movie batch
     """
-    gpu_id = 0
+    gpu_id = None
     preds = None
 
-    gpu = dct_test.get('DEFAULT_DEVICE', None)
+    device = dct_test.get('DEFAULT_DEVICE', None)
+    on_gpu = self._is_gpu_device(device)
 
     if "MAX_BATCH_FIRST_STAGE" not in dct_test:
       self.P("WARNING! Parameter 'MAX_BATCH_FIRST_STAGE' not set. Using default value 5", color='r')
@@ -171,26 +310,31 @@ class Base(DecentrAIObject):
 
     run_dct = {
       'DEFAULT_DEVICE': None,
+      'DEVICE': str(device) if on_gpu else 'cpu',
       'MODEL': None,
+      'BATCH_SIZE': batch_size,
       'TIME': None,
       'TOTAL_MEM': None,
       'INITIALIZATION_MEM': None,
+      'PEAK_RSS': None,
       'TIME_PER_IMAGE': None,
       'NUMBER_OF_IMAGES': None,
       'SUCCESS': None,
       'PREDICTS': self._nr_predicts,
-      'WARMUPS': self._nr_warmup,
+      'WARMUPS': None,
+      'WARMUP_CV': None,
       **dct_test
     }
     try:
-      # TODO Bleo: Implement cpu testing
-      if gpu is not None:
-        gpus_info = self.log.gpu_info(show=True, mb=True)[gpu_id]
-        gpu_id = [i for i, gpu_info in enumerate(gpus_info) if gpus_info['NAME'] == th.cuda.get_device_name(gpu)][0]
-
-      self.log.P("Running test for {}".format(dct_test), color='g')
-      g1 = self.log.gpu_info(show=True, mb=True)[gpu_id]
-      self.log.P("Free memory before start: {}".format(g1['FREE_MEM']))
+      self.log.P("Running test for {} on {}".format(dct_test, run_dct['DEVICE']), color='g')
+      # the memory is the free GPU memory on GPU and the resident memory on CPU
+      if on_gpu:
+        gpu_id = self._get_gpu_id(device)
+        mem_start = self._get_free_gpu_mem(gpu_id)
+        self.log.P("Free memory before start: {}".format(mem_start))
+      else:
+        mem_start = self._get_rss()
+      peak_rss = self._get_rss()
 
       upstream_config = {
         **dct_test,
@@ -203,14 +347,14 @@ class Base(DecentrAIObject):
       )
       run_dct['MODEL'] = str_model_name
 
-      g15 = self.log.gpu_info(show=True, mb=True)[gpu_id]
-      initialzation_mem = g1['FREE_MEM'] - g15['FREE_MEM']
-      run_dct['INITIALIZATION_MEM'] = initialzation_mem
+      mem_init = self._get_free_gpu_mem(gpu_id) if on_gpu else self._get_rss()
+      run_dct['INITIALIZATION_MEM'] = mem_start - mem_init if on_gpu else mem_init - mem_start
 
-      self.log.P("Model is ready. Check nvidia-smi in next {} seconds...".format(self._sleep_time))
-      sleep(self._sleep_time)
+      if self._sleep_time > 0:
+        self.log.P("Model is ready. Check the memory usage in next {} seconds...".format(self._sleep_time))
+        sleep(self._sleep_time)
 
-      self.log.P("Running warm-up predict...")
+      self.log.P("Running warm-up predicts...")
       if _lst_images is None:
         _lst_images = self.get_images(dct_test['dataset_name'])
 
@@ -218,35 +362,35 @@ class Base(DecentrAIObject):
       _lst_images = (_lst_images * np.ceil(batch_size / no_imgs).astype(int))[:max(batch_size, no_imgs)]
       run_dct['NUMBER_OF_IMAGES'] = len(_lst_images)
 
-      yolo_model_inputs = self._serving_utils.get_model_input(_lst_images)
-      for _ in range(self._nr_warmup):
-        preds = self._serving_manager.predict(self._model_name, yolo_model_inputs)
-      # endfor
-
-      if preds is None and self._nr_warmup > 0:
-        raise Exception("Error raised in predict")
+      model_inputs = self._serving_utils.get_model_input(_lst_images, input_type=self._input_type)
+      run_dct['WARMUPS'], run_dct['WARMUP_CV'] = self._warmup_until_stable(model_inputs)
+      peak_rss = max(peak_rss, self._get_rss())
 
       self.log.reset_timers()
 
       self.log.P("Running batch predict...")
-      yolo_model_inputs = self._serving_utils.get_model_input(_lst_images)
-      preds = self._serving_manager.predict(self._model_name, yolo_model_inputs)
-
-      if preds is None:
-        raise Exception("Error raised in predict")
+      latencies = []
+      preds, elapsed = self._timed_predict(model_inputs)
+      latencies.append(elapsed)
 
       for _ in range(self._nr_predicts - 1):
         random.shuffle(_lst_images)
-        yolo_model_inputs = self._serving_utils.get_model_input(_lst_images)
-        self._serving_manager.predict(self._model_name, yolo_model_inputs)
+        model_inputs = self._serving_utils.get_model_input(_lst_images, input_type=self._input_type)
+        _, elapsed = self._timed_predict(model_inputs)
+        latencies.append(elapsed)
+        peak_rss = max(peak_rss, self._get_rss())
       # endfor
 
       self._preds[len(self._preds)] = preds
 
-      g2 = self.log.gpu_info(show=True, mb=True)[gpu_id]
-      self.log.P("Free memory after run: {}".format(g2['FREE_MEM']))
-      total_model_mem = g1['FREE_MEM'] - g2['FREE_MEM']
+      if on_gpu:
+        mem_end = self._get_free_gpu_mem(gpu_id)
+        self.log.P("Free memory after run: {}".format(mem_end))
+        total_model_mem = mem_start - mem_end
+      else:
+        total_model_mem = peak_rss - mem_start
       run_dct['TOTAL_MEM'] = total_model_mem
+      run_dct['PEAK_RSS'] = peak_rss
       self.log.P("Model memory {:.0f} MB".format(total_model_mem), color='m')
 
       self.log.P("Showing results & timers...", color='g')
@@ -268,15 +412,16 @@ class Base(DecentrAIObject):
         self.log.P("Skipped showing images & inferences.")
       # endif
 
-      g3 = self.log.gpu_info(show=True, mb=True)[gpu_id]
-      self.log.P("Free memory after shutdown: {}".format(g3['FREE_MEM']))
-
       if kill_serving_manager:
         self._serving_manager.stop_server(server_name=self._model_name)
 
-      timer_prefix = 'local_pred_' if self._inprocess else 'remote_pred_'
-      run_dct['TIME'] = self.log.get_timer(timer_prefix + str_model_name.upper())['MEAN']
-      run_dct['TIME_PER_IMAGE'] = self.log.get_timer(timer_prefix + str_model_name.upper())['MEAN'] / len(_lst_images)
+      if on_gpu:
+        self.log.P("Free memory after shutdown: {}".format(self._get_free_gpu_mem(gpu_id)))
+
+      dct_stats = self._latency_stats(latencies, nr_images=len(_lst_images))
+      run_dct.update(dct_stats)
+      run_dct['TIME'] = dct_stats['LATENCY_MEAN'] / 1000
+      run_dct['TIME_PER_IMAGE'] = run_dct['TIME'] / len(_lst_images)
       run_dct['SUCCESS'] = True
     except:
       run_dct['SUCCESS'] = False
@@ -286,12 +431,21 @@ class Base(DecentrAIObject):
         self.log.P("Inference error: {}".format(info), color='r')
     # endtry
 
+    self._runs.append(run_dct)
     for k, v in run_dct.items():
+      if k == 'LATENCY_HISTOGRAM':
+        # the histograms are only in the json report
+        continue
       if k not in self._dct_res:
-        self._dct_res[k] = []
+        self._dct_res[k] = [None] * (len(self._runs) - 1)
       self._dct_res[k].append(v)
+    for k, v in self._dct_res.items():
+      if len(v) < len(self._runs):
+        v.append(None)
+    # endfor
 
-    th.cuda.empty_cache()
+    if th is not None and th.cuda.is_available():
+      th.cuda.empty_cache()
     return preds
 
   def get_results(self):
@@ -309,7 +463,8 @@ class Base(DecentrAIObject):
     return self._testing_subfolder_path_helper()
 
   def _testing_subfolder_path_helper(self, skip_subdirs=False):
-    res = os.path.join('testing', self.log.file_prefix, self.__name__, self._model_name)
+    model_name = self._model_name if isinstance(self._model_name, (list, tuple)) else [self._model_name]
+    res = os.path.join('testing', self.log.file_prefix, self.__name__, *model_name)
     if not skip_subdirs and len(self.subdir_keys) > 0:
       values = [self.current_dct_params.get(key) for key in self.subdir_keys if key in self.current_dct_params]
       str_values = [str(value) for value in values]
@@ -323,6 +478,31 @@ class Base(DecentrAIObject):
     self.log.save_dataframe(df, df_name, folder='output',
                             subfolder_path=self._testing_subfolder_path_helper(skip_subdirs=True))
 
+  def get_report(self):
+    """The results of all the runs, with the latency histograms, as a json serializable dict."""
+    model_name = self._model_name if isinstance(self._model_name, str) else list(self._model_name)
+    report = {
+      'MACHINE': self.log.get_machine_name(),
+      'MODEL_NAME': model_name,
+      'DATA_LOADING': self._load_stats,
+      'RUNS': self._runs,
+    }
+    return json.loads(json.dumps(report, default=str))
+
+  def save_report(self, path=None):
+    """
+    Save the json report of the runs, by default next to `results.csv`. The keys are sorted
+    so the reports of different commits can be diffed.
+    """
+    if path is None:
+      folder = os.path.join(self.log.get_output_folder(), self._testing_subfolder_path_helper(skip_subdirs=True))
+      os.makedirs(folder, exist_ok=True)
+      path = os.path.join(folder, 'report.json')
+    with open(path, 'w') as fh:
+      json.dump(self.get_report(), fh, indent=2, sort_keys=True)
+    self.P("Saved report to {}".format(path))
+    return path
+
   def run_tests(self, lst_tests, dct_params, save_results=True):
     # TODO: big ambiguity between lists of test dicts and dct_params
     for dataset_name in self.get_dataset_names():
@@ -334,6 +514,7 @@ class Base(DecentrAIObject):
     self.show_results()
     if save_results:
       self.save_results()
+      self.save_report()
     return self.get_results()
 
   def plot(self, dataset_name, **kwargs):
@@ -371,35 +552,95 @@ class Base(DecentrAIObject):
   def get_model_name(self):
     return self._model_name
 
-  def run_video_test(self, video_fn, test_params={}, flip_video=False, movie_batch_size=50, plot_video_kwargs={}):
+  def _video_batches_reader(self, cap, batch_size, flip_video, batches_queue, stop_event, dct_timings):
+    """Decode the video on a background thread, putting the batches of frames in a bounded queue."""
+    def put(item):
+      while not stop_event.is_set():
+        try:
+          batches_queue.put(item, timeout=0.1)
+          return True
+        except queue.Full:
+          pass
+      # endwhile
+      return False
+
+    try:
+      batch = []
+      while not stop_event.is_set():
+        start = perf_counter()
+        flag, frame = cap.read()
+        if not flag or frame is None:
+          break
+        if flip_video is not False:
+          frame = cv2.rotate(frame, flip_video)
+        frame_rgb = np.ascontiguousarray(frame[:, :, ::-1])
+        dct_timings['DECODE_TIME'] += perf_counter() - start
+        batch.append(frame_rgb)
+        if len(batch) == batch_size:
+          if not put(batch):
+            return
+          batch = []
+      # endwhile
+      if len(batch) > 0:
+        put(batch)
+    except Exception as exc:
+      put(exc)
+      return
+    put(None)
+    return
+
+  def _iter_video_batches(self, cap, batch_size, flip_video, prefetch_batches, dct_timings):
     """
+    Yield the batches of frames of the video as they are decoded, with at most
+    `prefetch_batches` decoded batches waiting in memory.
+    """
+    batches_queue = queue.Queue(maxsize=max(prefetch_batches, 1))
+    stop_event = threading.Event()
+    reader = threading.Thread(
+      target=self._video_batches_reader,
+      args=(cap, batch_size, flip_video, batches_queue, stop_event, dct_timings),
+      daemon=True,
+    )
+    reader.start()
+    try:
+      while True:
+        start = perf_counter()
+        batch = batches_queue.get()
+        dct_timings['DECODE_WAIT_TIME'] += perf_counter() - start
+        if batch is None:
+          break
+        if isinstance(batch, Exception):
+          raise batch
+        yield batch
+      # endwhile
+    finally:
+      stop_event.set()
+      reader.join()
+    return
+
+  def run_video_test(self, video_fn, test_params={}, flip_video=False, movie_batch_size=50, plot_video_kwargs={},
+                     prefetch_batches=2):
+    """
+    Run the model on the video, batch by batch, while the next batches are decoded on a
+    background thread, so the memory does not grow with the length of the video.
 
     :param video_fn:
     :param flip_video:
       False - nothing happens
       Rotate code - passed to cv2.rotate
     :param movie_batch_size:
-    :return:
+    :param prefetch_batches:
+      The maximum number of decoded batches waiting for inference
+    :return: dict
+      The number of frames and batches, the decode and the inference times. `DECODE_WAIT_TIME`
+      is the time the inference waited for decoded frames.
     """
     cap = cv2.VideoCapture(video_fn)
     while not cap.isOpened():
       cap = cv2.VideoCapture(video_fn)
 
-    frames = []
     fps = cap.get(cv2.CAP_PROP_FPS)
-    pos_frame = cap.get(cv2.CAP_PROP_POS_FRAMES)
-    while True:
-      flag, frame = cap.read()
-      if flip_video is not False:
-        frame = cv2.rotate(frame, flip_video)
-      frame_rgb = frame[:, :, ::-1]
-      frame_rgb = np.ascontiguousarray(frame_rgb)
-      frames.append(frame_rgb)
-
-      if cap.get(cv2.CAP_PROP_POS_FRAMES) == cap.get(cv2.CAP_PROP_FRAME_COUNT):
-          # If the number of captured frames is equal to the total number of frames,
-          # we stop
-        break
+    nr_batches_estimate = int(np.ceil(cap.get(cv2.CAP_PROP_FRAME_COUNT) / movie_batch_size))
 
     output_video_file = '{}_{}'.format(self.log.file_prefix, os.path.split(video_fn)[-1])
 
@@ -412,28 +653,59 @@ class Base(DecentrAIObject):
 
     output_video_fn = os.path.join(output_video_folder, output_video_file)
 
-    cv2_video_writer = cv2.VideoWriter(
-      output_video_fn,
-      cv2.VideoWriter_fourcc(*"XVID"),
-      fps,
-      (frames[0].shape[1], frames[0].shape[0])
+    cv2_video_writer = None
+    dct_timings = {'DECODE_TIME': 0, 'DECODE_WAIT_TIME': 0, 'INFERENCE_TIME': 0}
+    nr_frames = 0
+    nr_batches = 0
+    start_time = perf_counter()
+    # the server is started once and each batch is predicted once
+    self._serving_manager.start_server(
+      server_name=self._model_name,
+      inprocess=self._inprocess,
+      upstream_config={**test_params, "MAX_BATCH_FIRST_STAGE": 5},
     )
+    try:
+      for batch in self._iter_video_batches(cap, movie_batch_size, flip_video, prefetch_batches, dct_timings):
+        nr_batches += 1
+        nr_frames += len(batch)
+        if cv2_video_writer is None:
+          cv2_video_writer = cv2.VideoWriter(
+            output_video_fn,
+            cv2.VideoWriter_fourcc(*"XVID"),
+            fps,
+            (batch[0].shape[1], batch[0].shape[0])
+          )
+        self.P("Processing movie batch {}/{}".format(nr_batches, nr_batches_estimate))
+        model_inputs = self._serving_utils.get_model_input(batch, input_type=self._input_type)
+        batch_results, elapsed = self._timed_predict(model_inputs)
+        dct_timings['INFERENCE_TIME'] += elapsed
+        self.plot_video(
+          cv2_video_writer=cv2_video_writer,
+          lst_imgs=batch,
+          preds=batch_results,
+          **plot_video_kwargs
+        )
+      # endfor batches
+    finally:
+      cap.release()
+      if cv2_video_writer is not None:
+        cv2_video_writer.release()
+      self._serving_manager.stop_server(server_name=self._model_name)
+    # endtry
 
-    for batch_id in range(len(frames) // movie_batch_size):
-      self.P("Processing movie batch {}/{}".format(batch_id + 1, len(frames) // movie_batch_size))
-      batch = frames[batch_id * movie_batch_size: (batch_id + 1) * movie_batch_size]
-      batch_results = self.run(dct_test={**test_params, "MAX_BATCH_FIRST_STAGE": 5},
-                               _lst_images=batch, kill_serving_manager=False)
-      self.plot_video(
-        cv2_video_writer=cv2_video_writer,
-        lst_imgs=batch,
-        preds=batch_results,
-        **plot_video_kwargs
-      )
-    cv2_video_writer.release()
-
-    a = 0
-
+    dct_report = {
+      'VIDEO': video_fn,
+      'FRAMES': nr_frames,
+      'BATCHES': nr_batches,
+      'TOTAL_TIME': perf_counter() - start_time,
+      **dct_timings,
+      # decode and inference overlap, the slower one sets the pace
+      'BOTTLENECK': 'DECODE' if dct_timings['DECODE_TIME'] > dct_timings['INFERENCE_TIME'] else 'INFERENCE',
+    }
+    self.P("Video test: {} frames in {} batches, decode {:.2f}s, inference {:.2f}s, waited for decode {:.2f}s".format(
+      nr_frames, nr_batches, dct_timings['DECODE_TIME'], dct_timings['INFERENCE_TIME'], dct_timings['DECODE_WAIT_TIME']
+    ), color='g')
+    return dct_report
 
 if __name__ == '__main__':
   from naeural_core import Logger
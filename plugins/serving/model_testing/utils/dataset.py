@@ -1,20 +1,72 @@
 import os
 import cv2
+import hashlib
 import numpy as np
 
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
 from naeural_core import DecentrAIObject
 from naeural_core import Logger
 
 class Dataset(DecentrAIObject):
-  def __init__(self, **kwargs):
+  def __init__(self, nr_workers=None, cache_folder=None, target_size=None, **kwargs):
+    """
+    :param nr_workers: int
+      The number of threads decoding the images, by default min(8, cpu count)
+
+    :param cache_folder: str
+      Optional folder of the decoded (and resized) images, saved as `.npy` files keyed by the
+      file path, its modification time and the target size
+
+    :param target_size: tuple
+      Optional (width, height) the images are resized to
+    """
+    self.log = kwargs.get('log')
+    self._nr_workers = nr_workers or min(8, os.cpu_count() or 1)
+    self._cache_folder = cache_folder
+    self._target_size = tuple(target_size) if target_size is not None else None
+    self.last_load_stats = {}
     return
 
   def _load_image(self, path):
     img_bgr = cv2.imread(path)
+    if img_bgr is None:
+      raise ValueError("Failed to decode test image: {}".format(path))
+    if self._target_size is not None:
+      img_bgr = cv2.resize(img_bgr, self._target_size)
     img_rgb = img_bgr[:, :, ::-1]
     img = np.ascontiguousarray(img_rgb)
     return img
 
+  def _get_cache_path(self, path):
+    key = '{}|{}|{}'.format(os.path.abspath(path), os.stat(path).st_mtime_ns, self._target_size)
+    return os.path.join(self._cache_folder, hashlib.sha1(key.encode()).hexdigest() + '.npy')
+
+  def _load_image_cached(self, path):
+    """Returns the image and whether it was found in the cache."""
+    if self._cache_folder is None:
+      return self._load_image(path), False
+    cache_path = self._get_cache_path(path)
+    if os.path.isfile(cache_path):
+      # read in memory, a memory map would keep a file open for each image of the dataset
+      try:
+        return np.load(cache_path), True
+      except (ValueError, EOFError) as exc:
+        # a truncated or corrupted cache file is decoded again, the OS errors are raised
+        if self.log is not None:
+          self.log.P("Invalid cache file {} for {}: {}".format(cache_path, path, exc), color='r')
+    # endif cached
+    img = self._load_image(path)
+    try:
+      tmp_path = '{}.{}.tmp.npy'.format(cache_path[:-len('.npy')], os.getpid())
+      np.save(tmp_path, img)
+      os.replace(tmp_path, cache_path)
+    except Exception as exc:
+      if self.log is not None:
+        self.log.P("Failed to cache {}: {}".format(path, exc), color='r')
+    return img, False
+
   def load_images(self, paths):
     assert isinstance(paths, list)
     paths = [
@@ -26,19 +78,35 @@ class Dataset(DecentrAIObject):
     if sum(check_files) != len(check_files):
       raise ValueError("Failed to find test images: {}".format(missing))
 
-    imgs = []
-    for path in paths:
-      img = self._load_image(path)
-      # name = os.path.basename(path)
-      imgs.append(img)
-    #endfor
+    if self._cache_folder is not None:
+      os.makedirs(self._cache_folder, exist_ok=True)
+    start = perf_counter()
+    # cv2 releases the GIL while decoding, so the images are decoded in parallel
+    with ThreadPoolExecutor(max_workers=self._nr_workers, thread_name_prefix='dataset_load') as executor:
+      results = list(executor.map(self._load_image_cached, paths))
+    imgs = [img for img, _ in results]
+    nr_cache_hits = sum(cached for _, cached in results)
+    if self._cache_folder is None:
+      mode = 'NO_CACHE'
+    elif nr_cache_hits == len(paths):
+      mode = 'WARM'
+    elif nr_cache_hits == 0:
+      mode = 'COLD'
+    else:
+      mode = 'PARTIAL'
+    self.last_load_stats = {
+      'NR_IMAGES': len(paths),
+      'LOAD_TIME': perf_counter() - start,
+      'CACHE_HITS': nr_cache_hits,
+      'MODE': mode,
+    }
     return imgs
 
   def load_images_from_folder(self, path):
     if not os.path.isdir(path):
       raise ValueError('Provided path is not a directory! Please check `{}`'.format(path))
 
-    files = os.listdir(path)
+    files = [os.path.join(path, fn) for fn in sorted(os.listdir(path))]
     lst = self.load_images(files)
     return lst
 
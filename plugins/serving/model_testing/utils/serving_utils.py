@@ -4,7 +4,17 @@ class ServingUtils(DecentrAIObject):
   def __init__(self, **kwargs):
     return
 
-  def get_model_input(self, lst_imgs):
+  def get_model_input(self, lst_imgs, input_type='IMG'):
+    """
+    Build the serving inputs of a single test stream.
+
+    :param lst_imgs: list
+      The images, or the structured data when `input_type` is 'STRUCT_DATA'
+
+    :param input_type: str
+      'IMG' or 'STRUCT_DATA'
+    """
+    is_img = input_type == 'IMG'
     inputs = [
       {
         "STREAM_NAME": "TEST",
@@ -14,9 +24,9 @@ class ServingUtils(DecentrAIObject):
         },
         "INPUTS": [
           {
-            "TYPE": "IMG",
-            "IMG": x,
-            "STRUCT_DATA": None,
+            "TYPE": input_type,
+            "IMG": x if is_img else None,
+            "STRUCT_DATA": None if is_img else x,
             "INIT_DATA": None,
             "METADATA": {}
           } for x in lst_imgs
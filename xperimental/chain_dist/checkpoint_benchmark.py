@@ -0,0 +1,87 @@
+"""
+Benchmark of the chain dist checkpoint time against the size of the collected data.
+
+The full save pickles the whole state to a file after every step, as the previous
+`BaseChainDistPlugin.__save_state` did with `persistence_serialization_save`. The incremental
+save goes through `_ChainDistCheckpointMixin`, appending only the new data to the log and
+compacting it from time to time.
+"""
+import os
+import pickle
+import shutil
+import tempfile
+from time import perf_counter
+
+from extensions.business.mixins.chain_dist_checkpoint_mixin import _ChainDistCheckpointMixin
+
+
+N_SHARDS = 4
+N_STEPS = 10_000
+REPORT_EVERY = 2_000
+
+
+class Checkpointer(_ChainDistCheckpointMixin):
+  pass
+
+
+def make_batch(step):
+  return {'step': step, 'inferences': [{'TYPE': 'person', 'PROB_PRC': 0.9, 'TLBR_POS': [step, 1, 2, 3]}] * 3}
+
+
+def save_full(path, meta, dct_lists):
+  with open(path, 'wb') as fh:
+    pickle.dump({'meta': meta, 'lists': dct_lists}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+  return
+
+
+def run(mode, folder):
+  meta = {'step': 0, 'jobs': {job_id: {'progress': 0} for job_id in range(N_SHARDS)}}
+  dct_lists = {('jobs', job_id): [] for job_id in range(N_SHARDS)}
+  checkpointer = Checkpointer()
+  checkpointer._checkpoint_init(folder)
+  full_path = os.path.join(folder, 'full_state.pkl')
+
+  results = []
+  elapsed = 0
+  for step in range(1, N_STEPS + 1):
+    job_id = step % N_SHARDS
+    meta['step'] = step
+    meta['jobs'][job_id]['progress'] = 100 * step // N_STEPS
+    dct_lists[('jobs', job_id)].append(make_batch(step))
+
+    start = perf_counter()
+    if mode == 'full':
+      save_full(full_path, meta, dct_lists)
+    else:
+      checkpointer._checkpoint_save(meta, dct_lists)
+    elapsed += perf_counter() - start
+
+    if step % REPORT_EVERY == 0:
+      results.append((step, elapsed / REPORT_EVERY * 1000))
+      elapsed = 0
+  # endfor steps
+  checkpointer._checkpoint_close()
+  return results
+
+
+def main():
+  results = {}
+  for mode in ['full', 'incremental']:
+    folder = tempfile.mkdtemp(prefix='chain_dist_checkpoint_')
+    try:
+      results[mode] = run(mode, folder)
+    finally:
+      shutil.rmtree(folder)
+  # endfor modes
+
+  print(f"{'collected batches':>18} | {'full save (ms)':>15} | {'incremental save (ms)':>22}")
+  for (step, full_ms), (_, incremental_ms) in zip(results['full'], results['incremental']):
+    print(f"{step:>18} | {full_ms:>15.3f} | {incremental_ms:>22.3f}")
+  total_full = sum(ms for _, ms in results['full']) * REPORT_EVERY / 1000
+  total_incremental = sum(ms for _, ms in results['incremental']) * REPORT_EVERY / 1000
+  print(f"Total checkpoint time for {N_STEPS} steps: full {total_full:.2f}s, incremental {total_incremental:.2f}s")
+  return
+
+
+if __name__ == '__main__':
+  main()
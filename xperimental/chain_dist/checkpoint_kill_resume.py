@@ -0,0 +1,154 @@
+"""
+Kill-and-resume check of the chain dist incremental checkpointing (`_ChainDistCheckpointMixin`).
+
+A child process runs a deterministic fake chain dist job (4 shards receiving data batches, with
+the job states and progress in the metadata) and checkpoints after every step, as the
+`BaseChainDistPlugin` state machines do. The child is killed with SIGKILL at a random moment,
+the state is recovered and compared with the state of the job replayed in memory up to the
+recovered step. Small compaction sizes are used, so the kills also hit the compactions.
+"""
+import os
+import random
+import shutil
+import tempfile
+import multiprocessing as mp
+from time import sleep
+
+from extensions.business.mixins.chain_dist_checkpoint_mixin import _ChainDistCheckpointMixin
+
+
+N_SHARDS = 4
+N_STEPS = 200_000
+N_KILLS = 20
+
+
+class Checkpointer(_ChainDistCheckpointMixin):
+  pass
+
+
+def new_state():
+  meta = {
+    'step': 0,
+    'chain_dist_state': 'DISTRIBUTE_JOBS',
+    'jobs': {job_id: {'progress': 0, 'state': 'JOB_PROGRESS', 'node': f'node_{job_id}'} for job_id in range(N_SHARDS)},
+    'collected_data': {},
+  }
+  dct_lists = {('jobs', job_id): [] for job_id in range(N_SHARDS)}
+  return meta, dct_lists
+
+
+def do_step(meta, dct_lists):
+  """One deterministic step of the fake job."""
+  step = meta['step'] + 1
+  meta['step'] = step
+  job_id = step % N_SHARDS
+  job = meta['jobs'][job_id]
+  if step % 7 == 0:
+    # a payload without data only updates the progress
+    job['progress'] = min(100, job['progress'] + 1)
+  else:
+    dct_lists[('jobs', job_id)].append({'step': step, 'inferences': [step * i for i in range(5)]})
+  if step % 997 == 0:
+    # a shard restarted on another node gets a new data list
+    job['node'] = f'node_{step}'
+    job['progress'] = 0
+    dct_lists[('jobs', job_id)] = []
+  if step % 1501 == 0:
+    # a finished shard moves its data to the collected data
+    dct_lists[('collected_data', job_id)] = dct_lists.pop(('jobs', job_id))
+    dct_lists[('jobs', job_id)] = []
+  return
+
+
+def run_job(folder, compaction_min_size):
+  checkpointer = Checkpointer()
+  checkpointer._checkpoint_init(folder, compaction_min_size=compaction_min_size)
+  meta, dct_lists = checkpointer._checkpoint_load()
+  if meta is None:
+    meta, dct_lists = new_state()
+  else:
+    checkpointer._checkpoint_start(meta, dct_lists)
+  for _ in range(N_STEPS):
+    do_step(meta, dct_lists)
+    checkpointer._checkpoint_save(meta, dct_lists)
+  return
+
+
+def expected_state(nr_steps):
+  meta, dct_lists = new_state()
+  for _ in range(nr_steps):
+    do_step(meta, dct_lists)
+  return meta, dct_lists
+
+
+def check_kill_and_resume(folder, compaction_min_size, rng):
+  last_step = 0
+  for kill_idx in range(N_KILLS):
+    process = mp.Process(target=run_job, args=(folder, compaction_min_size))
+    process.start()
+    sleep(rng.uniform(0.05, 0.3))
+    process.kill()
+    process.join()
+
+    checkpointer = Checkpointer()
+    checkpointer._checkpoint_init(folder, compaction_min_size=compaction_min_size)
+    meta, dct_lists = checkpointer._checkpoint_load()
+    if meta is None:
+      continue
+    assert meta['step'] >= last_step, "The recovered state went back in time"
+    expected_meta, expected_lists = expected_state(meta['step'])
+    assert meta == expected_meta, f"Metadata differs at step {meta['step']}"
+    assert dct_lists == expected_lists, f"Collected data differs at step {meta['step']}"
+    last_step = meta['step']
+  # endfor kills
+  return last_step
+
+
+def check_torn_tail(folder):
+  checkpointer = Checkpointer()
+  checkpointer._checkpoint_init(folder)
+  meta, dct_lists = new_state()
+  for _ in range(100):
+    do_step(meta, dct_lists)
+    checkpointer._checkpoint_save(meta, dct_lists)
+  checkpointer._checkpoint_close()
+  with open(os.path.join(folder, 'wal.log'), 'ab') as fh:
+    fh.write(b'\x80\x05\x95half a frame')
+
+  checkpointer = Checkpointer()
+  checkpointer._checkpoint_init(folder)
+  recovered_meta, recovered_lists = checkpointer._checkpoint_load()
+  assert (recovered_meta, recovered_lists) == (meta, dct_lists)
+  # the saves after the recovery are appended after the last valid frame
+  checkpointer._checkpoint_start(recovered_meta, recovered_lists)
+  do_step(recovered_meta, recovered_lists)
+  checkpointer._checkpoint_save(recovered_meta, recovered_lists)
+  checkpointer._checkpoint_close()
+  checkpointer = Checkpointer()
+  checkpointer._checkpoint_init(folder)
+  assert checkpointer._checkpoint_load() == expected_state(101)
+  return
+
+
+def main():
+  rng = random.Random(42)
+  for compaction_min_size in [1 << 12, 1 << 20]:
+    folder = tempfile.mkdtemp(prefix='chain_dist_checkpoint_')
+    try:
+      last_step = check_kill_and_resume(folder, compaction_min_size, rng)
+    finally:
+      shutil.rmtree(folder)
+    print(f"{N_KILLS} kills with compaction at {compaction_min_size} bytes: resumed state identical, reached step {last_step}")
+  # endfor compaction sizes
+
+  folder = tempfile.mkdtemp(prefix='chain_dist_checkpoint_')
+  try:
+    check_torn_tail(folder)
+  finally:
+    shutil.rmtree(folder)
+  print("Torn tail check passed")
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,113 @@
+"""
+Benchmark of the chain dist video split modes on a generated synthetic video.
+
+- the current split: `FFMPEGUtils.split_video_file`, then one `no_frames` probe per shard
+- the keyframe aligned split: one packet probe, cuts on the keyframes nearest the (weighted)
+  targets and one stream copy run of the ffmpeg segment muxer
+
+Needs ffmpeg/ffprobe in the PATH and the node runtime (naeural_core) for the current split.
+
+Usage:
+  python -m xperimental.chain_dist.keyframe_split_benchmark --duration 120 --shards 8
+"""
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from time import time
+
+from extensions.business.mixins.chain_dist_split_mixin import _ChainDistSplitMixin
+
+
+class Splitter(_ChainDistSplitMixin):
+  cfg_shard_transfer_workers = 4
+  cfg_shard_transfer_retries = 0
+
+  os_path = os.path
+
+  def P(self, msg, **kwargs):
+    print(msg)
+    return
+
+  def get_stream_id(self):
+    return 'keyframe_split_benchmark'
+
+
+def generate_video(path, duration, fps=25, gop=50):
+  cmd = [
+    'ffmpeg', '-v', 'error', '-y',
+    '-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate={fps}:duration={duration}',
+    '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+    '-c:v', 'libx264', '-preset', 'veryfast', '-g', str(gop), '-c:a', 'aac', '-shortest', path,
+  ]
+  subprocess.run(cmd, check=True)
+  return
+
+
+def ffprobe_json(args, path):
+  cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0'] + args + ['-of', 'json', path]
+  return json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout)
+
+
+def shard_info(path):
+  # the packets are counted on the whole file, the flags are read only for the first packet
+  nr_packets = int(ffprobe_json(['-count_packets', '-show_entries', 'stream=nb_read_packets'], path)['streams'][0]['nb_read_packets'])
+  first_packet = ffprobe_json(['-show_entries', 'packet=flags', '-read_intervals', '%+#1'], path)['packets'][0]
+  return nr_packets, 'K' in first_packet['flags']
+
+
+def run(video_file, nr_shards, keyframe_aligned, weights=None):
+  splitter = Splitter()
+  start = time()
+  dct_ret = splitter._split_video_file(
+    video_file=video_file,
+    no_shards=nr_shards,
+    upload=False,
+    keyframe_aligned=keyframe_aligned,
+    weights=weights,
+  )
+  elapsed = time() - start
+  output_path = os.path.join(os.path.dirname(video_file), os.path.splitext(os.path.basename(video_file))[0] + '_shards')
+  infos = [shard_info(os.path.join(output_path, file_path)) for file_path in dct_ret['output_files']]
+  shutil.rmtree(output_path)
+  return elapsed, dct_ret, infos
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--duration', type=int, default=120)
+  parser.add_argument('--shards', type=int, default=8)
+  args = parser.parse_args()
+
+  folder = tempfile.mkdtemp(prefix='keyframe_split_')
+  try:
+    video_file = os.path.join(folder, 'synthetic.mp4')
+    generate_video(video_file, args.duration)
+    total_frames, _ = shard_info(video_file)
+    print(f"Synthetic video: {args.duration}s, {total_frames} frames, {args.shards} shards")
+
+    weights = [1 + (idx % 3) for idx in range(args.shards)]
+    for label, keyframe_aligned, shard_weights in [
+      ('current split', False, None),
+      ('keyframe split', True, None),
+      ('weighted keyframe split', True, weights),
+    ]:
+      elapsed, dct_ret, infos = run(video_file, args.shards, keyframe_aligned, shard_weights)
+      probed_frames = [nr_frames for nr_frames, _ in infos]
+      on_keyframes = all(first_is_keyframe for _, first_is_keyframe in infos)
+      print(f"{label:<24} {elapsed:6.2f}s | frames {dct_ret['video_frames']} | probed {probed_frames} | "
+            f"all shards start on keyframes: {on_keyframes}")
+      if keyframe_aligned:
+        assert dct_ret['errors'] == [], dct_ret['errors']
+        assert dct_ret['video_frames'] == probed_frames, "The frames from the single probe differ from the shards"
+        assert sum(probed_frames) == total_frames and on_keyframes
+    # endfor modes
+  finally:
+    shutil.rmtree(folder)
+  return
+
+
+if __name__ == '__main__':
+  main()
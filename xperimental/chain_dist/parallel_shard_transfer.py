@@ -0,0 +1,144 @@
+"""
+Serial vs parallel chain dist shard transfers against a local file server stand-in.
+
+The server adds an artificial latency to each request and fails the first upload of some shards,
+so the per-shard retries are exercised. The shards are uploaded and downloaded one at a time,
+as the split and merge mixins used to do, and then through `_ChainDistParallelMixin`.
+"""
+import os
+import shutil
+import tempfile
+import threading
+from time import sleep, time
+from urllib.request import Request, urlopen
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from extensions.business.mixins.chain_dist_parallel_mixin import _ChainDistParallelMixin
+
+
+N_SHARDS = 16
+SHARD_SIZE = 256 * 1024  # bytes
+LATENCY = 0.25  # seconds per request
+FAILING_SHARDS = {3, 11}  # the first upload of these shards fails
+
+
+class FileServer(BaseHTTPRequestHandler):
+  files = {}
+  failed_once = set()
+  lock = threading.Lock()
+
+  def log_message(self, format, *args):
+    return
+
+  def do_PUT(self):
+    sleep(LATENCY)
+    body = self.rfile.read(int(self.headers['Content-Length']))
+    shard_idx = int(os.path.basename(self.path).split('_')[1].split('.')[0])
+    with self.lock:
+      fail = shard_idx in FAILING_SHARDS and self.path not in self.failed_once
+      if fail:
+        self.failed_once.add(self.path)
+      else:
+        self.files[self.path] = body
+    self.send_response(500 if fail else 200)
+    self.end_headers()
+    return
+
+  def do_GET(self):
+    sleep(LATENCY)
+    body = self.files.get(self.path)
+    self.send_response(200 if body is not None else 404)
+    self.end_headers()
+    if body is not None:
+      self.wfile.write(body)
+    return
+
+
+class ShardTransfer(_ChainDistParallelMixin):
+  """Host with the upload and download of the split and merge mixins, against the stand-in."""
+  def __init__(self, url, workers, retries=2):
+    super(ShardTransfer, self).__init__()
+    self.url = url
+    self.cfg_shard_transfer_workers = workers
+    self.cfg_shard_transfer_retries = retries
+    return
+
+  def P(self, msg, **kwargs):
+    return
+
+  def upload_file(self, file_path, target_path):
+    with open(file_path, 'rb') as fh:
+      data = fh.read()
+    url = f"{self.url}/{target_path}"
+    urlopen(Request(url, data=data, method='PUT')).close()
+    return url, None
+
+  def download_file(self, url, local_path):
+    with urlopen(url) as response, open(local_path, 'wb') as fh:
+      fh.write(response.read())
+    return local_path
+
+
+def main():
+  server = ThreadingHTTPServer(('127.0.0.1', 0), FileServer)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  url = f"http://127.0.0.1:{server.server_address[1]}"
+  folder = tempfile.mkdtemp(prefix='chain_dist_shards_')
+  try:
+    shards = []
+    for idx in range(N_SHARDS):
+      path = os.path.join(folder, f'shard_{idx}.mp4')
+      with open(path, 'wb') as fh:
+        fh.write(os.urandom(SHARD_SIZE))
+      shards.append(path)
+    # endfor shards
+
+    for workers in [1, 8]:
+      FileServer.files.clear()
+      FileServer.failed_once.clear()
+      transfer = ShardTransfer(url, workers=workers)
+      progress = []
+
+      start = time()
+      urls = transfer._parallel_shard_map(
+        func=lambda path: transfer.upload_file(path, f"ChainDist/{workers}/{os.path.basename(path)}")[0],
+        items=shards,
+        description='UPLOAD',
+        progress_callback=lambda stage, done, total: progress.append((stage, done, total)),
+        retry_delay=0.1,
+      )
+      upload_time = time() - start
+
+      start = time()
+      downloaded = transfer._parallel_shard_map(
+        func=lambda shard_url: transfer.download_file(shard_url, os.path.join(folder, f"down_{workers}_{os.path.basename(shard_url)}")),
+        items=urls,
+        description='DOWNLOAD',
+        progress_callback=lambda stage, done, total: progress.append((stage, done, total)),
+      )
+      download_time = time() - start
+
+      for original, copy in zip(shards, downloaded):
+        with open(original, 'rb') as fh_original, open(copy, 'rb') as fh_copy:
+          assert fh_original.read() == fh_copy.read(), f"{copy} differs from {original}"
+      assert progress[-1] == ('DOWNLOAD', N_SHARDS, N_SHARDS) and len(progress) == 2 * N_SHARDS
+      print(f"{workers} worker(s): upload {upload_time:5.2f}s, download {download_time:5.2f}s "
+            f"for {N_SHARDS} shards with {LATENCY}s latency and {len(FAILING_SHARDS)} retried uploads")
+    # endfor workers
+
+    # a shard failing all its retries fails the whole map
+    transfer = ShardTransfer(url, workers=4, retries=1)
+    try:
+      transfer._parallel_shard_map(func=lambda shard_url: transfer.download_file(shard_url + '_missing', os.devnull), items=urls, retry_delay=0)
+      raise AssertionError("The missing shards should fail")
+    except Exception as exc:
+      assert 'HTTP Error 404' in str(exc), exc
+    print("Failing shards check passed")
+  finally:
+    server.shutdown()
+    shutil.rmtree(folder)
+  return
+
+
+if __name__ == '__main__':
+  main()
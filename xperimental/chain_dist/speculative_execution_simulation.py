@@ -0,0 +1,158 @@
+"""
+Simulation of the chain dist speculative re-execution of straggler shards.
+
+Four fake workers process one shard each and report their progress every second. One of them
+stalls at 50% while still sending heartbeats, so it is never declared failed. The stragglers are
+detected with `_ChainDistSpeculationMixin._find_straggler_jobs` (as in
+`BaseChainDistPlugin.__maybe_start_speculative_jobs`), a copy is started on an idle node, the
+copy or the original that closes first is accepted and the other one is stopped.
+"""
+from extensions.business.mixins.chain_dist_speculation_mixin import _ChainDistSpeculationMixin
+
+
+SHARD_SIZE = 100  # units of work
+WORKER_SPEED = 1.0  # units per second
+SPECULATION_MIN_ELAPSED = 30
+SPECULATION_PROGRESS_LAG = 30
+SPECULATION_MAX_COPIES = 2
+MAX_TIME = 1000
+
+
+class Speculator(_ChainDistSpeculationMixin):
+  pass
+
+
+class FakeWorker:
+  def __init__(self, node, start_time, stall_at=None, stall_for=None):
+    self.node = node
+    self.start_time = start_time
+    self.stall_at = stall_at
+    self.stall_for = stall_for  # None stalls forever
+    self.done = 0
+    self.stalled_time = 0
+    self.stopped = False
+    return
+
+  def step(self, dt):
+    if self.stopped or self.done >= SHARD_SIZE:
+      return
+    stalled = self.stall_at is not None and self.done >= self.stall_at * SHARD_SIZE / 100
+    if stalled and (self.stall_for is None or self.stalled_time < self.stall_for):
+      self.stalled_time += dt
+      return
+    self.done = min(SHARD_SIZE, self.done + WORKER_SPEED * dt)
+    return
+
+  @property
+  def progress(self):
+    return 100 * self.done / SHARD_SIZE
+
+
+def simulate(speculation: bool, stall_for=None, dt=1.0):
+  """
+  Run the jobs until all of them close.
+
+  Returns
+  -------
+  (makespan, winners, stopped) : tuple
+      The makespan (None if some job never closes), the node whose result was accepted for
+      each job and the nodes that were stopped.
+  """
+  speculator = Speculator()
+  now = 0.0
+  jobs = {
+    job_id: FakeWorker(f'node_{job_id}', now)
+    for job_id in range(4)
+  }
+  jobs[2].stall_at = 50
+  jobs[2].stall_for = stall_for
+  idle_nodes = ['spare_node_0', 'spare_node_1']
+  copies = {}
+  winners = {}
+  stopped = []
+
+  while len(winners) < len(jobs) and now < MAX_TIME:
+    now += dt
+    for worker in list(jobs.values()) + list(copies.values()):
+      worker.step(dt)
+
+    # accept the result that closes first, stop the other one
+    for job_id, worker in jobs.items():
+      if job_id in winners:
+        continue
+      copy = copies.get(job_id)
+      if worker.progress >= 100:
+        winners[job_id] = worker.node
+        if copy is not None:
+          copy.stopped = True
+          stopped.append(copies.pop(job_id).node)
+      elif copy is not None and copy.progress >= 100:
+        winners[job_id] = copy.node
+        worker.stopped = True
+        stopped.append(worker.node)
+        copies.pop(job_id)
+    # endfor jobs
+
+    if not speculation:
+      continue
+    nr_free_copies = SPECULATION_MAX_COPIES - len(copies)
+    dct_job_progress = {
+      job_id: 100 if job_id in winners else worker.progress
+      for job_id, worker in jobs.items()
+    }
+    dct_job_elapsed = {
+      job_id: now - worker.start_time
+      for job_id, worker in jobs.items()
+      if job_id not in winners and job_id not in copies and not getattr(worker, 'speculated', False)
+    }
+    stragglers = speculator._find_straggler_jobs(
+      dct_job_progress, dct_job_elapsed,
+      min_elapsed=SPECULATION_MIN_ELAPSED,
+      progress_lag=SPECULATION_PROGRESS_LAG,
+    )
+    for job_id in stragglers[:max(nr_free_copies, 0)]:
+      if len(idle_nodes) == 0:
+        break
+      jobs[job_id].speculated = True
+      copies[job_id] = FakeWorker(idle_nodes.pop(0), now)
+    # endfor stragglers
+  # endwhile
+  makespan = now if len(winners) == len(jobs) else None
+  return makespan, winners, stopped
+
+
+def check_detection():
+  speculator = Speculator()
+  progress = {0: 100, 1: 90, 2: 50, 3: 85}
+  elapsed = {1: 100, 2: 100, 3: 100}
+  assert speculator._find_straggler_jobs(progress, elapsed, min_elapsed=30, progress_lag=30) == [2]
+  # just started jobs are not speculated
+  assert speculator._find_straggler_jobs(progress, {2: 10}, min_elapsed=30, progress_lag=30) == []
+  # neither are the jobs close to the median
+  assert speculator._find_straggler_jobs({0: 60, 1: 50}, {1: 100}, min_elapsed=30, progress_lag=30) == []
+  assert speculator._find_straggler_jobs({0: 10}, {0: 100}, min_elapsed=30, progress_lag=30) == []
+  return
+
+
+def main():
+  check_detection()
+
+  makespan, winners, _ = simulate(speculation=False)
+  assert makespan is None and 2 not in winners
+  print(f"Without speculation: the stalled job is still open after {MAX_TIME}s")
+
+  makespan, winners, stopped = simulate(speculation=True)
+  assert makespan is not None
+  assert winners[2] == 'spare_node_0' and stopped == ['node_2'], (winners, stopped)
+  assert all(winners[job_id] == f'node_{job_id}' for job_id in [0, 1, 3])
+  print(f"With speculation: all jobs closed after {makespan:.0f}s, winners {winners}, stopped {stopped}")
+
+  # the straggler recovers and closes before its copy
+  makespan, winners, stopped = simulate(speculation=True, stall_for=45)
+  assert winners[2] == 'node_2' and stopped == ['spare_node_0'], (winners, stopped)
+  print(f"Recovering straggler: all jobs closed after {makespan:.0f}s, winners {winners}, stopped {stopped}")
+  return
+
+
+if __name__ == '__main__':
+  main()
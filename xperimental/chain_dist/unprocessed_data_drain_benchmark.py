@@ -0,0 +1,100 @@
+"""
+Microbenchmark of the real time chain dist drain of the unprocessed data and of the progress by
+node, with 100k items buffered by the workers.
+
+The old drain popped the items from the front of a list, one by one, and the old progress by
+node recomputed the total of the collected data for every node. The new drain pops the items
+of a deque in a batch and the progress by node uses running counts, as in
+`ProcessRealTimeCollectedDataChainDistPlugin`.
+"""
+from collections import deque
+from time import perf_counter
+
+
+N_ITEMS = 100_000
+N_JOBS = 50
+N_PROGRESS_CALLS = 1_000
+
+
+def process_real_time_collected_data(job_id, collected_data, data):
+  return data if data % 3 else None
+
+
+def drain_list(unprocessed_data, collected_data, job_id=0):
+  no_unprocessed_data = len(unprocessed_data)
+  for _ in range(no_unprocessed_data):
+    data = unprocessed_data.pop(0)
+    processed_data = process_real_time_collected_data(job_id, collected_data, data)
+    if processed_data is None:
+      continue
+    collected_data[job_id].append(processed_data)
+  return
+
+
+def drain_deque(unprocessed_data, collected_data, job_id=0):
+  batch = [unprocessed_data.popleft() for _ in range(len(unprocessed_data))]
+  job_collected_data = collected_data[job_id]
+  for data in batch:
+    processed_data = process_real_time_collected_data(job_id, collected_data, data)
+    if processed_data is None:
+      continue
+    job_collected_data.append(processed_data)
+  return
+
+
+def progress_by_node_recomputed(jobs, collected_data):
+  nodes = [v.get('node') for v in jobs.values()]
+  count_collected_data_per_node = [len(collected_data[job_id]) for job_id in jobs]
+  if sum(count_collected_data_per_node) == 0:
+    return {}
+  prc_collected_data_per_node = [cnt / sum(count_collected_data_per_node) for cnt in count_collected_data_per_node]
+  return {k: {'NODE': node, 'PROGRESS': prc} for k, node, prc in zip(jobs.keys(), nodes, prc_collected_data_per_node)}
+
+
+def progress_by_node_running(jobs, collected_counts, total):
+  if total == 0:
+    return {}
+  return {
+    job_id: {'NODE': job.get('node'), 'PROGRESS': collected_counts.get(job_id, 0) / total}
+    for job_id, job in jobs.items()
+  }
+
+
+def main():
+  collected_list = {0: []}
+  unprocessed_list = list(range(N_ITEMS))
+  start = perf_counter()
+  drain_list(unprocessed_list, collected_list)
+  elapsed_list = perf_counter() - start
+
+  collected_deque = {0: []}
+  unprocessed_deque = deque(range(N_ITEMS))
+  start = perf_counter()
+  drain_deque(unprocessed_deque, collected_deque)
+  elapsed_deque = perf_counter() - start
+
+  assert collected_list == collected_deque
+  print(f"Drain of {N_ITEMS} buffered items: list pop(0) {elapsed_list * 1000:8.1f}ms | deque batch {elapsed_deque * 1000:8.1f}ms")
+
+  jobs = {job_id: {'node': f'node_{job_id}'} for job_id in range(N_JOBS)}
+  collected_data = {job_id: [None] * (job_id * 10) for job_id in range(N_JOBS)}
+  collected_counts = {job_id: len(data) for job_id, data in collected_data.items()}
+  total = sum(collected_counts.values())
+
+  start = perf_counter()
+  for _ in range(N_PROGRESS_CALLS):
+    recomputed = progress_by_node_recomputed(jobs, collected_data)
+  elapsed_recomputed = perf_counter() - start
+
+  start = perf_counter()
+  for _ in range(N_PROGRESS_CALLS):
+    running = progress_by_node_running(jobs, collected_counts, total)
+  elapsed_running = perf_counter() - start
+
+  assert recomputed == running
+  print(f"{N_PROGRESS_CALLS} progress by node calls on {N_JOBS} jobs: recomputed {elapsed_recomputed * 1000:8.1f}ms | running counts {elapsed_running * 1000:8.1f}ms")
+  return
+
+
+if __name__ == '__main__':
+  main()
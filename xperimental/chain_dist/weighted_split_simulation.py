@@ -0,0 +1,95 @@
+"""
+Simulation of the chain dist split strategies with fake workers of different speeds.
+
+A job of `TOTAL_WORK` units is split between the workers. With the even split the slowest worker
+dictates the makespan. The weighted split uses the throughput measured during the previous jobs
+(as in `BaseChainDistPlugin._update_job_throughput`) to size the shards, so all the workers
+finish at about the same time.
+"""
+import random
+
+from extensions.business.mixins.chain_dist_split_mixin import _ChainDistSplitMixin
+
+
+TOTAL_WORK = 12_000
+N_JOBS = 5
+EMA_ALPHA = 0.3
+MIN_SHARD_WEIGHT_RATIO = 0.1
+# units of work per second
+WORKER_SPEEDS = {
+  'fast_gpu_node': 120,
+  'gpu_node': 80,
+  'cpu_node_1': 30,
+  'cpu_node_2': 25,
+}
+SPEED_NOISE = 0.1
+DEPLOY_TIME = 2  # seconds
+
+
+class Splitter(_ChainDistSplitMixin):
+  pass
+
+
+def run_job(splitter: Splitter, nodes: list, weights: list, rng: random.Random):
+  """
+  Run one job on the fake workers.
+
+  Returns
+  -------
+  (makespan, measured throughputs) : tuple
+  """
+  sizes = splitter._split_sizes_by_weights(TOTAL_WORK, weights)
+  throughputs = {}
+  finish_times = []
+  for node, weight, size in zip(nodes, weights, sizes):
+    speed = WORKER_SPEEDS[node] * (1 + rng.uniform(-SPEED_NOISE, SPEED_NOISE))
+    elapsed = DEPLOY_TIME + size / speed
+    finish_times.append(elapsed)
+    # the work is measured in even shards, as the plugin does
+    shard_work = weight * len(nodes)
+    throughputs[node] = shard_work / elapsed
+  # endfor nodes
+  return max(finish_times), throughputs
+
+
+def simulate(strategy: str, seed: int = 0):
+  rng = random.Random(seed)
+  splitter = Splitter()
+  nodes = list(WORKER_SPEEDS.keys())
+  dct_node_throughput = {}
+  makespans = []
+  for _ in range(N_JOBS):
+    if strategy == 'WEIGHTED':
+      weights = splitter._compute_shard_weights(nodes, dct_node_throughput, MIN_SHARD_WEIGHT_RATIO)
+    else:
+      weights = [1 / len(nodes)] * len(nodes)
+    makespan, throughputs = run_job(splitter, nodes, weights, rng)
+    makespans.append(makespan)
+    for node, throughput in throughputs.items():
+      previous = dct_node_throughput.get(node)
+      dct_node_throughput[node] = throughput if previous is None else EMA_ALPHA * throughput + (1 - EMA_ALPHA) * previous
+    # endfor nodes
+  # endfor jobs
+  return makespans, weights
+
+
+def main():
+  splitter = Splitter()
+  sizes = splitter._split_sizes_by_weights(10, [0.5, 0.3, 0.2])
+  assert sizes == [5, 3, 2] and sum(splitter._split_sizes_by_weights(101, [1, 1, 1])) == 101
+  assert splitter._split_list_by_weights(list(range(7)), [3, 1]) == [[0, 1, 2, 3, 4], [5, 6]]
+
+  even, _ = simulate('EVEN')
+  weighted, weights = simulate('WEIGHTED')
+  print(f"Workers (units/s): {WORKER_SPEEDS}, {TOTAL_WORK} units per job")
+  for job_idx, (even_makespan, weighted_makespan) in enumerate(zip(even, weighted)):
+    print(f"job {job_idx}: even split {even_makespan:7.1f}s | weighted split {weighted_makespan:7.1f}s")
+  print("Last weighted split: " + ", ".join(f"{node}:{w:.02f}" for node, w in zip(WORKER_SPEEDS, weights)))
+  # the first weighted job has no measurements yet, so it is an even split
+  assert abs(even[0] - weighted[0]) < 1e-6
+  assert sum(weighted[1:]) < sum(even[1:]) * 0.6, "The weighted split should reduce the makespan"
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,59 @@
+"""
+Compare fetching 1k cstore keys one at a time against the batched `get_values` / `set_values`
+endpoints of a running CstoreManagerPlugin.
+
+Usage:
+  python -m xperimental.cstore.batch_timings --url http://127.0.0.1:31234 --keys 1000
+"""
+import argparse
+from time import time
+
+import requests
+
+
+def get_result(response: requests.Response):
+  data = response.json()
+  return data.get('result', data) if isinstance(data, dict) else data
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--url', default='http://127.0.0.1:31234')
+  parser.add_argument('--token', default='admin')
+  parser.add_argument('--keys', type=int, default=1000)
+  parser.add_argument('--prefix', default='bench_batch_')
+  args = parser.parse_args()
+
+  url = args.url.rstrip('/')
+  session = requests.Session()
+  items = {f'{args.prefix}{i:05d}': f'value_{i}' for i in range(args.keys)}
+  keys = list(items.keys())
+
+  start = time()
+  for key, value in items.items():
+    session.get(f'{url}/set_value', params={'token': args.token, 'cstore_key': key, 'cstore_value': value})
+  single_set = time() - start
+
+  start = time()
+  single_values = {}
+  for key in keys:
+    result = get_result(session.get(f'{url}/get_value', params={'token': args.token, 'cstore_key': key}))
+    single_values[key] = result.get(key)
+  single_get = time() - start
+
+  start = time()
+  get_result(session.post(f'{url}/set_values', json={'token': args.token, 'items': items}))
+  batch_set = time() - start
+
+  start = time()
+  batch_values = get_result(session.post(f'{url}/get_values', json={'token': args.token, 'keys': keys}))['values']
+  batch_get = time() - start
+
+  assert single_values == batch_values == items, "The batched values differ from the single ones"
+  print(f"{args.keys} keys | one at a time: set {single_set:7.3f}s, get {single_get:7.3f}s | "
+        f"batched: set {batch_set:7.3f}s, get {batch_get:7.3f}s")
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,98 @@
+"""
+Deterministic fake-clock checks of the dAuth per-address token bucket limiter and of the
+(address, time window) signed response cache.
+"""
+from extensions.business.dauth.dauth_rate_limit_mixin import _DauthRateLimitMixin
+
+
+class DauthLimiter(_DauthRateLimitMixin):
+  cfg_dauth_rate_limit_burst = 5
+  cfg_dauth_rate_limit_per_sec = 0.2
+  cfg_dauth_rate_limit_max_addresses = 3
+  cfg_dauth_response_cache_window = 10
+
+
+def make_limiter():
+  limiter = DauthLimiter()
+  limiter._dauth_rate_limit_init()
+  return limiter
+
+
+def check_burst_and_refill():
+  limiter = make_limiter()
+  now = 1000.0
+  # the full burst is allowed, then everything is rejected
+  results = [limiter._dauth_rate_limit_allow('node_a', now) for _ in range(8)]
+  assert results == [True] * 5 + [False] * 3, results
+  # another address has its own bucket
+  assert limiter._dauth_rate_limit_allow('node_b', now)
+  # one token every 5 seconds
+  assert not limiter._dauth_rate_limit_allow('node_a', now + 4.9)
+  assert limiter._dauth_rate_limit_allow('node_a', now + 5.0)
+  assert not limiter._dauth_rate_limit_allow('node_a', now + 5.0)
+  # the bucket never holds more than the burst
+  results = [limiter._dauth_rate_limit_allow('node_a', now + 3600) for _ in range(6)]
+  assert results == [True] * 5 + [False], results
+  # a clock going backwards does not add tokens
+  assert not limiter._dauth_rate_limit_allow('node_a', now)
+  stats = limiter._dauth_rate_limit_get_stats()
+  assert stats['rejected'] == 3 + 1 + 1 + 1 + 1, stats
+  print(f"Burst and refill check passed: {stats}")
+  return
+
+
+def check_steady_rate():
+  limiter = make_limiter()
+  # a requester hammering every 100ms for 10 minutes gets the burst plus one request per 5 seconds
+  n_allowed = sum(
+    limiter._dauth_rate_limit_allow('node_a', 1000.0 + i * 0.1)
+    for i in range(6000)
+  )
+  expected = 5 + int(600 * 0.2) - 1
+  assert abs(n_allowed - expected) <= 1, (n_allowed, expected)
+  print(f"Steady rate check passed: {n_allowed} of 6000 requests allowed in 10 minutes")
+  return
+
+
+def check_bounded_addresses():
+  limiter = make_limiter()
+  now = 1000.0
+  for _ in range(5):
+    limiter._dauth_rate_limit_allow('node_a', now)
+  assert not limiter._dauth_rate_limit_allow('node_a', now)
+  # the bucket of node_a is the least recently used one and gets evicted by new addresses
+  for address in ['node_b', 'node_c', 'node_d']:
+    assert limiter._dauth_rate_limit_allow(address, now)
+  assert limiter._dauth_rate_limit_allow('node_a', now)
+  print("Bounded addresses check passed")
+  return
+
+
+def check_response_cache():
+  limiter = make_limiter()
+  response = {'dauth': {'EE_SUPERVISOR': False}, 'EE_SIGN': 'signature'}
+  assert limiter._dauth_response_cache_get('node_a', 1000.0) is None
+  limiter._dauth_response_cache_set('node_a', response, 1000.0)
+  # retries in the same window reuse the signed response
+  assert limiter._dauth_response_cache_get('node_a', 1009.9) is response
+  assert limiter._dauth_response_cache_get('node_b', 1005.0) is None
+  # the next window starts from scratch
+  assert limiter._dauth_response_cache_get('node_a', 1010.0) is None
+  limiter._dauth_response_cache_set('node_b', response, 1010.0)
+  assert limiter._dauth_response_cache_get('node_a', 1010.0) is None
+  stats = limiter._dauth_rate_limit_get_stats()
+  assert stats['served_from_cache'] == 1, stats
+  print(f"Response cache check passed: {stats}")
+  return
+
+
+def main():
+  check_burst_and_refill()
+  check_steady_rate()
+  check_bounded_addresses()
+  check_response_cache()
+  return
+
+
+if __name__ == '__main__':
+  main()
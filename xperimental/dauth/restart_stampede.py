@@ -0,0 +1,120 @@
+"""
+Simulation of a fleet restart hitting the dAuth server: 5k nodes request dAuth at the same time,
+most of them retrying a couple of times, against a mocked blockchain engine with RPC latency.
+
+The uncached path does a license lookup and an oracle list fetch for each request, the cached
+path goes through `_DauthCacheMixin`. The number of RPC calls and the wall time are reported.
+"""
+import random
+import threading
+from time import time, sleep
+from concurrent.futures import ThreadPoolExecutor
+
+from extensions.business.dauth.dauth_cache_mixin import _DauthCacheMixin
+
+
+N_NODES = 5_000
+MAX_RETRIES = 3
+N_WORKERS = 64
+LICENSE_RPC_LATENCY = 0.02  # seconds
+ORACLES_RPC_LATENCY = 0.05  # seconds
+LICENSED_PRC = 0.9
+
+
+class MockBC:
+  def __init__(self, licensed: set):
+    self.licensed = licensed
+    self.lock = threading.Lock()
+    self.calls = {'is_node_licensed': 0, 'get_oracles': 0}
+    return
+
+  def is_node_licensed(self, node_address_eth: str):
+    with self.lock:
+      self.calls['is_node_licensed'] += 1
+    sleep(LICENSE_RPC_LATENCY)
+    return node_address_eth in self.licensed
+
+  def get_oracles(self, include_eth_addrs=False):
+    with self.lock:
+      self.calls['get_oracles'] += 1
+    sleep(ORACLES_RPC_LATENCY)
+    return ['0xai_oracle1', '0xai_oracle2'], ['oracle1', 'oracle2'], ['0xoracle1', '0xoracle2']
+
+
+class DauthEngine(_DauthCacheMixin):
+  cfg_dauth_license_cache_ttl = 300
+  cfg_dauth_license_negative_ttl = 30
+  cfg_dauth_license_cache_size = 100_000
+  cfg_dauth_refresh_interval = 60
+
+  def __init__(self, bc):
+    super(DauthEngine, self).__init__()
+    self.bc = bc
+    return
+
+  def time(self):
+    return time()
+
+  def P(self, msg, **kwargs):
+    print(msg)
+    return
+
+  def build_dauth_env_template(self):
+    return {'universal': {}, 'node_only': {}, 'predefined': {}, 'supervisor': {}}
+
+
+def make_requests():
+  nodes = [f'0xnode{i:05d}' for i in range(N_NODES)]
+  licensed = set(random.sample(nodes, int(N_NODES * LICENSED_PRC)))
+  requests = [node for node in nodes for _ in range(random.randint(1, MAX_RETRIES))]
+  # the retries of a node arrive close to each other
+  requests = [
+    request for _, request in
+    sorted((i + random.randint(0, 2 * N_WORKERS), request) for i, request in enumerate(requests))
+  ]
+  return requests, licensed
+
+
+def run(requests: list, licensed: set, cached: bool):
+  bc = MockBC(licensed)
+  engine = DauthEngine(bc)
+  engine._dauth_cache_init()
+
+  def handle_uncached(node):
+    allowed = bc.is_node_licensed(node_address_eth=node)
+    bc.get_oracles(include_eth_addrs=True)
+    return allowed
+
+  def handle_cached(node):
+    allowed = engine.dauth_is_node_licensed(node_address_eth=node)
+    engine.dauth_get_oracles()
+    return allowed
+
+  handler = handle_cached if cached else handle_uncached
+  start = time()
+  if cached:
+    engine._dauth_cache_start_refresh()
+  with ThreadPoolExecutor(max_workers=N_WORKERS) as executor:
+    results = list(executor.map(handler, requests))
+  elapsed = time() - start
+  engine._dauth_cache_stop_refresh()
+  expected = [node in licensed for node in requests]
+  assert results == expected, "The cached results differ from the uncached ones"
+  return elapsed, bc.calls, engine._dauth_cache_get_stats()
+
+
+def main():
+  requests, licensed = make_requests()
+  print(f"{N_NODES} nodes restarting, {len(requests)} dAuth requests, {N_WORKERS} concurrent handlers")
+  for cached in [False, True]:
+    elapsed, calls, stats = run(requests, licensed, cached=cached)
+    label = 'cached' if cached else 'uncached'
+    print(f"{label:<9} {elapsed:7.2f}s | RPC calls: {calls}")
+    if cached:
+      print(f"{'':<9} cache stats: {stats}")
+  # endfor cached
+  return
+
+
+if __name__ == '__main__':
+  main()
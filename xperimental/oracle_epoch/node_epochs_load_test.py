@@ -0,0 +1,83 @@
+"""
+Load test for the `node_epochs` endpoint of the EpochManager01Plugin web app.
+
+The endpoint of a local node is hit for a set of nodes: the first pass over the nodes measures
+the uncached responses (epochs computation, EVM signing and node signing), the following passes
+measure the cached ones. The p50/p99 latencies of both are reported.
+
+Usage:
+  python -m xperimental.oracle_epoch.node_epochs_load_test --url http://127.0.0.1:5000 --passes 20
+
+To compare with the uncached behaviour, run it again against a node configured with
+`SIGNED_RESPONSE_CACHE_TTL: 0` and `NODE_EPOCHS_CACHE_SIZE: 0`.
+"""
+import argparse
+from time import time
+
+import numpy as np
+import requests
+
+
+def get_result(response: requests.Response):
+  data = response.json()
+  return data.get('result', data) if isinstance(data, dict) else data
+
+
+def get_nodes(url: str, max_nodes: int):
+  nodes = []
+  page, total_pages = 1, 1
+  while page <= total_pages and len(nodes) < max_nodes:
+    result = get_result(requests.get(f'{url}/active_nodes_list', params={'items_per_page': 100, 'page': page}))
+    total_pages = result.get('nodes_total_pages', 1)
+    nodes.extend(result.get('nodes', {}).keys())
+    page += 1
+  # endwhile pages
+  return nodes[:max_nodes]
+
+
+def timed_get(session: requests.Session, url: str, node_addr: str):
+  start = time()
+  response = session.get(f'{url}/node_epochs', params={'node_addr': node_addr})
+  elapsed = time() - start
+  response.raise_for_status()
+  return elapsed
+
+
+def report(label: str, timings: list):
+  timings_ms = np.array(timings) * 1000
+  print(
+    f"{label:<10} requests: {len(timings_ms):6d} | p50: {np.percentile(timings_ms, 50):8.2f} ms | "
+    f"p99: {np.percentile(timings_ms, 99):8.2f} ms | max: {timings_ms.max():8.2f} ms"
+  )
+  return
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--url', default='http://127.0.0.1:5000')
+  parser.add_argument('--nodes', type=int, default=50, help='Number of distinct nodes requested')
+  parser.add_argument('--passes', type=int, default=20, help='Number of passes over the nodes')
+  args = parser.parse_args()
+
+  url = args.url.rstrip('/')
+  nodes = get_nodes(url, max_nodes=args.nodes)
+  if len(nodes) == 0:
+    print(f"No active nodes returned by {url}/active_nodes_list")
+    return
+  print(f"Load testing {url}/node_epochs with {len(nodes)} nodes x {args.passes} passes")
+
+  session = requests.Session()
+  cold = [timed_get(session, url, node) for node in nodes]
+  warm = [
+    timed_get(session, url, node)
+    for _ in range(max(args.passes - 1, 0))
+    for node in nodes
+  ]
+  report('uncached', cold)
+  if len(warm) > 0:
+    report('cached', warm)
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,125 @@
+"""
+Equivalence check and timings for the vectorized oracle sync consensus engine.
+The vectorized median / most frequent value computations are compared against the
+reference per-node implementations on random tables, then timed at 10k nodes.
+"""
+import random
+from time import time
+
+from extensions.business.oracle_sync.oracle_sync_consensus import (
+  compute_median_values, compute_median_values_reference,
+  compute_most_frequent_values, compute_most_frequent_values_reference,
+)
+
+
+def get_random_address():
+  return "".join([chr(random.randint(97, 122)) for _ in range(44)])
+
+
+def create_random_tables(
+    n_oracles: int, n_nodes: int, max_value: int = 255,
+    missing_prob: float = 0.0, none_prob: float = 0.0, n_distinct: int = None
+):
+  """
+  Create random {node: value} tables, one per oracle.
+  Parameters
+  ----------
+  n_oracles : int
+    The number of tables.
+  n_nodes : int
+    The number of nodes.
+  max_value : int
+    The maximum value reported for a node.
+  missing_prob : float
+    The probability of a node being missing from a table.
+  none_prob : float
+    The probability of a node being reported with a None value.
+  n_distinct : int
+    If set, the values are drawn from only this many candidates per node, to force ties and majorities.
+  """
+  nodes = [get_random_address() for _ in range(n_nodes)]
+  candidates = {
+    node: [random.randint(0, max_value) for _ in range(n_distinct)]
+    for node in nodes
+  } if n_distinct is not None else None
+  tables = []
+  for _ in range(n_oracles):
+    table = {}
+    for node in nodes:
+      if random.random() < missing_prob:
+        continue
+      if random.random() < none_prob:
+        table[node] = None
+      elif candidates is not None:
+        table[node] = random.choice(candidates[node])
+      else:
+        table[node] = random.randint(0, max_value)
+    # endfor nodes
+    tables.append(table)
+  # endfor oracles
+  return tables
+
+
+def check_equivalence(n_cases: int = 300):
+  for case in range(n_cases):
+    n_oracles = random.randint(1, 12)
+    n_nodes = random.randint(0, 60)
+    tables = create_random_tables(
+      n_oracles=n_oracles, n_nodes=n_nodes,
+      missing_prob=random.choice([0.0, 0.1, 0.5]),
+      none_prob=random.choice([0.0, 0.1]),
+    )
+    nodes, medians = compute_median_values(tables)
+    reference = compute_median_values_reference(tables)
+    assert dict(zip(nodes, medians.tolist())) == reference, f"Median mismatch in case {case}"
+
+    # median tables never contain None values
+    tables = create_random_tables(
+      n_oracles=n_oracles, n_nodes=n_nodes,
+      missing_prob=random.choice([0.0, 0.1, 0.5]),
+      n_distinct=random.randint(1, 4),
+    )
+    nodes, values, frequencies, mask = compute_most_frequent_values(tables)
+    reference = compute_most_frequent_values_reference(tables)
+    result = {
+      node: (value, frequency)
+      for node, value, frequency in zip(nodes, values.tolist(), frequencies.tolist())
+    }
+    assert result == reference, f"Most frequent mismatch in case {case}"
+    assert (mask.sum(axis=0) == frequencies).all(), f"Agreement mask mismatch in case {case}"
+  # endfor cases
+  print(f"Equivalence check passed on {n_cases} random cases.")
+  return
+
+
+def time_function(func, *args, n_tests: int = 5):
+  timings = []
+  for _ in range(n_tests):
+    start = time()
+    func(*args)
+    timings.append(time() - start)
+  return sum(timings) / len(timings)
+
+
+def main():
+  N_ORACLES = 10
+  N_NODES = 10_000
+
+  check_equivalence()
+
+  local_tables = create_random_tables(n_oracles=N_ORACLES, n_nodes=N_NODES, missing_prob=0.01)
+  median_tables = create_random_tables(n_oracles=N_ORACLES, n_nodes=N_NODES, n_distinct=2)
+  for name, func, tables in [
+    ('median (reference)', compute_median_values_reference, local_tables),
+    ('median (vectorized)', compute_median_values, local_tables),
+    ('most frequent (reference)', compute_most_frequent_values_reference, median_tables),
+    ('most frequent (vectorized)', compute_most_frequent_values, median_tables),
+  ]:
+    elapsed = time_function(func, tables)
+    print(f"{name:<28} {N_ORACLES} oracles x {N_NODES} nodes: {elapsed:.4f}s")
+  # endfor functions
+  return
+
+
+if __name__ == '__main__':
+  main()
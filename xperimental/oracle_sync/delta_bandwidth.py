@@ -0,0 +1,92 @@
+"""
+Bandwidth savings of the delta encoded availability tables.
+The mockup availability tables are replayed epoch by epoch: each oracle sends its table for
+epoch N as a delta relative to the table of epoch N - 1.
+
+The raw mockup tables are fully random between epochs, which is the worst case for deltas,
+so the replay is also run with a `change_prob` that keeps most values from one epoch to the next.
+"""
+import json
+import random
+
+from extensions.business.oracle_sync.oracle_sync_verify_mixin import _OracleSyncVerifyMixin
+from extensions.business.oracle_sync.oracle_sync_delta_mixin import _OracleSyncTableDeltaMixin
+from xperimental.oracle_sync.agreement_compute_timings import (
+  create_mockup_availability_table_from_multiple_oracles,
+)
+
+
+class DeltaBench(_OracleSyncVerifyMixin, _OracleSyncTableDeltaMixin):
+  pass
+
+
+def make_stable(oracle_tables: dict, change_prob: float):
+  """
+  Rewrite the mockup tables so that each node value changes between consecutive epochs
+  only with probability `change_prob`.
+  """
+  for epochs in oracle_tables.values():
+    sorted_epochs = sorted(epochs.keys())
+    for prev_epoch, epoch in zip(sorted_epochs, sorted_epochs[1:]):
+      for node in epochs[epoch]:
+        if random.random() >= change_prob:
+          epochs[epoch][node] = epochs[prev_epoch][node]
+      # endfor nodes
+    # endfor epochs
+  # endfor oracles
+  return oracle_tables
+
+
+def replay(oracle_tables: dict):
+  bench = DeltaBench()
+  full_bytes, delta_bytes = 0, 0
+  for oracle, epochs in oracle_tables.items():
+    sorted_epochs = sorted(epochs.keys())
+    for prev_epoch, epoch in zip(sorted_epochs, sorted_epochs[1:]):
+      # The oracle's own table of the previous epoch stands in for the agreed table, since the mockup
+      # generates different node addresses for each unique availability table.
+      base_table = dict(epochs[prev_epoch])
+      table = dict(epochs[epoch])
+      changed, removed, digest = bench._table_delta_compute(base_table=base_table, table=table)
+      rebuilt = bench._table_delta_apply(base_table=base_table, changed=changed, removed=removed, digest=digest)
+      assert rebuilt == table
+
+      full_bytes += len(json.dumps({'LOCAL_TABLE': table}))
+      delta_bytes += len(json.dumps({
+        'LOCAL_TABLE': changed,
+        'DELTA_BASE_EPOCH': prev_epoch,
+        'DELTA_REMOVED': removed,
+        'TABLE_DIGEST': digest,
+      }))
+    # endfor epochs
+  # endfor oracles
+  return full_bytes, delta_bytes
+
+
+def main():
+  N_ORACLES = 10
+  N_NODES = 2000
+  N_EPOCHS = 10
+  MAX_EPOCH_AVAILABILITY = 255
+
+  for change_prob in [None, 0.2, 0.05]:
+    oracle_tables = create_mockup_availability_table_from_multiple_oracles(
+      n_oracles=N_ORACLES,
+      n_epochs=N_EPOCHS,
+      n_nodes=N_NODES,
+      n_unique_availability_values=3,
+      max_epoch_availability=MAX_EPOCH_AVAILABILITY,
+    )
+    label = 'raw mockup'
+    if change_prob is not None:
+      oracle_tables = make_stable(oracle_tables, change_prob)
+      label = f'{change_prob:.0%} changes'
+    full_bytes, delta_bytes = replay(oracle_tables)
+    print(f"{label:<12} full: {full_bytes / 1024:10.1f} KB | delta: {delta_bytes / 1024:10.1f} KB | "
+          f"saved: {1 - delta_bytes / full_bytes:6.1%}")
+  # endfor change_prob
+  return
+
+
+if __name__ == '__main__':
+  main()
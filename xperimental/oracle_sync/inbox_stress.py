@@ -0,0 +1,91 @@
+"""
+Stress test for the bounded oracle inbox: a misbehaving oracle floods the inbox with duplicate
+messages, while the other oracles send their regular messages.
+The memory used by the inbox and the time needed to drain it must not depend on the number
+of duplicates.
+"""
+import tracemalloc
+from time import time
+
+from extensions.business.oracle_sync.oracle_sync_inbox_mixin import _OracleSyncInboxMixin
+
+
+MAX_MESSAGES_PER_ORACLE = 1000
+N_ORACLES = 10
+STAGES = ['SEND_LOCAL_TABLE', 'SEND_MEDIAN_TABLE', 'SEND_AGREED_MEDIAN_TABLE']
+
+
+class Inbox(_OracleSyncInboxMixin):
+  pass
+
+
+def make_message(sender: str, stage: str, i: int):
+  return {
+    'EE_SENDER': sender,
+    'ORACLE_DATA': {'STAGE': stage, 'LOCAL_TABLE': {f'node_{j}': j for j in range(20)}, 'SEQ': i},
+  }
+
+
+def flood(n_duplicates: int):
+  inbox = Inbox()
+  inbox._inbox_init(max_messages_per_sender=MAX_MESSAGES_PER_ORACLE)
+  tracemalloc.start()
+  start = time()
+  for i in range(n_duplicates):
+    # the misbehaving oracle repeats the same stage messages
+    stage = STAGES[i % len(STAGES)]
+    inbox._inbox_add('flooder', (stage, 1, None), make_message('flooder', stage, i))
+  # endfor duplicates
+  for oracle_idx in range(N_ORACLES - 1):
+    sender = f'oracle_{oracle_idx}'
+    inbox._inbox_add(sender, (STAGES[0], 1, None), make_message(sender, STAGES[0], 0))
+  # endfor other oracles
+  add_elapsed = time() - start
+  _, peak = tracemalloc.get_traced_memory()
+  current = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+
+  pending = inbox._inbox_len()
+  start = time()
+  messages = inbox._inbox_drain()
+  drain_elapsed = time() - start
+
+  senders = {message['EE_SENDER'] for message in messages}
+  assert len(messages) == pending == len(STAGES) + N_ORACLES - 1, f"Unexpected inbox size {pending}"
+  assert len(senders) == N_ORACLES, "The messages of the other oracles must not be evicted"
+  newest = {message['ORACLE_DATA']['STAGE']: message['ORACLE_DATA']['SEQ'] for message in messages if message['EE_SENDER'] == 'flooder'}
+  assert all(seq >= n_duplicates - len(STAGES) for seq in newest.values()), "Only the newest messages must be kept"
+  return current, peak, add_elapsed, drain_elapsed, inbox._inbox_get_stats()
+
+
+def check_eviction():
+  inbox = Inbox()
+  inbox._inbox_init(max_messages_per_sender=MAX_MESSAGES_PER_ORACLE)
+  for i in range(MAX_MESSAGES_PER_ORACLE * 10):
+    inbox._inbox_add('flooder', ('SEND_WAIT_FOR_EPOCH_CHANGE', 1, (0, 0, i)), {'SEQ': i})
+  inbox._inbox_add('oracle_0', ('SEND_LOCAL_TABLE', 1, None), {'SEQ': 0})
+  assert inbox._inbox_len() == MAX_MESSAGES_PER_ORACLE + 1, "The inbox of each sender must be bounded"
+  messages = inbox._inbox_drain()
+  assert messages[0]['SEQ'] == MAX_MESSAGES_PER_ORACLE * 9, "The oldest messages must be evicted first"
+  print(f"Eviction check passed: {inbox._inbox_get_stats()}")
+  return
+
+
+def main():
+  check_eviction()
+  results = []
+  for n_duplicates in [1_000, 10_000, 100_000]:
+    current, peak, add_elapsed, drain_elapsed, stats = flood(n_duplicates)
+    results.append((current, drain_elapsed))
+    print(
+      f"{n_duplicates:>7} duplicates | inbox memory: {current / 1024:7.1f} KB (peak {peak / 1024:7.1f} KB) | "
+      f"add: {add_elapsed / n_duplicates * 1e6:5.2f} us/msg | drain: {drain_elapsed * 1e6:7.1f} us | {stats}"
+    )
+  # endfor n_duplicates
+  # constant memory: 100x more duplicates should not need meaningfully more memory
+  assert results[-1][0] < results[0][0] * 1.5, "Inbox memory grows with the number of duplicates"
+  return
+
+
+if __name__ == '__main__':
+  main()
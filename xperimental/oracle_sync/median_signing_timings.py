@@ -0,0 +1,108 @@
+"""
+Compare the per-node median table signing (message version 1) with the table-level
+signing (message version 2) in terms of sign time, verify time and payload size.
+"""
+import json
+import random
+from time import time
+
+from ratio1 import Logger
+from ratio1.bc import DefaultBlockEngine
+
+from extensions.business.oracle_sync.oracle_sync_verify_mixin import _OracleSyncVerifyMixin
+
+
+def get_random_address():
+  return "".join([chr(random.randint(97, 122)) for _ in range(44)])
+
+
+class SigningBench(_OracleSyncVerifyMixin):
+  def __init__(self, bc):
+    super(SigningBench, self).__init__()
+    self.bc = bc
+    self.cfg_verify_workers = 1
+    self._verify_init()
+    return
+
+
+def sign_per_node(bc, simple_table: dict, epoch: int):
+  median_table = {}
+  for node, value in simple_table.items():
+    median_table[node] = {'VALUE': value, 'EPOCH': epoch, 'NODE': node}
+    bc.sign(median_table[node], add_data=True, use_digest=True)
+    median_table[node].pop('EPOCH')
+    median_table[node].pop('NODE')
+  # endfor nodes
+  return {'MEDIAN_TABLE': median_table, 'VERSION': 1}
+
+
+def verify_per_node(bench, oracle_data: dict, epoch: int):
+  lst_data = [
+    {**dct_node, 'EPOCH': epoch, 'NODE': node}
+    for node, dct_node in oracle_data['MEDIAN_TABLE'].items()
+  ]
+  return all(result.valid for result in bench._verify_batch(lst_data))
+
+
+def sign_table(bench, simple_table: dict, epoch: int):
+  signature_dict = {
+    'MEDIAN_TABLE_DIGEST': bench._compute_table_digest(simple_table),
+    'EPOCH': epoch,
+  }
+  bench.bc.sign(signature_dict, add_data=True, use_digest=True)
+  signature_dict.pop('MEDIAN_TABLE_DIGEST')
+  signature_dict.pop('EPOCH')
+  return {'MEDIAN_TABLE': simple_table, 'MEDIAN_TABLE_SIGNATURE': signature_dict, 'VERSION': 2}
+
+
+def verify_table(bench, oracle_data: dict, epoch: int):
+  data_to_verify = {
+    **oracle_data['MEDIAN_TABLE_SIGNATURE'],
+    'MEDIAN_TABLE_DIGEST': bench._compute_table_digest(oracle_data['MEDIAN_TABLE']),
+    'EPOCH': epoch,
+  }
+  return bench._verify_one(data_to_verify).valid
+
+
+def main():
+  LST_N_NODES = [1_000, 10_000, 50_000]
+  EPOCH = 100
+
+  l = Logger("OSM", base_folder=".", app_folder="_local_cache")
+  bc = DefaultBlockEngine(
+    log=l, name="oracle_sync_median",
+    config={
+      "PEM_FILE": "oracle_sync_median.pem",
+      "PASSWORD": None,
+      "PEM_LOCATION": "data"
+    }
+  )
+
+  results = []
+  for n_nodes in LST_N_NODES:
+    simple_table = {get_random_address(): random.randint(0, 255) for _ in range(n_nodes)}
+    for mode, sign_func, verify_func in [
+      ('per-node', lambda t: sign_per_node(bc, t, EPOCH), verify_per_node),
+      ('table', lambda t: sign_table(bench, t, EPOCH), verify_table),
+    ]:
+      # A fresh cache for every run, so the verification is not served from memory.
+      bench = SigningBench(bc=bc)
+      start = time()
+      oracle_data = sign_func(simple_table)
+      elapsed_sign = time() - start
+
+      start = time()
+      valid = verify_func(bench, oracle_data, EPOCH)
+      elapsed_verify = time() - start
+
+      payload_bytes = len(json.dumps(oracle_data))
+      results.append((n_nodes, mode, elapsed_sign, elapsed_verify, payload_bytes, valid))
+      print(f"{n_nodes:>6} nodes | {mode:<8} | sign {elapsed_sign:8.3f}s | verify {elapsed_verify:8.3f}s | "
+            f"payload {payload_bytes / 1024:10.1f} KB | valid {valid}")
+    # endfor modes
+  # endfor n_nodes
+  return results
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,151 @@
+"""
+Simulation of a full oracle sync epoch with a fake clock, comparing the polling state machine
+(stepped on every loop iteration) with the event driven one (stepped only when a deadline
+expires or new messages arrive).
+
+The simulated oracle mirrors the timing logic of `OracleSync01Plugin`: the send states send
+each `SEND_INTERVAL` seconds and time out after `SEND_PERIOD` seconds, the compute states
+move on right away and the oracle waits for the epoch change in S0. The other oracles send their
+messages at random moments during the send states.
+"""
+import random
+
+from extensions.business.oracle_sync.oracle_sync_timers_mixin import _OracleSyncTimersMixin, OracleSyncStepCt
+
+
+SEND_PERIOD = 15
+SEND_INTERVAL = 5
+SIGNATURES_EXCHANGE_MULTIPLIER = 5
+EPOCH_CHECK_INTERVAL = 1
+STEP_MARGIN = 0.01
+TIMER = 'STATE_MACHINE_STEP'
+
+S0, S1, S2, S3, S4, S5, S6, S10, S7 = 'S0', 'S1', 'S2', 'S3', 'S4', 'S5', 'S6', 'S10', 'S7'
+NEXT_STATE = {S1: S2, S2: S3, S3: S4, S4: S5, S5: S6, S6: S10, S10: S7, S7: S0}
+SEND_STATES = {
+  S2: SEND_PERIOD,
+  S4: SEND_PERIOD,
+  S6: SEND_PERIOD,
+  S10: SEND_PERIOD * SIGNATURES_EXCHANGE_MULTIPLIER,
+}
+
+
+class FakeOracle(_OracleSyncTimersMixin):
+  def __init__(self, event_driven: bool, epoch_length: float):
+    super(FakeOracle, self).__init__()
+    self.event_driven = event_driven
+    self.epoch_length = epoch_length
+    self.now = 0
+    self.state = S1
+    self.epoch = 0
+    self.inbox = []
+    self.first_time_sent = None
+    self.last_time_sent = None
+    self.n_sent = 0
+    self._timers_init()
+    self._timers_schedule(TIMER, self.now)
+    return
+
+  def receive(self):
+    self.inbox.append(self.now)
+    self._timers_signal_input()
+    return
+
+  def step(self):
+    """
+    One state machine step. Returns True if the step did anything.
+    """
+    state_before, n_consumed = self.state, len(self.inbox)
+    self.inbox.clear()
+    sent = False
+    if self.state == S0:
+      if int(self.now // self.epoch_length) != self.epoch:
+        self.epoch = int(self.now // self.epoch_length)
+        self.state = S1
+    elif self.state in SEND_STATES:
+      if self.first_time_sent is not None and self.now - self.first_time_sent > SEND_STATES[self.state]:
+        self.state = NEXT_STATE[self.state]
+        self.first_time_sent, self.last_time_sent = None, None
+      elif self.last_time_sent is None or self.now - self.last_time_sent >= SEND_INTERVAL:
+        if self.first_time_sent is None:
+          self.first_time_sent = self.now
+        self.last_time_sent = self.now
+        self.n_sent += 1
+        sent = True
+      # endif timeout
+    else:
+      self.state = NEXT_STATE[self.state]
+    # endif state
+    return self.state != state_before or n_consumed > 0 or sent
+
+  def schedule_next_step(self):
+    if self.state == S0:
+      deadline = self.now + EPOCH_CHECK_INTERVAL
+    elif self.state in SEND_STATES:
+      if self.first_time_sent is None:
+        deadline = self.now
+      else:
+        deadline = min(
+          self.last_time_sent + SEND_INTERVAL,
+          self.first_time_sent + SEND_STATES[self.state] + STEP_MARGIN,
+        )
+    else:
+      deadline = self.now
+    self._timers_schedule(TIMER, deadline)
+    return
+
+  def process(self):
+    if self.event_driven and not self._timers_should_step(self.now):
+      return
+    self._timers_record_step(self.step())
+    self.schedule_next_step()
+    return
+
+
+def simulate(event_driven: bool, epoch_length: float, loop_period: float, n_other_oracles: int, seed: int = 0):
+  rng = random.Random(seed)
+  oracle = FakeOracle(event_driven=event_driven, epoch_length=epoch_length)
+  n_iterations = int(epoch_length * 1.5 / loop_period)
+  for it in range(n_iterations):
+    oracle.now = it * loop_period
+    if oracle.state in SEND_STATES:
+      # each other oracle sends one message per interval
+      for _ in range(n_other_oracles):
+        if rng.random() < loop_period / SEND_INTERVAL:
+          oracle.receive()
+      # endfor other oracles
+    # endif send state
+    oracle.process()
+  # endfor iterations
+  return oracle
+
+
+def main():
+  EPOCH_LENGTH = 3600  # seconds, shortened epoch
+  LOOP_PERIOD = 0.01  # seconds, a busy plugin loop
+  N_OTHER_ORACLES = 9
+
+  results = {}
+  for event_driven in [False, True]:
+    oracle = simulate(
+      event_driven=event_driven, epoch_length=EPOCH_LENGTH,
+      loop_period=LOOP_PERIOD, n_other_oracles=N_OTHER_ORACLES,
+    )
+    label = 'event driven' if event_driven else 'polling'
+    counters = oracle._timers_get_counters()
+    results[label] = oracle
+    n_steps = counters[OracleSyncStepCt.PRODUCTIVE] + counters[OracleSyncStepCt.WASTED]
+    print(
+      f"{label:<13} steps: {n_steps:8d} | productive: {counters[OracleSyncStepCt.PRODUCTIVE]:6d} | "
+      f"wasted: {counters[OracleSyncStepCt.WASTED]:8d} | skipped: {counters[OracleSyncStepCt.SKIPPED]:8d} | "
+      f"sent: {oracle.n_sent:4d} | epoch: {oracle.epoch} | state: {oracle.state}"
+    )
+  # endfor modes
+  polling, event_driven = results['polling'], results['event driven']
+  assert polling.n_sent == event_driven.n_sent, "Both modes should send the same messages"
+  assert (polling.epoch, polling.state) == (event_driven.epoch, event_driven.state)
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,96 @@
+"""
+Microbenchmark for the oracle sync signature verification.
+Compares the serial `bc.verify` loop with the batched, parallel and memoized
+verification from `_OracleSyncVerifyMixin` on synthetic median tables.
+"""
+import os
+import random
+from time import time
+
+from ratio1 import Logger
+from ratio1.bc import DefaultBlockEngine
+
+from extensions.business.oracle_sync.oracle_sync_verify_mixin import _OracleSyncVerifyMixin
+
+
+def get_random_address():
+  return "".join([chr(random.randint(97, 122)) for _ in range(44)])
+
+
+class VerifyBench(_OracleSyncVerifyMixin):
+  def __init__(self, bc, n_workers=None):
+    super(VerifyBench, self).__init__()
+    self.bc = bc
+    self.cfg_verify_workers = n_workers
+    self._verify_init()
+    return
+
+
+def create_signed_median_table(bc, n_nodes: int, epoch: int = 1):
+  """
+  Create a synthetic median table, signed per node, in the same format as the one
+  received in the S4_SEND_MEDIAN_TABLE stage (with the EPOCH and NODE keys added back).
+  """
+  median_table = {}
+  for _ in range(n_nodes):
+    node = get_random_address()
+    median_table[node] = {
+      'VALUE': random.randint(0, 255),
+      'EPOCH': epoch,
+      'NODE': node,
+    }
+    bc.sign(median_table[node], add_data=True, use_digest=True)
+  # endfor nodes
+  return median_table
+
+
+def verify_serial(bc, lst_dct_data):
+  return [
+    bc.verify(dct_data=dct_data, str_signature=None, sender_address=None)
+    for dct_data in lst_dct_data
+  ]
+
+
+def main():
+  N_NODES = 2000
+  N_ORACLES = 10
+  N_ROUNDS = 3
+
+  l = Logger("OSV", base_folder=".", app_folder="_local_cache")
+  bc = DefaultBlockEngine(
+    log=l, name="oracle_sync_verify",
+    config={
+      "PEM_FILE": "oracle_sync_verify.pem",
+      "PASSWORD": None,
+      "PEM_LOCATION": "data"
+    }
+  )
+
+  print(f"Signing {N_ORACLES} median tables with {N_NODES} nodes each...")
+  tables = [create_signed_median_table(bc, n_nodes=N_NODES) for _ in range(N_ORACLES)]
+  lst_all = [dct for table in tables for dct in table.values()]
+  n_total = len(lst_all)
+
+  start = time()
+  results = verify_serial(bc, lst_all)
+  elapsed_serial = time() - start
+  assert all(r.valid for r in results)
+  print(f"Serial:               {n_total / elapsed_serial:10.1f} verifications/s ({elapsed_serial:.3f}s)")
+
+  bench = VerifyBench(bc=bc)
+  # Each round simulates the same tables being re-broadcast during the exchange phase.
+  for round_idx in range(N_ROUNDS):
+    start = time()
+    results = bench._verify_batch(lst_all)
+    elapsed = time() - start
+    assert all(r.valid for r in results)
+    label = "Batch (cold cache)" if round_idx == 0 else f"Batch (re-broadcast {round_idx})"
+    print(f"{label:<22}{n_total / elapsed:10.1f} verifications/s ({elapsed:.3f}s)")
+  # endfor rounds
+  print(f"Workers: {os.cpu_count()}, stats: {bench._verify_get_stats()}")
+  bench._verify_shutdown()
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,67 @@
+"""
+Load times of the model testing `Dataset` on generated jpg images: serial decode, thread pool
+decode, then a cold and a warm run of the `.npy` cache.
+
+Needs cv2 and the node runtime (naeural_core).
+
+Usage:
+  python -m xperimental.serving.dataset_load_benchmark --images 200
+"""
+import os
+import shutil
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+from plugins.serving.model_testing.utils import Dataset
+
+
+def generate_images(folder, nr_images, size=(1920, 1080)):
+  rng = np.random.default_rng(0)
+  paths = []
+  for idx in range(nr_images):
+    # smooth noise, so the jpgs are not trivially small
+    small = rng.integers(0, 255, (size[1] // 16, size[0] // 16, 3), dtype=np.uint8)
+    img = cv2.resize(small, size, interpolation=cv2.INTER_CUBIC)
+    path = os.path.join(folder, 'img_{:04d}.jpg'.format(idx))
+    cv2.imwrite(path, img)
+    paths.append(path)
+  # endfor images
+  return paths
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--images', type=int, default=200)
+  parser.add_argument('--workers', type=int, default=8)
+  args = parser.parse_args()
+
+  folder = tempfile.mkdtemp(prefix='dataset_load_')
+  try:
+    paths = generate_images(folder, args.images)
+    cache_folder = os.path.join(folder, 'cache')
+    reference = None
+    for label, dataset in [
+      ('serial', Dataset(nr_workers=1)),
+      ('{} workers'.format(args.workers), Dataset(nr_workers=args.workers)),
+      ('cache cold', Dataset(nr_workers=args.workers, cache_folder=cache_folder)),
+      ('cache warm', Dataset(nr_workers=args.workers, cache_folder=cache_folder)),
+    ]:
+      imgs = dataset.load_images(paths)
+      stats = dataset.last_load_stats
+      if reference is None:
+        reference = imgs
+      assert all(np.array_equal(a, b) for a, b in zip(reference, imgs)), "The loaded images differ"
+      print("{:<12} | {} images in {:6.2f}s | {} cache hits ({})".format(
+        label, stats['NR_IMAGES'], stats['LOAD_TIME'], stats['CACHE_HITS'], stats['MODE']
+      ))
+    # endfor modes
+  finally:
+    shutil.rmtree(folder)
+  return
+
+
+if __name__ == '__main__':
+  main()
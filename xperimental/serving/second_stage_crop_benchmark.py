@@ -0,0 +1,99 @@
+"""
+CPU-only benchmark of the ThYoloSecondStage second stage crops: one crop per box followed by the
+resize with pad, against the batched roi_align crop (`SECOND_STAGE_BATCHED_CROP`).
+
+The second stage methods run on a light host with a tiny dummy classifier, 200 random boxes per
+frame, and the `crop` / `resize` timers of the serving are reported.
+
+Needs torch, torchvision and the node runtime (naeural_core).
+"""
+from time import perf_counter
+
+import numpy as np
+import torch as th
+import torchvision as tv
+
+from plugins.serving.inference.th_yolo_second_stage import ThYoloSecondStage
+
+
+N_FRAMES = 4
+N_BOXES = 200
+INPUT_SIZE = (640, 640)
+SECOND_STAGE_INPUT_SIZE = (64, 64)
+N_RUNS = 5
+
+
+class Host:
+  th = th
+  tv = tv
+  np = np
+  dev = th.device('cpu')
+  cfg_fp16 = False
+  cfg_model_instance_id = 'second_stage'
+  cfg_second_stage_pad_value = 114 / 255
+  class_names = ['person', 'car']
+  get_second_stage_target_class = ['person']
+  get_second_stage_input_size = SECOND_STAGE_INPUT_SIZE
+
+  _second_stage_classifier = ThYoloSecondStage._second_stage_classifier
+  _second_stage_rois = ThYoloSecondStage._second_stage_rois
+  _second_stage_assemble_results = ThYoloSecondStage._second_stage_assemble_results
+  _second_stage_roi_letterbox = ThYoloSecondStage._second_stage_roi_letterbox
+  th_resize_with_pad = ThYoloSecondStage.th_resize_with_pad
+
+  def __init__(self, batched_crop):
+    self.cfg_second_stage_batched_crop = batched_crop
+    self._transform = tv.transforms.Compose([])
+    self.second_stage_model = th.nn.Sequential(
+      th.nn.Conv2d(3, 4, kernel_size=3, stride=4),
+      th.nn.AdaptiveAvgPool2d(1),
+      th.nn.Flatten(),
+      th.nn.Linear(4, 3),
+    ).eval()
+    self.timers = {}
+    self.__starts = {}
+    return
+
+  def _start_timer(self, name):
+    self.__starts[name] = perf_counter()
+    return
+
+  def _stop_timer(self, name):
+    self.timers.setdefault(name, []).append(perf_counter() - self.__starts[name])
+    return
+
+
+def make_inputs(seed=0):
+  generator = th.Generator().manual_seed(seed)
+  th_inputs = th.rand((N_FRAMES, 3, *INPUT_SIZE), generator=generator)
+  pred_nms = []
+  for _ in range(N_FRAMES):
+    x1y1 = th.rand((N_BOXES, 2), generator=generator) * 560
+    wh = th.rand((N_BOXES, 2), generator=generator) * 70 + 10
+    conf = th.rand((N_BOXES, 1), generator=generator)
+    cls = th.randint(0, 2, (N_BOXES, 1), generator=generator).float()
+    pred_nms.append(th.cat([x1y1, x1y1 + wh, conf, cls], dim=1))
+  # endfor frames
+  return pred_nms, th_inputs
+
+
+def main():
+  pred_nms, th_inputs = make_inputs()
+  results = {}
+  for batched_crop in [False, True]:
+    host = Host(batched_crop=batched_crop)
+    with th.no_grad():
+      for _ in range(N_RUNS):
+        results[batched_crop] = host._second_stage_classifier(pred_nms, th_inputs)
+    label = 'batched roi_align' if batched_crop else 'per box crop'
+    timings = ', '.join(f"{name} {np.mean(values) * 1000:8.2f}ms" for name, values in host.timers.items())
+    print(f"{label:<18} | {N_FRAMES} frames x {N_BOXES} boxes | {timings}")
+  # endfor modes
+
+  same_shape = all(len(a) == len(b) for a, b in zip(results[False], results[True]))
+  assert same_shape, "The batched crop changed the results layout"
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,102 @@
+"""
+Regression benchmark of the ThYoloSecondStage result assembly, with up to 1k boxes per batch.
+
+The old assembly converted the whole second stage output to Python for every box, so its time
+grew with the square of the number of boxes. `ThYoloSecondStage._second_stage_assemble_results`
+scatters the outputs, converted once per batch, through the (image, box) index map, and its time
+per box must stay flat. The method runs on a light host, as in `second_stage_crop_benchmark.py`.
+
+The second stage output of the old assembly is stood in by `Output`, whose `tolist` copies the
+values, as the tensor conversion does.
+
+Needs the node runtime (naeural_core).
+"""
+import random
+from time import perf_counter
+
+from plugins.serving.inference.th_yolo_second_stage import ThYoloSecondStage
+
+
+N_IMAGES = 4
+N_BOXES = [125, 250, 500, 1000]  # boxes per batch
+TARGET_RATIO = 0.5
+N_RUNS = 20
+MAX_LINEAR_DRIFT = 2.0  # max ratio of the time per box at 1k boxes to the one at the fewest boxes
+
+
+class Host:
+  _second_stage_assemble_results = ThYoloSecondStage._second_stage_assemble_results
+
+
+class Output:
+  def __init__(self, values):
+    self.values = values
+
+  def tolist(self):
+    return list(self.values)
+
+
+def make_inputs(nr_boxes, seed=0):
+  rng = random.Random(seed)
+  masks = [[] for _ in range(N_IMAGES)]
+  for _ in range(nr_boxes):
+    masks[rng.randrange(N_IMAGES)].append(rng.random() < TARGET_RATIO)
+  index_map = [(i, j) for i, image_masks in enumerate(masks) for j, is_target in enumerate(image_masks) if is_target]
+  probs = Output([rng.random() for _ in index_map])
+  classes = Output([rng.randrange(10) for _ in index_map])
+  return masks, index_map, (probs, classes)
+
+
+def assemble_previous(masks, index_map, out):
+  # the old assembly ran the classifier on all the boxes and converted the outputs for each box
+  probs = Output([None] * sum(len(image_masks) for image_masks in masks))
+  classes = Output([None] * len(probs.values))
+  for k, (i, j) in enumerate(index_map):
+    flat = sum(len(image_masks) for image_masks in masks[:i]) + j
+    probs.values[flat], classes.values[flat] = out[0].values[k], out[1].values[k]
+  results = []
+  k = 0
+  for i in range(len(masks)):
+    results.append(
+      [(round(probs.tolist()[k+j], 2), round(classes.tolist()[k+j], 2))
+       if masks[i][j] else None
+       for j in range(len(masks[i]))]
+    )
+    k += len(masks[i])
+  return results
+
+
+def assemble(host, masks, index_map, out):
+  return host._second_stage_assemble_results(masks, index_map, out[0].tolist(), out[1].tolist())
+
+
+def best_time(func, *args):
+  timings = []
+  for _ in range(N_RUNS):
+    start = perf_counter()
+    result = func(*args)
+    timings.append(perf_counter() - start)
+  return min(timings), result
+
+
+def main():
+  host = Host()
+  per_box = {}
+  for nr_boxes in N_BOXES:
+    masks, index_map, out = make_inputs(nr_boxes)
+    elapsed_previous, previous = best_time(assemble_previous, masks, index_map, out)
+    elapsed, results = best_time(assemble, host, masks, index_map, out)
+    assert results == previous, "The index map assembly changed the results"
+    per_box[nr_boxes] = elapsed / nr_boxes
+    print(f"{nr_boxes:5d} boxes: previous {elapsed_previous * 1000:8.3f}ms | index map {elapsed * 1000:8.3f}ms "
+          f"| {per_box[nr_boxes] * 1e6:6.3f}us per box")
+  # endfor sizes
+
+  drift = per_box[N_BOXES[-1]] / per_box[N_BOXES[0]]
+  print(f"Time per box drift from {N_BOXES[0]} to {N_BOXES[-1]} boxes: x{drift:.2f}")
+  assert drift < MAX_LINEAR_DRIFT, f"The assembly does not scale linearly (x{drift:.2f} per box)"
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,73 @@
+"""
+Runs the model testing harness against the tutorial servings on CPU, for several batch sizes,
+and saves a single json report (latency percentiles and histograms, throughput, peak RSS) that
+can be diffed between commits.
+
+Needs the node runtime (naeural_core) and no GPU.
+
+Usage:
+  python -m xperimental.serving.tutorial_servings_cpu_report --output serving_report.json
+"""
+import json
+import argparse
+
+import numpy as np
+
+from naeural_core import Logger
+from plugins.serving.model_testing.base import Base
+
+
+BATCH_SIZES = [1, 8, 32]
+SERVINGS = [
+  # (serving, input type, inputs factory, extra serving params)
+  ('a_sum_model', 'STRUCT_DATA', lambda n: [[i, i + 1, i + 2] for i in range(n)], {}),
+  ('a_sum_model', 'STRUCT_DATA', lambda n: [[i, i + 1, i + 2] for i in range(n)], {'VECTORIZED_PREDICT': True}),
+  ('a_dummy_classifier', 'STRUCT_DATA', lambda n: [{'OBS': i * 1.5} for i in range(n)], {}),
+  ('a_dummy_cv_classifier', 'IMG', lambda n: [np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8) for _ in range(n)], {}),
+]
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--output', default='serving_report.json')
+  parser.add_argument('--predicts', type=int, default=50)
+  args = parser.parse_args()
+
+  log = Logger('MPTF', base_folder='.', app_folder='_local_cache', TF_KERAS=False)
+  reports = []
+  for serving, input_type, make_inputs, dct_params in SERVINGS:
+    test = Base(
+      log=log,
+      model_name=(serving, 'default'),
+      test_files={},
+      input_type=input_type,
+      nr_predicts=args.predicts,
+      save_plots=False,
+    )
+    for batch_size in BATCH_SIZES:
+      test.run(
+        dct_test={'MAX_BATCH_FIRST_STAGE': batch_size, 'DEFAULT_DEVICE': 'cpu'},
+        dct_params=dct_params,
+        _lst_images=make_inputs(batch_size),
+      )
+    # endfor batch sizes
+    test.show_results()
+    report = test.get_report()
+    report['PARAMS'] = dct_params
+    reports.append(report)
+  # endfor servings
+
+  failed = [
+    (report['MODEL_NAME'], run['BATCH_SIZE'])
+    for report in reports for run in report['RUNS'] if not run['SUCCESS']
+  ]
+  with open(args.output, 'w') as fh:
+    json.dump({'SERVINGS': reports}, fh, indent=2, sort_keys=True)
+  log.P("Saved the report of {} servings to {}".format(len(reports), args.output))
+  if len(failed) > 0:
+    raise Exception("Failed runs: {}".format(failed))
+  return
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,81 @@
+"""
+CPU benchmark of the vectorized predict of the `ASumModel` tutorial serving: throughput and
+latency of the serving steps, with and without `VECTORIZED_PREDICT`, for several numbers of
+streams and `MAX_BATCH` values.
+
+The steps are run as the serving process runs them: a single thread calls `_predict` once per
+step, with one input from each stream.
+
+Needs the node runtime (naeural_core).
+
+Usage:
+  python -m xperimental.serving.vectorized_predict_benchmark --steps 200
+"""
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+from plugins.serving.inference.tutorials.a_sum_model import ASumModel
+from plugins.serving.mixins_libs.vectorized_predict_mixin import _VectorizedPredictMixin
+
+
+INPUT_SIZE = 256
+NR_STREAMS = [1, 8, 32, 128]
+MAX_BATCH = [8, 32, 128]
+
+
+class Host(_VectorizedPredictMixin):
+  np = np
+  cfg_crash_predict = -1
+
+  _predict = ASumModel._predict
+  _predict_batch = ASumModel._predict_batch
+  _ASumModel__crash_simulator = ASumModel._ASumModel__crash_simulator
+
+  def __init__(self, max_batch):
+    super(Host, self).__init__()
+    self._counter = 0
+    self.cfg_vectorized_predict = max_batch is not None
+    self.cfg_max_batch = max_batch
+    return
+
+  def P(self, msg, **kwargs):
+    print(msg)
+    return
+
+
+def run(max_batch, nr_streams, nr_steps):
+  host = Host(max_batch)
+  rng = np.random.default_rng(0)
+  latencies = []
+  for _ in range(nr_steps):
+    inputs = [[rng.random(INPUT_SIZE), None] for _ in range(nr_streams)]
+    start = perf_counter()
+    result = host._predict(inputs)
+    latencies.append(perf_counter() - start)
+    assert all(np.isclose(res[0], inp[0].sum()) for res, inp in zip(result, inputs))
+  # endfor steps
+  latencies = np.array(latencies) * 1000
+  throughput = nr_streams * nr_steps / latencies.sum() * 1000
+  return throughput, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--steps', type=int, default=200)
+  args = parser.parse_args()
+
+  for nr_streams in NR_STREAMS:
+    for max_batch in [None] + MAX_BATCH:
+      throughput, p50, p99 = run(max_batch, nr_streams, args.steps)
+      label = 'per input' if max_batch is None else f'MAX_BATCH={max_batch}'
+      print(f"{nr_streams:4d} streams | {label:<14} | {throughput:10.1f} inputs/s | "
+            f"step latency p50 {p50:7.3f}ms p99 {p99:7.3f}ms")
+    # endfor max batch
+  # endfor streams
+  return
+
+
+if __name__ == '__main__':
+  main()